@@ -1,8 +1,10 @@
 import streamlit as st
-import cv2
-import numpy as np
-from utils.pose_utils import PoseDetector, PushUpAnalyzer
+import os
+import uuid
+import weakref
 from utils.audio_manager import AudioManager
+from utils.camera_worker import CameraWorker, CameraWorkerRegistry
+from utils.resource_governor import ResourceGovernor
 
 # ----------------------- PAGE CONFIG -----------------------
 st.set_page_config(
@@ -11,12 +13,18 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# ----------------------- LOAD CSS -----------------------
-with open("assets/style.css") as f:
-    st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
+# ----------------------- STATIC RESOURCES (built once per process) -----------------------
+@st.cache_resource
+def load_css():
+    with open("assets/style.css") as f:
+        return f"<style>{f.read()}</style>"
 
-# ----------------------- AUDIO -----------------------
-audio_manager = AudioManager("assets/beep.wav", "assets/chime.wav")
+@st.cache_resource
+def get_audio_manager():
+    return AudioManager("assets/beep.wav", "assets/chime.wav")
+
+st.markdown(load_css(), unsafe_allow_html=True)
+audio_manager = get_audio_manager()
 
 # ----------------------- SESSION STATE -----------------------
 if "total_reps" not in st.session_state:
@@ -33,111 +41,67 @@ TRACKING_CONF = 0.3
 ELBOW_DOWN_THRESHOLD = 80
 ELBOW_UP_THRESHOLD = 165
 BACK_TOLERANCE = 20
-SMOOTHING_ALPHA = 0.2
-COOLDOWN_FRAMES = 8
+SMOOTHING_TAU = 0.1       # seconds; time-based, so the same as backend.py at any frame rate
+COOLDOWN_SECONDS = 0.5
+
+# ----------------------- SHARED CAMERA WORKERS -----------------------
+# Frame source spec (see utils/frame_source.py), e.g. "webcam:0", "file:clip.mp4", "synthetic"
+CAMERA_SRC = os.environ.get("PUSHUP_CAMERA_SOURCE", "webcam:0")
+# CPU budget split between camera workers (see utils/resource_governor.py); 0 cores = all
+CPU_CORES = int(os.environ.get("PUSHUP_CPU_CORES", "0"))
+CPU_SESSIONS = int(os.environ.get("PUSHUP_CPU_SESSIONS", "1"))
+PIN_CPUS = os.environ.get("PUSHUP_PIN_CPUS", "0") == "1"
+
+@st.cache_resource
+def get_resource_governor():
+    return ResourceGovernor(CPU_CORES or None, CPU_SESSIONS, pin=PIN_CPUS)
+
+def make_camera_worker(src):
+    return CameraWorker(
+        src=src,
+        detector_args=(MODEL_COMPLEXITY, MIN_DETECTION_CONF, TRACKING_CONF),
+        analyzer_kwargs=dict(
+            elbow_down_threshold=ELBOW_DOWN_THRESHOLD,
+            elbow_up_threshold=ELBOW_UP_THRESHOLD,
+            back_tolerance=BACK_TOLERANCE,
+            smoothing_tau=SMOOTHING_TAU,
+            cooldown_seconds=COOLDOWN_SECONDS,
+        ),
+        audio_manager=audio_manager,
+        governor=get_resource_governor(),
+    )
 
-# ----------------------- VIDEO PROCESSOR (Browser client) -----------------------
-import time
-import threading
+@st.cache_resource
+def get_worker_registry():
+    # One registry per process: every tab watching a camera shares its worker
+    return CameraWorkerRegistry(make_camera_worker)
 
-class CameraWorker(threading.Thread):
-    """Optimized background thread for camera capture and pose detection."""
+class SessionSubscription:
+    """Ties this browser session to a shared worker; unsubscribes when the session is dropped."""
 
-    def __init__(self, src=0):
-        super().__init__()
+    def __init__(self, registry, src):
+        self.registry = registry
         self.src = src
-        self.cap = None
-        self.running = False
-        self.frame = None
-        self.lock = threading.Lock()
-        self.pose_detector = PoseDetector(MODEL_COMPLEXITY, MIN_DETECTION_CONF, TRACKING_CONF)
-        self.analyzer = PushUpAnalyzer(
-            elbow_down_threshold=ELBOW_DOWN_THRESHOLD,
-            elbow_up_threshold=ELBOW_UP_THRESHOLD,
-            back_tolerance=BACK_TOLERANCE,
-            smoothing_alpha=SMOOTHING_ALPHA,
-            cooldown_frames=COOLDOWN_FRAMES,
-        )
-        self.last_form = "Neutral"
-        self.data = {}
-        self.daemon = True
-
-    def start_camera(self):
-        if not self.running:
-            self.running = True
-            if not self.is_alive():
-                self.start()
-
-    def stop_camera(self):
-        self.running = False
-
-    def run(self):
-        """Optimized capture loop with minimal overhead."""
-        while True:
-            if self.running:
-                # Initialize camera once
-                if self.cap is None or not self.cap.isOpened():
-                    self.cap = cv2.VideoCapture(self.src)
-                    self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-                    self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-                    self.cap.set(cv2.CAP_PROP_FPS, 30)
-
-                ret, img = self.cap.read()
-                if not ret:
-                    time.sleep(0.03)
-                    continue
-
-                # Pose detection and analysis
-                results = self.pose_detector.detect_landmarks(img)
-                
-                if results.pose_landmarks:
-                    h, w = img.shape[:2]
-                    keypoints = self.pose_detector.get_keypoints(results, w, h)
-                    analysis = self.analyzer.analyze_pose(keypoints)
-                    
-                    # Update shared data atomically
-                    self.data.update({
-                        'total_reps': analysis.get("total_reps", 0),
-                        'form_state': analysis.get("form_state", "Neutral"),
-                        'stage': analysis.get("stage", "Up")
-                    })
-
-                    # Audio feedback
-                    form = analysis.get("form_state", "Neutral")
-                    if form != self.last_form:
-                        if form == "Wrong":
-                            audio_manager.play_beep("Wrong")
-                        elif form == "Correct":
-                            audio_manager.play_chime("Correct")
-                        self.last_form = form
-
-                    # Draw skeleton with form-based color
-                    color = (0, 255, 0) if form == "Correct" else (255, 0, 0)
-                    img = self.pose_detector.draw_skeleton(img, results, color=color)
-
-                # Convert to RGB once
-                disp = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-
-                with self.lock:
-                    self.frame = disp
-
-                time.sleep(0.02)
-            else:
-                # Clean up when stopped
-                if self.cap is not None:
-                    self.cap.release()
-                    self.cap = None
-                time.sleep(0.1)
-
-# Initialize CameraWorker in session_state
-if "camera_worker" not in st.session_state:
-    st.session_state.camera_worker = CameraWorker(src=0)
-
-cw = st.session_state.camera_worker
-
-# Sync session state from shared data
-for key in ['total_reps', 'form_state', 'stage']:
-    st.session_state[key] = cw.data.get(key, st.session_state.get(key, 0 if key == 'total_reps' else 'Neutral' if key == 'form_state' else 'Up'))
+        self.token = uuid.uuid4().hex
+        self.active = False
+        weakref.finalize(self, registry.unsubscribe, src, self.token)
+
+    def subscribe(self):
+        self.registry.subscribe(self.src, self.token)
+        self.active = True
+
+    def unsubscribe(self):
+        self.registry.unsubscribe(self.src, self.token)
+        self.active = False
+
+    @property
+    def worker(self):
+        return self.registry.get(self.src) if self.active else None
+
+if "subscription" not in st.session_state:
+    st.session_state.subscription = SessionSubscription(get_worker_registry(), CAMERA_SRC)
+
+sub = st.session_state.subscription
 
 # ----------------------- HEADER -----------------------
 st.markdown('''
@@ -146,83 +110,103 @@ st.markdown('''
 </div>
 ''', unsafe_allow_html=True)
 
-# ----------------------- STATS ROW -----------------------
-col1, col2, col3 = st.columns(3)
-
-# Determine form state color class
-form_class = "neo-card-correct" if st.session_state.form_state == "Correct" else \
-             "neo-card-wrong" if st.session_state.form_state == "Wrong" else \
-             "neo-card-neutral"
-
-with col1:
-    st.markdown(f'''
-    <div class="neo-card {form_class}" style="text-align: center;">
-        <h2>{st.session_state.form_state.upper()}</h2>
-        <p>FORM STATUS</p>
-    </div>
-    ''', unsafe_allow_html=True)
-
-with col2:
-    st.markdown(f'''
-    <div class="neo-card" style="text-align: center;">
-        <h2>{st.session_state.total_reps}</h2>
-        <p>TOTAL REPS</p>
-    </div>
-    ''', unsafe_allow_html=True)
-
-with col3:
-    st.markdown(f'''
-    <div class="neo-card" style="text-align: center;">
-        <h2>{st.session_state.stage.upper()}</h2>
-        <p>STAGE</p>
-    </div>
-    ''', unsafe_allow_html=True)
-
-# ----------------------- CAMERA FEED -----------------------
-st.markdown('<div class="camera-container">', unsafe_allow_html=True)
-st.markdown('<h3 style="text-align: center; margin-bottom: 1rem;">📹 LIVE FEED</h3>', unsafe_allow_html=True)
-img_placeholder = st.empty()
-st.markdown('</div>', unsafe_allow_html=True)
+# ----------------------- CONTROL CALLBACKS -----------------------
+# Callbacks run before the rerun, so the live fragment below already sees the new state.
+def on_start():
+    if not sub.active:
+        sub.subscribe()
+
+def on_stop():
+    if sub.active:
+        sub.unsubscribe()
+
+def on_reset():
+    # The worker is shared, so this resets the counter for every tab on this camera
+    cw = sub.worker
+    if cw is not None:
+        cw.reset()
+    st.session_state.total_reps = 0
+    st.session_state.form_state = "Neutral"
+    st.session_state.stage = "Up"
+
+# ----------------------- LIVE STATS + FEED -----------------------
+# Only this fragment reruns while tracking; the rest of the page is built once per interaction.
+@st.fragment(run_every=0.05 if sub.active else None)
+def live_panel():
+    cw = sub.worker
+    data = cw.data if cw is not None else {}
+
+    # Sync session state from shared data
+    for key in ['total_reps', 'form_state', 'stage']:
+        st.session_state[key] = data.get(key, st.session_state.get(key, 0 if key == 'total_reps' else 'Neutral' if key == 'form_state' else 'Up'))
+
+    # ----------------------- STATS ROW -----------------------
+    col1, col2, col3 = st.columns(3)
+
+    # Determine form state color class
+    form_class = "neo-card-correct" if st.session_state.form_state == "Correct" else \
+                 "neo-card-wrong" if st.session_state.form_state == "Wrong" else \
+                 "neo-card-neutral"
+
+    with col1:
+        st.markdown(f'''
+        <div class="neo-card {form_class}" style="text-align: center;">
+            <h2>{st.session_state.form_state.upper()}</h2>
+            <p>FORM STATUS</p>
+        </div>
+        ''', unsafe_allow_html=True)
+
+    with col2:
+        st.markdown(f'''
+        <div class="neo-card" style="text-align: center;">
+            <h2>{st.session_state.total_reps}</h2>
+            <p>TOTAL REPS</p>
+        </div>
+        ''', unsafe_allow_html=True)
+
+    with col3:
+        st.markdown(f'''
+        <div class="neo-card" style="text-align: center;">
+            <h2>{st.session_state.stage.upper()}</h2>
+            <p>STAGE</p>
+        </div>
+        ''', unsafe_allow_html=True)
+
+    # ----------------------- CAMERA FEED -----------------------
+    st.markdown('<div class="camera-container">', unsafe_allow_html=True)
+    st.markdown('<h3 style="text-align: center; margin-bottom: 1rem;">📹 LIVE FEED</h3>', unsafe_allow_html=True)
+    img_placeholder = st.empty()
+    st.markdown('</div>', unsafe_allow_html=True)
+
+    if cw is not None and cw.running:
+        with cw.lock:
+            frame = cw.frame
+        if frame is not None:
+            img_placeholder.image(frame, channels="RGB", use_container_width=True)
+        else:
+            img_placeholder.markdown(
+                '<div style="text-align: center; padding: 3rem; font-size: 1.5rem;">⚡ INITIALIZING...</div>',
+                unsafe_allow_html=True
+            )
+    else:
+        img_placeholder.markdown(
+            '<div style="text-align: center; padding: 3rem; font-size: 1.5rem;">📷 PRESS START TO BEGIN</div>',
+            unsafe_allow_html=True
+        )
+
+live_panel()
 
 # ----------------------- CONTROLS -----------------------
 st.markdown('<div style="margin-top: 2rem;">', unsafe_allow_html=True)
 ctrl_col1, ctrl_col2, ctrl_col3 = st.columns(3)
 
 with ctrl_col1:
-    if st.button("🚀 START", key="start_btn", use_container_width=True):
-        if not cw.running:
-            cw.start_camera()
+    st.button("🚀 START", key="start_btn", use_container_width=True, on_click=on_start)
 
 with ctrl_col2:
-    if st.button("⏸️ STOP", key="stop_btn", use_container_width=True):
-        if cw.running:
-            cw.stop_camera()
+    st.button("⏸️ STOP", key="stop_btn", use_container_width=True, on_click=on_stop)
 
 with ctrl_col3:
-    if st.button("🔄 RESET", key="reset_btn", use_container_width=True):
-        cw.analyzer.reset()
-        cw.data = {}
-        st.session_state.total_reps = 0
-        st.session_state.form_state = "Neutral"
-        st.session_state.stage = "Up"
+    st.button("🔄 RESET", key="reset_btn", use_container_width=True, on_click=on_reset)
 
 st.markdown('</div>', unsafe_allow_html=True)
-
-# ----------------------- DISPLAY LOOP -----------------------
-if cw.running:
-    with cw.lock:
-        frame = cw.frame
-    if frame is not None:
-        img_placeholder.image(frame, channels="RGB", use_container_width=True)
-    else:
-        img_placeholder.markdown(
-            '<div style="text-align: center; padding: 3rem; font-size: 1.5rem;">⚡ INITIALIZING...</div>',
-            unsafe_allow_html=True
-        )
-    time.sleep(0.05)
-    st.rerun()
-else:
-    img_placeholder.markdown(
-        '<div style="text-align: center; padding: 3rem; font-size: 1.5rem;">📷 PRESS START TO BEGIN</div>',
-        unsafe_allow_html=True
-    )
@@ -3,17 +3,40 @@ FastAPI Backend for AI Push-Up Tracker
 Provides REST API endpoints and video streaming with pose detection
 """
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, FileResponse
+from starlette.background import BackgroundTask
 import cv2
 import numpy as np
 import json
 import asyncio
 from typing import Optional
 import base64
+import os
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from collections import deque
 from utils.pose_utils import PoseDetector, PushUpAnalyzer
 from utils.audio_manager import AudioManager
+from utils.landmark_filter import LandmarkPredictor
+from utils.pose_tracker import PoseTracker
+from utils.batch_analyzer import BatchPushUpAnalyzer
+from utils.exercises import MultiExerciseAnalyzer, PushUpExercise, EXERCISES
+from utils.remote_inference import InferencePool, RemotePoseDetector
+from utils.frame_ring import RingCapture
+from utils.frame_source import create_frame_source
+from utils.video_encoder import H264_AVAILABLE, H264StreamEncoder, KEYFRAME_FLAG, DELTA_FLAG, FRAME_INFO
+from utils.state_broker import connect_shared_state, start_broker
+from utils.session_recorder import SessionRecorder, open_recording, iter_csv, export_recording, prune_recordings
+from utils.latency import LatencyTracker
+from utils.clip_capture import ClipCapture
+from utils.qos import QosController
+from utils.memory_tracker import AllocationTracker
+from utils.resource_governor import ResourceGovernor
 
 # ----------------------- CONFIGURATION -----------------------
 MODEL_COMPLEXITY = 0
@@ -22,8 +45,51 @@ TRACKING_CONF = 0.5
 ELBOW_DOWN_THRESHOLD = 90
 ELBOW_UP_THRESHOLD = 160
 BACK_TOLERANCE = 25
-SMOOTHING_ALPHA = 0.3
-COOLDOWN_FRAMES = 15
+SMOOTHING_TAU = 0.1           # elbow-angle EMA time constant (seconds)
+COOLDOWN_SECONDS = 0.5        # minimum time between counted reps
+INFERENCE_EVERY_N_FRAMES = 1  # 2 = run pose inference on every other frame
+PREDICT_LANDMARKS = True      # extrapolate the overlay to display time
+EXTRA_EXERCISES = ()          # e.g. ("squat", "situp", "plank"), analyzed alongside push-ups
+NUM_POSES = 1                 # >1 enables multi-athlete tracking (one analyzer per person)
+# Comma-separated host:port list of inference_worker.py instances; empty = in-process PoseDetector
+INFERENCE_WORKERS = [a for a in os.environ.get("PUSHUP_INFERENCE_WORKERS", "").split(",") if a.strip()]
+INFERENCE_TIMEOUT = 0.5
+INFERENCE_MAX_IN_FLIGHT = 4   # frames of one camera at the workers at once (~1-2 per worker)
+# Frame source spec (see utils/frame_source.py): "webcam:0", "file:clip.mp4?realtime=0", "images:dir", "synthetic"
+CAMERA_SOURCE = os.environ.get("PUSHUP_CAMERA_SOURCE", "webcam:0")
+CAPTURE_PROCESS = False       # capture in a separate process via a shared-memory frame ring
+JPEG_QUALITY = 85             # /video_feed MJPEG quality
+QOS_ENABLED = True            # degrade stream quality, overlay, then inference under load (see GET /qos)
+TARGET_FPS = 30               # per-frame pipeline budget for QoS is 1000 / TARGET_FPS ms
+H264_BITRATE = 800_000        # /ws/video target bitrate (bits/s)
+H264_GOP = 60                 # keyframe interval in frames for /ws/video
+MAX_DISPLAY_REPORT = 256      # frames accepted per client latency report
+# Shared-state broker "host:port" (state_broker.py) for running several API workers; empty = single process
+STATE_BROKER = os.environ.get("PUSHUP_STATE_BROKER", "")
+API_WORKERS = int(os.environ.get("PUSHUP_API_WORKERS", "1"))
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+CAMERA_LEASE_SECONDS = 5.0    # camera ownership lease, renewed by the owning worker
+SESSION_TTL = 10.0            # session registry entries expire unless refreshed
+BROKER_ERROR_LOG_INTERVAL = 10.0  # seconds between repeated "state broker unavailable" warnings
+RECORD_SESSIONS = True        # keep per-frame analysis for export (/recordings)
+RECORDINGS_DIR = "recordings"
+MAX_RECORDINGS = 50           # oldest recordings are deleted when a session starts beyond these limits
+MAX_RECORDINGS_MB = 500
+CAPTURE_CLIPS = True          # save a clip around each switch to "Wrong" form (/clips)
+CLIPS_DIR = "clips"
+CLIP_PRE_SECONDS = 3.0
+CLIP_POST_SECONDS = 2.0
+CLIP_BUFFER_MB = 32           # JPEG history per camera session
+MAX_CLIPS = 200               # oldest clips are deleted beyond these limits
+MAX_CLIPS_MB = 1000
+# CPU budget for the pose pipelines on this host (see utils/resource_governor.py): cores to use
+# (0 = all), how many backend/inference processes share them, this process's slot, pin to CPUs
+CPU_CORES = int(os.environ.get("PUSHUP_CPU_CORES", "0"))
+CPU_SESSIONS = int(os.environ.get("PUSHUP_CPU_SESSIONS", "1"))
+CPU_SLOT = int(os.environ.get("PUSHUP_CPU_SLOT", "0"))
+PIN_CPUS = os.environ.get("PUSHUP_PIN_CPUS", "0") == "1"
+# Stack depth for tracemalloc from startup (0 = off; tracing can also be started via /admin/tracemalloc/start)
+TRACEMALLOC_FRAMES = int(os.environ.get("PUSHUP_TRACEMALLOC", "0"))
 
 # ----------------------- FASTAPI SETUP -----------------------
 app = FastAPI(title="AI Push-Up Tracker API")
@@ -38,27 +104,187 @@ app.add_middleware(
 )
 
 # ----------------------- GLOBAL STATE -----------------------
+def make_analyzer():
+    return PushUpAnalyzer(
+        elbow_down_threshold=ELBOW_DOWN_THRESHOLD,
+        elbow_up_threshold=ELBOW_UP_THRESHOLD,
+        back_tolerance=BACK_TOLERANCE,
+        smoothing_tau=SMOOTHING_TAU,
+        cooldown_seconds=COOLDOWN_SECONDS,
+    )
+
+def make_batch_analyzer():
+    """Vectorized analyzer shared by all tracked athletes (same settings as make_analyzer)"""
+    return BatchPushUpAnalyzer(
+        elbow_down_threshold=ELBOW_DOWN_THRESHOLD,
+        elbow_up_threshold=ELBOW_UP_THRESHOLD,
+        back_tolerance=BACK_TOLERANCE,
+        smoothing_tau=SMOOTHING_TAU,
+        cooldown_seconds=COOLDOWN_SECONDS,
+        capacity=max(4, NUM_POSES * 2),
+    )
+
+# Camera lifecycle states (see /camera/status)
+CAMERA_STOPPED = "stopped"
+CAMERA_STARTING = "starting"
+CAMERA_RUNNING = "running"
+CAMERA_STOPPING = "stopping"
+
 class AppState:
     def __init__(self):
         self.camera = None
         self.running = False
-        self.pose_detector = PoseDetector(MODEL_COMPLEXITY, MIN_DETECTION_CONF, TRACKING_CONF)
-        self.analyzer = PushUpAnalyzer(
-            elbow_down_threshold=ELBOW_DOWN_THRESHOLD,
-            elbow_up_threshold=ELBOW_UP_THRESHOLD,
-            back_tolerance=BACK_TOLERANCE,
-            smoothing_alpha=SMOOTHING_ALPHA,
-            cooldown_frames=COOLDOWN_FRAMES,
+        self.camera_state = CAMERA_STOPPED
+        self.camera_error = None
+        self.camera_task = None       # pending open, awaited by /camera/stop
+        self.camera_generation = 0    # bumped on stop so a late open is discarded
+        self.camera_lock = threading.Lock()  # guards state transitions
+        self.read_lock = threading.Lock()    # serializes camera.read() against release()
+        # Applied before any pipeline thread starts so they all inherit it
+        self.governor = ResourceGovernor(CPU_CORES or None, CPU_SESSIONS, pin=PIN_CPUS)
+        self.resources = self.governor.allocation(CPU_SLOT)
+        self.resources.apply_process()
+        if INFERENCE_WORKERS:
+            pool = InferencePool(INFERENCE_WORKERS, max_in_flight=INFERENCE_MAX_IN_FLIGHT, timeout=INFERENCE_TIMEOUT)
+            self.pose_detector = RemotePoseDetector(pool, settings={
+                "detection_confidence": MIN_DETECTION_CONF, "tracking_confidence": TRACKING_CONF, "num_poses": NUM_POSES})
+        else:
+            self.pose_detector = PoseDetector(MODEL_COMPLEXITY, MIN_DETECTION_CONF, TRACKING_CONF, num_poses=NUM_POSES,
+                                              resources=self.resources)
+        self.analyzer = make_analyzer()
+        self.tracker = PoseTracker(make_analyzer, batch=make_batch_analyzer())
+        # Push-ups plus any extra exercises, all fed from one shared feature pass
+        self.exercise_suite = MultiExerciseAnalyzer(
+            [PushUpExercise(self.analyzer)] + [EXERCISES[name]() for name in EXTRA_EXERCISES]
         )
         self.audio_manager = AudioManager("assets/beep.wav", "assets/chime.wav")
+        self.landmark_predictor = LandmarkPredictor()
+        self.recorder = None
+        self.clip_capture = None
+        self.latency = LatencyTracker()
+        self.qos = QosController(frame_budget_ms=1000.0 / TARGET_FPS)
+        self.allocations = AllocationTracker()
+        self.last_results = None
+        self.frame_index = 0
         self.last_form = "Neutral"
         self.stats = {
             "total_reps": 0,
             "form_state": "Neutral",
             "stage": "Up"
         }
+        # Shared across API workers (broker) or in-process (single worker)
+        self.shared = connect_shared_state(STATE_BROKER)
+        self.shared_stats = self.shared.get(STATS_KEY, dict(self.stats))
+        self.shared_camera = self.shared.get(CAMERA_STATUS_KEY)
+        self.published_stats = None
+        self.broker_error_logged = None  # monotonic time of the last broker warning
+        self.frame_cond = threading.Condition()
+        self.frame_seq = 0
+        self.latest_jpeg = None
+        self.camera_thread = None     # camera_owner_loop of the running camera
+        self.latest_frame = None      # annotated frame (copy), kept only while H.264 viewers are connected
+        self.h264_viewers = 0
+        self.latest_frame_info = {}
+        self.frames_subscribed = False
+
+# ----------------------- SHARED STATE -----------------------
+# Keys and channels in the shared store
+STATS_KEY = "stats"
+CAMERA_OWNER_KEY = "camera/owner"
+CAMERA_STATUS_KEY = "camera/status"
+SESSION_PREFIX = "sessions/"
+
+def on_stats_message(message, data):
+    state.shared_stats = message
+
+def on_camera_message(message, data):
+    state.shared_camera = message
+
+def on_frame_message(message, data):
+    set_latest_frame(data, message)
+
+def set_latest_frame(frame_bytes, info, frame=None):
+    """Hand the newest encoded frame (and annotated frame, for H.264 viewers) to every local viewer"""
+    with state.frame_cond:
+        state.latest_jpeg = frame_bytes
+        state.latest_frame = frame
+        state.latest_frame_info = info or {}
+        state.frame_seq += 1
+        state.frame_cond.notify_all()
+
+def on_latency_message(message, data):
+    for report in message["frames"]:
+        try:
+            frame_id, capture_time, display_time = report
+            state.latency.record_display(message["client_id"], int(frame_id), float(capture_time), float(display_time))
+        except (TypeError, ValueError):
+            continue  # malformed client report
+
+def on_control_message(message, data):
+    op = message.get("op")
+    if op == "reset":
+        handler = reset_local_state
+    elif op == "stop" and message.get("owner") == WORKER_ID:
+        handler = stop_camera_sync
+    else:
+        return
+    # Callbacks run on the broker reader thread, which must not block or call back into the broker
+    threading.Thread(target=handler, daemon=True).start()
+
+def broker_failed(action, error):
+    """Log a failed shared-state call (rate-limited); callers carry on with local state"""
+    now = time.monotonic()
+    if state.broker_error_logged is None or now - state.broker_error_logged >= BROKER_ERROR_LOG_INTERVAL:
+        state.broker_error_logged = now
+        print(f"⚠️ State broker unavailable ({action}: {error}); continuing with local state")
+
+def publish_stats():
+    """Share the stats snapshot with every API worker when it changed"""
+    if state.stats != state.published_stats:
+        state.published_stats = dict(state.stats)
+        try:
+            state.shared.set(STATS_KEY, state.published_stats)
+            state.shared.publish("stats", state.published_stats)
+        except OSError as e:  # ConnectionError, including broker timeouts
+            broker_failed("publish stats", e)
+            state.shared_stats = state.published_stats  # /stats serves this worker's own numbers
+
+def publish_camera_status():
+    status = dict(local_camera_status(), owner=WORKER_ID, updated=time.time())
+    try:
+        state.shared.set(CAMERA_STATUS_KEY, status, ttl=CAMERA_LEASE_SECONDS)
+        state.shared.publish("camera", status)
+    except OSError as e:
+        broker_failed("publish camera status", e)
+
+def register_session(kind):
+    session_id = uuid.uuid4().hex
+    try:
+        state.shared.set(SESSION_PREFIX + session_id, {"worker": WORKER_ID, "kind": kind, "started": time.time()},
+                         ttl=SESSION_TTL)
+    except OSError as e:
+        broker_failed("register session", e)
+    return session_id
+
+def refresh_session(session_id):
+    try:
+        state.shared.expire(SESSION_PREFIX + session_id, SESSION_TTL)
+    except OSError as e:
+        broker_failed("refresh session", e)
+
+def unregister_session(session_id):
+    try:
+        state.shared.delete(SESSION_PREFIX + session_id)
+    except OSError as e:
+        broker_failed("unregister session", e)
 
 state = AppState()
+if TRACEMALLOC_FRAMES:
+    state.allocations.start(TRACEMALLOC_FRAMES)
+state.shared.subscribe("stats", on_stats_message)
+state.shared.subscribe("camera", on_camera_message)
+state.shared.subscribe("control", on_control_message)
+state.shared.subscribe("latency", on_latency_message)
 
 # ----------------------- API ENDPOINTS -----------------------
 
@@ -66,37 +292,238 @@ state = AppState()
 async def root():
     return {"message": "AI Push-Up Tracker API", "status": "running"}
 
+def open_camera():
+    """Open and configure the frame source (blocking; runs in a worker thread)"""
+    if CAPTURE_PROCESS:
+        # Capture process writes into shared memory; no frame pickling across processes
+        camera = RingCapture(CAMERA_SOURCE, shape=(480, 640, 3))
+    else:
+        camera = create_frame_source(CAMERA_SOURCE)
+    return camera, camera.isOpened()
+
+def release_camera(camera):
+    """Release a frame source once no reader is inside read() (blocking)"""
+    with state.read_lock:
+        camera.release()
+
+async def run_camera_start(generation):
+    """Open the camera off the event loop and publish it unless a stop arrived meanwhile"""
+    try:
+        camera, opened = await asyncio.to_thread(open_camera)
+        error = None if opened else "Could not access camera. Check permissions."
+    except Exception as e:
+        camera, opened, error = None, False, f"Could not open camera: {e}"
+
+    with state.camera_lock:
+        current = state.camera_generation == generation
+        if current and opened:
+            state.camera = camera
+            state.camera_state = CAMERA_RUNNING
+            state.running = True
+        elif current:
+            state.camera_state = CAMERA_STOPPED
+            state.camera_error = error
+    if current and opened:
+        try:  # a slow open may outlast the lease
+            await asyncio.to_thread(state.shared.setnx, CAMERA_OWNER_KEY, WORKER_ID, ttl=CAMERA_LEASE_SECONDS)
+        except OSError as e:
+            broker_failed("renew camera lease", e)
+        recorder, clip_capture = await asyncio.to_thread(open_session_outputs)
+        with state.camera_lock:
+            current = state.camera_generation == generation
+            if current:
+                state.recorder, state.clip_capture = recorder, clip_capture
+        if not current:
+            # Stopped (e.g. relayed from another worker) while the lease and outputs were set up
+            await asyncio.to_thread(close_session_outputs, recorder, clip_capture)
+            if state.camera_state == CAMERA_STOPPED:  # not restarted meanwhile: drop the lease renewed above
+                await asyncio.to_thread(release_camera_lease)
+            return
+        await asyncio.to_thread(publish_camera_status)
+        thread = threading.Thread(target=camera_owner_loop, args=(generation,), daemon=True)
+        with state.camera_lock:
+            if state.camera_generation != generation:
+                return  # stopped meanwhile; the stop path already ran
+            state.camera_thread = thread
+            thread.start()
+        return
+    if current:
+        await asyncio.to_thread(release_camera_lease)
+    if camera is not None:
+        await asyncio.to_thread(camera.release)
+
+def open_session_outputs():
+    """Create this camera session's recorder and clip capture (blocking; runs in a worker thread)
+
+    Returns (recorder, clip_capture); either is None when disabled or when it could
+    not be created, in which case the session runs without it.
+    """
+    # Time-sortable and unique even when sessions start within the same second
+    session_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    recorder = clip_capture = None
+    if RECORD_SESSIONS:
+        try:
+            prune_recordings(RECORDINGS_DIR, max(0, MAX_RECORDINGS - 1), MAX_RECORDINGS_MB * 2**20)
+            recorder = SessionRecorder(os.path.join(RECORDINGS_DIR, session_id + ".bin"))
+        except OSError as e:
+            print(f"⚠️ Session recording disabled for this session: {e}")
+    if CAPTURE_CLIPS:
+        try:
+            clip_capture = ClipCapture(CLIPS_DIR, session_id, CLIP_PRE_SECONDS, CLIP_POST_SECONDS,
+                                       max_bytes=CLIP_BUFFER_MB * 2**20, max_clips=MAX_CLIPS,
+                                       max_disk_bytes=MAX_CLIPS_MB * 2**20)
+        except (OSError, RuntimeError) as e:  # RuntimeError: writer thread could not start
+            print(f"⚠️ Clip capture disabled for this session: {e}")
+    return recorder, clip_capture
+
+def close_session_outputs(recorder, clip_capture):
+    """Flush the recording and drain the clip writer (blocking)"""
+    if recorder is not None:
+        recorder.close()
+    if clip_capture is not None:
+        clip_capture.close()
+
+def local_camera_status():
+    return {
+        "state": state.camera_state,
+        "running": state.camera_state == CAMERA_RUNNING,
+        "error": state.camera_error,
+        "source": str(CAMERA_SOURCE),
+    }
+
+def camera_status():
+    """This worker's camera state, or the owning worker's when the camera lives elsewhere"""
+    status = local_camera_status()
+    shared = state.shared_camera
+    if status["state"] == CAMERA_STOPPED and shared and time.time() - shared["updated"] < CAMERA_LEASE_SECONDS:
+        return shared
+    return status
+
 @app.post("/camera/start")
-async def start_camera():
-    """Start the camera capture"""
-    if not state.running:
-        state.camera = cv2.VideoCapture(0)
-        if not state.camera.isOpened():
-            state.camera = None
-            return {"status": "error", "message": "Could not access camera. Check permissions."}
-        
-        state.camera.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        state.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-        state.camera.set(cv2.CAP_PROP_FPS, 30)
-        state.running = True
+async def start_camera(wait: bool = False):
+    """Start the camera capture
+
+    Opening the device happens in a worker thread; the call returns immediately
+    with state "starting" and /camera/status reports when capture is live.
+    Pass ?wait=true to block until the camera is running or has failed.
+    """
+    with state.camera_lock:
+        if state.camera_state != CAMERA_STOPPED:
+            return {"status": "already_running" if state.camera_state == CAMERA_RUNNING else state.camera_state,
+                    "message": f"Camera is {state.camera_state}", "camera": camera_status()}
+        # Claim the start locally; the broker round trips below run off the event loop
+        state.camera_state = CAMERA_STARTING
+        state.camera_error = None
+        generation = state.camera_generation
+
+    # Only one API worker may own the device
+    try:
+        acquired = await asyncio.to_thread(state.shared.setnx, CAMERA_OWNER_KEY, WORKER_ID,
+                                           ttl=CAMERA_LEASE_SECONDS)
+        owner = None if acquired else await asyncio.to_thread(state.shared.get, CAMERA_OWNER_KEY)
+    except OSError as e:
+        with state.camera_lock:
+            if state.camera_generation == generation:
+                state.camera_state = CAMERA_STOPPED
+        raise HTTPException(status_code=503, detail=f"State broker unavailable: {e}")
+
+    with state.camera_lock:
+        current = state.camera_generation == generation
+        if current and acquired:
+            state.camera_task = asyncio.create_task(run_camera_start(generation))
+            task = state.camera_task
+        elif current:
+            state.camera_state = CAMERA_STOPPED
+    if not current:
+        # /camera/stop arrived while the lease was being taken
+        if acquired:
+            await asyncio.to_thread(release_camera_lease)
+        return {"status": "stopped", "message": "Camera was stopped while starting"}
+    if not acquired:
+        return {"status": "already_running", "message": f"Camera is owned by worker {owner}",
+                "camera": camera_status()}
+    await asyncio.to_thread(publish_camera_status)
+
+    if wait:
+        await task
+        if state.camera_state != CAMERA_RUNNING:
+            return {"status": "error", "message": state.camera_error or "Camera start was cancelled"}
         return {"status": "started", "message": "Camera started successfully"}
-    return {"status": "already_running", "message": "Camera is already running"}
+    return {"status": "starting", "message": "Camera is starting", "camera": camera_status()}
 
 @app.post("/camera/stop")
 async def stop_camera():
     """Stop the camera capture"""
-    if state.running:
+    with state.camera_lock:
+        running = state.camera_state in (CAMERA_STARTING, CAMERA_RUNNING)
+        if running:
+            state.camera_generation += 1
+            state.camera_state = CAMERA_STOPPING
+            state.running = False
+            camera, state.camera = state.camera, None
+            task, state.camera_task = state.camera_task, None
+    if not running:
+        try:
+            owner = await asyncio.to_thread(state.shared.get, CAMERA_OWNER_KEY)
+            if owner and owner != WORKER_ID:
+                # Another API worker owns the camera; ask it to stop
+                await asyncio.to_thread(state.shared.publish, "control", {"op": "stop", "owner": owner})
+                return {"status": "stopping", "message": f"Stop requested from worker {owner}"}
+        except OSError as e:
+            raise HTTPException(status_code=503, detail=f"State broker unavailable: {e}")
+        return {"status": "not_running", "message": "Camera is not running"}
+
+    # A pending open sees the new generation and releases its own device
+    if task is not None:
+        await task
+    if camera is not None:
+        await asyncio.to_thread(release_camera, camera)
+    # Flushing the recording, draining the clip writer and releasing the lease all block
+    await asyncio.to_thread(finish_camera_stop)
+    return {"status": "stopped", "message": "Camera stopped successfully"}
+
+def stop_camera_sync():
+    """Blocking stop for requests relayed from other API workers"""
+    with state.camera_lock:
+        if state.camera_state not in (CAMERA_STARTING, CAMERA_RUNNING):
+            return
+        state.camera_generation += 1
+        state.camera_state = CAMERA_STOPPING
         state.running = False
-        if state.camera:
-            state.camera.release()
-            state.camera = None
-        return {"status": "stopped", "message": "Camera stopped successfully"}
-    return {"status": "not_running", "message": "Camera is not running"}
+        camera, state.camera = state.camera, None
+        state.camera_task = None
+    if camera is not None:
+        release_camera(camera)
+    finish_camera_stop()
 
-@app.post("/reset")
-async def reset_stats():
-    """Reset rep counter and stats"""
-    state.analyzer.reset()
+def finish_camera_stop():
+    with state.camera_lock:
+        thread, state.camera_thread = state.camera_thread, None
+    if thread is not None:
+        # The loop sees the new generation after its current frame; let it finish with the outputs
+        thread.join(5.0)
+    with state.camera_lock:
+        state.camera_state = CAMERA_STOPPED
+        recorder, state.recorder = state.recorder, None
+        clip_capture, state.clip_capture = state.clip_capture, None
+    close_session_outputs(recorder, clip_capture)
+    release_camera_lease()
+
+def release_camera_lease():
+    """Give up camera ownership in the shared store and publish the new status (blocking)"""
+    try:
+        state.shared.delete(CAMERA_OWNER_KEY, WORKER_ID)
+    except OSError as e:
+        broker_failed("release camera lease", e)
+    publish_camera_status()
+
+@app.get("/camera/status")
+async def get_camera_status():
+    """Camera lifecycle state: stopped, starting, running or stopping"""
+    return camera_status()
+
+def reset_local_state():
+    state.exercise_suite.reset()
     state.audio_manager.reset()  # Reset audio state
     state.stats = {
         "total_reps": 0,
@@ -104,39 +531,322 @@ async def reset_stats():
         "stage": "Up"
     }
     state.last_form = "Neutral"
-    return {"status": "reset", "message": "Stats reset successfully", "stats": state.stats}
+    state.landmark_predictor.reset()
+    state.tracker.reset()
+    state.last_results = None
+    publish_stats()
+
+@app.post("/reset")
+async def reset_stats():
+    """Reset rep counter and stats (on every API worker)"""
+    try:
+        await asyncio.to_thread(state.shared.publish, "control", {"op": "reset"})
+    except OSError as e:
+        # No broker to relay the reset (not even back to this worker): reset locally
+        broker_failed("publish reset", e)
+        await asyncio.to_thread(reset_local_state)
+    stats = {
+        "total_reps": 0,
+        "form_state": "Neutral",
+        "stage": "Up"
+    }
+    return {"status": "reset", "message": "Stats reset successfully", "stats": stats}
 
 @app.get("/stats")
 async def get_stats():
     """Get current statistics"""
-    return state.stats
+    return state.shared_stats
+
+@app.get("/sessions")
+async def get_sessions():
+    """Connected viewers across all API workers, and the worker owning the camera"""
+    try:
+        keys = await asyncio.to_thread(state.shared.keys, SESSION_PREFIX)
+        infos = await asyncio.to_thread(state.shared.mget, keys)
+        owner = await asyncio.to_thread(state.shared.get, CAMERA_OWNER_KEY)
+    except OSError as e:
+        raise HTTPException(status_code=503, detail=f"State broker unavailable: {e}")
+    sessions = [dict(info, session_id=key[len(SESSION_PREFIX):])
+                for key, info in zip(keys, infos) if info is not None]
+    return {"worker": WORKER_ID, "camera_owner": owner, "sessions": sessions}
+
+def recording_path(recording_id):
+    path = os.path.join(RECORDINGS_DIR, os.path.basename(recording_id) + ".bin")
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail=f"Recording {recording_id} not found")
+    return path
+
+@app.get("/recordings")
+async def list_recordings():
+    """Recorded sessions of per-frame analysis, newest first"""
+    if not os.path.isdir(RECORDINGS_DIR):
+        return []
+    recordings = []
+    for name in sorted(os.listdir(RECORDINGS_DIR), reverse=True):
+        if name.endswith(".bin"):
+            path = os.path.join(RECORDINGS_DIR, name)
+            recordings.append({"id": name[:-4], "frames": len(open_recording(path)), "bytes": os.path.getsize(path)})
+    return recordings
+
+@app.get("/recordings/{recording_id}/export")
+async def export_recording_endpoint(recording_id: str, format: str = "parquet",
+                                    chunk_rows: int = Query(65536, ge=1)):
+    """Export a recording as parquet, arrow (IPC file) or csv
+
+    CSV is streamed chunk by chunk; Parquet/Arrow are written to a temporary file
+    one row group per chunk, so memory stays bounded for any session length.
+    """
+    path = recording_path(recording_id)
+    if format == "csv":
+        return StreamingResponse(iter_csv(path, chunk_rows), media_type="text/csv",
+                                 headers={"Content-Disposition": f'attachment; filename="{recording_id}.csv"'})
+    if format not in ("parquet", "arrow"):
+        raise HTTPException(status_code=400, detail="format must be parquet, arrow or csv")
+    fd, out_path = tempfile.mkstemp(suffix="." + format)
+    os.close(fd)
+    try:
+        await asyncio.to_thread(export_recording, path, out_path, format, chunk_rows)
+    except RuntimeError as e:  # pyarrow missing
+        os.remove(out_path)
+        raise HTTPException(status_code=501, detail=str(e))
+    except BaseException:  # failed or cancelled export: don't leave the temp file behind
+        os.remove(out_path)
+        raise
+    return FileResponse(out_path, filename=f"{recording_id}.{format}", media_type="application/octet-stream",
+                        background=BackgroundTask(os.remove, out_path))
+
+@app.get("/athletes")
+async def get_athletes():
+    """Get per-athlete statistics (multi-person mode, NUM_POSES > 1)"""
+    return state.tracker.stats()
+
+def clip_path(clip_id):
+    meta_path = os.path.join(CLIPS_DIR, os.path.basename(clip_id) + ".json")
+    if not os.path.isfile(meta_path):
+        raise HTTPException(status_code=404, detail=f"Clip {clip_id} not found")
+    with open(meta_path) as f:
+        return os.path.join(CLIPS_DIR, json.load(f)["file"])
+
+@app.get("/clips")
+async def list_clips():
+    """Saved bad-form clips, newest first"""
+    if not os.path.isdir(CLIPS_DIR):
+        return []
+    clips = []
+    for name in sorted(os.listdir(CLIPS_DIR), reverse=True):
+        if name.endswith(".json"):
+            with open(os.path.join(CLIPS_DIR, name)) as f:
+                clips.append(json.load(f))
+    return clips
+
+@app.get("/clips/{clip_id}")
+async def get_clip(clip_id: str):
+    """Download a clip (Matroska/MJPEG with PyAV, AVI/MJPG otherwise)"""
+    path = clip_path(clip_id)
+    media_type = "video/x-matroska" if path.endswith(".mkv") else "video/x-msvideo"
+    return FileResponse(path, media_type=media_type, filename=os.path.basename(path))
+
+@app.get("/qos")
+async def get_qos():
+    """QoS level, active knobs, measured frame latency / CPU and recent level changes"""
+    return {"enabled": QOS_ENABLED, **state.qos.status()}
+
+@app.post("/qos")
+async def set_qos(level: Optional[int] = None):
+    """Pin a QoS level (0 = full quality); without `level`, return to automatic control"""
+    state.qos.pin(level)
+    return {"enabled": QOS_ENABLED, **state.qos.status()}
+
+@app.get("/latency")
+async def get_latency():
+    """Pipeline stage latencies and per-client capture-to-display latency (ms)"""
+    return state.latency.summary()
+
+@app.post("/latency/reset")
+async def reset_latency():
+    state.latency.reset()
+    return {"status": "reset"}
+
+# ----------------------- MEMORY (ADMIN) -----------------------
+# Per process: with several API workers each answers for its own heap (see "worker").
+
+@app.get("/admin/memory")
+async def admin_memory():
+    """RSS, traced Python heap, GC counters and stored tracemalloc snapshots"""
+    return {"worker": WORKER_ID, **state.allocations.stats()}
+
+@app.post("/admin/tracemalloc/start")
+async def admin_tracemalloc_start(frames: int = 25):
+    return {"worker": WORKER_ID, **state.allocations.start(frames)}
+
+@app.post("/admin/tracemalloc/stop")
+async def admin_tracemalloc_stop():
+    state.allocations.stop()
+    return {"worker": WORKER_ID, "status": "stopped"}
+
+@app.post("/admin/tracemalloc/snapshot")
+async def admin_tracemalloc_snapshot(label: Optional[str] = None):
+    """Take a tracemalloc snapshot (tracing must be running)"""
+    try:
+        info = await asyncio.to_thread(state.allocations.snapshot, label)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"worker": WORKER_ID, **info}
+
+@app.get("/admin/tracemalloc/diff")
+async def admin_tracemalloc_diff(base: Optional[int] = None, current: Optional[int] = None,
+                                 limit: int = 20, group_by: str = "lineno"):
+    """Allocation sites that grew most between two snapshots (default: oldest and newest)"""
+    if group_by not in ("lineno", "filename", "traceback"):
+        raise HTTPException(status_code=400, detail="group_by must be lineno, filename or traceback")
+    try:
+        diff = await asyncio.to_thread(state.allocations.diff, base, current, limit, group_by)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"worker": WORKER_ID, **diff}
+
+@app.get("/admin/resources")
+async def admin_resources():
+    """CPU budget, this process's slot and the threads/affinity actually in effect"""
+    affinity = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else None
+    return {"worker": WORKER_ID, **state.governor.status(), "session": state.resources.as_dict(), "affinity": affinity}
 
 # ----------------------- VIDEO STREAMING -----------------------
 
-def generate_frames():
-    """Generate video frames with pose detection"""
-    while state.running:
-        if state.camera is None or not state.camera.isOpened():
-            break
-            
-        ret, frame = state.camera.read()
-        if not ret:
-            continue
+def qos_settings():
+    """Current QoS knobs (full quality when QoS is off)"""
+    return state.qos.settings if QOS_ENABLED else state.qos.levels[0]
+
+def inference_input(frame, settings):
+    """Frame handed to the pose detector, downscaled at high QoS levels (landmarks are normalized)"""
+    scale = settings["inference_scale"]
+    if scale >= 1.0:
+        return frame
+    return cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+def encode_jpeg(frame):
+    """JPEG-encode a frame for viewers at the current QoS quality and scale"""
+    settings = qos_settings()
+    scale = settings["jpeg_scale"]
+    if scale < 1.0:
+        frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    quality = min(JPEG_QUALITY, settings["jpeg_quality"])
+    return cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])[1].tobytes()
+
+def finish_frame_trace(trace):
+    """Record a fully encoded frame for GET /latency and the QoS controller"""
+    state.latency.record_pipeline(trace)
+    if QOS_ENABLED:
+        state.qos.observe(trace)
+
+def inference_due(settings):
+    """Whether the next frame gets pose inference (INFERENCE_EVERY_N_FRAMES / QoS skipping)"""
+    due = state.frame_index % max(1, INFERENCE_EVERY_N_FRAMES, settings["inference_every"]) == 0
+    state.frame_index += 1
+    return due
+
+def process_frame_multi(frame, timestamp=None, trace=None, results=None):
+    """Multi-athlete variant of process_frame: one analyzer and overlay per tracked person
+
+    /stats carries the total reps of all athletes and the form and stage of the
+    longest-tracked one, which also drives audio, recording and clip capture.
+    """
+    analysis_ts = time.monotonic() if timestamp is None else timestamp
+    settings = qos_settings()
+    if results is None:
+        results = state.pose_detector.detect_landmarks(inference_input(frame, settings))
+    if trace is not None:
+        trace.mark("detect")
+    h, w = frame.shape[:2]
+    tracks = state.tracker.update(state.pose_detector, results, w, h, analysis_ts)
+    if trace is not None:
+        trace.mark("analyze")
+
+    # Aggregate stats: reps of every tracked athlete; form and stage of the longest-tracked one
+    primary = min(tracks, key=lambda track: track.track_id) if tracks else None
+    analysis = primary.analysis if primary is not None else None
+    state.stats.update({
+        'total_reps': sum(track.analyzer.total_reps for track in state.tracker.tracks.values()),
+        'form_state': analysis.get("form_state", "Neutral") if analysis else "Neutral",
+        'stage': analysis.get("stage", "Up") if analysis else state.stats.get("stage", "Up"),
+        'rep_metrics': analysis.get("rep_metrics") if analysis else state.stats.get("rep_metrics"),
+        'athletes': len(tracks),
+    })
+    if trace is not None:
+        state.stats.update({'frame_id': trace.frame_id, 'capture_time': trace.capture_time})
+    publish_stats()
+
+    form = state.stats['form_state']
+    if analysis and form != state.last_form:
+        if form == "Wrong":
+            state.audio_manager.play_beep("Wrong")
+        elif form == "Correct":
+            state.audio_manager.play_chime("Correct")
+        state.last_form = form
+
+    recorder = state.recorder
+    if recorder is not None:
+        recorder.record(analysis_ts, analysis)  # the primary athlete's analysis
+
+    for track in tracks:
+        if settings["overlay"]:
+            form = track.analysis.get("form_state", "Neutral")
+            color = (0, 255, 0) if form == "Correct" else (255, 0, 0)
+            frame = state.pose_detector.draw_skeleton(frame, track, color=color)
+        x, y = int(track.bbox[0] * w), max(20, int(track.bbox[1] * h) - 10)
+        cv2.putText(frame, f"#{track.track_id} {track.analyzer.total_reps}", (x, y),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+    return frame
+
+def process_frame(frame, timestamp=None, trace=None, results=None, run_inference=None):
+    """Run pose detection and analysis on a captured frame and draw the overlay
+
+    timestamp: source frame time used for rep analysis (media time for file sources);
+    the overlay predictor always works in wall-clock time.
+    trace: FrameTrace of this frame; stamped after detection and analysis.
+    results, run_inference: detection already done for this frame and whether it was
+    due (see process_pipelined); by default decided and run here.
+    """
+    if NUM_POSES > 1:
+        return process_frame_multi(frame, timestamp, trace, results)
+
+    capture_ts = trace.capture_time if trace is not None else time.monotonic()
+    analysis_ts = capture_ts if timestamp is None else timestamp
+    settings = qos_settings()
+    if run_inference is None:
+        run_inference = inference_due(settings)
+
+    # Pose detection (skipped frames reuse the predictor below)
+    if run_inference:
+        if results is None:
+            results = state.pose_detector.detect_landmarks(inference_input(frame, settings))
+        if trace is not None:
+            trace.mark("detect")
+        state.last_results = results
+        state.landmark_predictor.update_result(results, capture_ts)
+        analysis = None
 
-        # Pose detection
-        results = state.pose_detector.detect_landmarks(frame)
-        
         if results.pose_landmarks:
             h, w = frame.shape[:2]
-            keypoints = state.pose_detector.get_keypoints(results, w, h)
-            analysis = state.analyzer.analyze_pose(keypoints)
-            
-            # Update stats
+            if EXTRA_EXERCISES:
+                exercise_results = state.exercise_suite.analyze(results.pose_landmarks, w, h, analysis_ts)
+                analysis = exercise_results.pop(PushUpExercise.name)
+                state.stats['exercises'] = exercise_results
+            else:
+                keypoints = state.pose_detector.get_keypoints(results, w, h)
+                analysis = state.analyzer.analyze_pose(keypoints, analysis_ts)
+
+            # Update stats; frame_id / capture_time identify the frame behind these numbers
             state.stats.update({
                 'total_reps': analysis.get("total_reps", 0),
                 'form_state': analysis.get("form_state", "Neutral"),
-                'stage': analysis.get("stage", "Up")
+                'stage': analysis.get("stage", "Up"),
+                'rep_metrics': analysis.get("rep_metrics"),
             })
+            if trace is not None:
+                trace.mark("analyze")
+                state.stats.update({'frame_id': trace.frame_id, 'capture_time': trace.capture_time})
+            publish_stats()
 
             # Audio feedback
             form = analysis.get("form_state", "Neutral")
@@ -147,16 +857,170 @@ def generate_frames():
                     state.audio_manager.play_chime("Correct")
                 state.last_form = form
 
-            # Draw skeleton with form-based color
-            color = (0, 255, 0) if form == "Correct" else (255, 0, 0)
-            frame = state.pose_detector.draw_skeleton(frame, results, color=color)
+        recorder = state.recorder
+        if recorder is not None:
+            recorder.record(analysis_ts, analysis)
+
+    # Landmarks to draw: extrapolated to now (hides inference latency), or the last detection
+    if PREDICT_LANDMARKS:
+        draw_results = state.landmark_predictor.predict_result(time.monotonic())
+    else:
+        draw_results = state.last_results
+
+    # Draw skeleton with form-based color
+    if settings["overlay"] and draw_results is not None and draw_results.pose_landmarks:
+        color = (0, 255, 0) if state.last_form == "Correct" else (255, 0, 0)
+        frame = state.pose_detector.draw_skeleton(frame, draw_results, color=color)
+    return frame
+
+def camera_is_open():
+    camera = state.camera
+    return camera is not None and camera.isOpened()
+
+def read_camera():
+    """Read a frame from the configured frame source
 
-        # Encode frame
-        _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-        frame_bytes = buffer.tobytes()
-        
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+    Returns (ret, frame, source timestamp, FrameTrace); the trace carries the frame ID
+    and the time the frame left the source.
+    """
+    with state.read_lock:
+        camera = state.camera
+        if camera is None:
+            return False, None, None, None
+        ret, frame = camera.read()
+        return ret, frame, camera.last_timestamp, state.latency.new_trace() if ret else None
+
+def read_processed_frame():
+    """Read one camera frame and annotate it; returns (frame, trace) or None if no frame was available"""
+    if not camera_is_open():
+        return None
+    ret, frame, timestamp, trace = read_camera()
+    if not ret:
+        return None
+    return process_frame(frame, timestamp, trace), trace
+
+def process_pipelined(pending, frame=None, timestamp=None, trace=None):
+    """Remote inference: keep up to max_in_flight frames at the workers, finish them in capture order
+
+    Submits `frame` (None = no new frame) and appends it to `pending`, a deque owned by
+    the caller. Returns (annotated frame, trace) for the oldest frame once its result is
+    in, or once the pipeline is full or the source has nothing new; otherwise None.
+    """
+    detector = state.pose_detector
+    if frame is not None:
+        settings = qos_settings()
+        due = NUM_POSES > 1 or inference_due(settings)
+        future = detector.submit(inference_input(frame, settings)) if due else None
+        # Sources may reuse their frame buffer while this frame waits for its result
+        pending.append((frame.copy(), timestamp, trace, due, future))
+    if not pending:
+        return None
+    future = pending[0][4]
+    if frame is not None and len(pending) < detector.max_in_flight and future is not None and not future.done():
+        return None
+    frame, timestamp, trace, due, future = pending.popleft()
+    results = detector.result(future) if future is not None else None
+    return process_frame(frame, timestamp, trace, results=results, run_inference=due), trace
+
+def read_pipelined_frame(pending):
+    """read_processed_frame for remote inference (see process_pipelined)"""
+    ret, frame, timestamp, trace = read_camera() if camera_is_open() else (False, None, None, None)
+    if not ret:
+        frame = None
+    return process_pipelined(pending, frame, timestamp, trace)
+
+def mjpeg_part(frame_bytes, frame_id=None, capture_time=None):
+    """One multipart/x-mixed-replace part; X-Frame-Id / X-Capture-Time allow latency tracing"""
+    headers = b'Content-Type: image/jpeg\r\nContent-Length: %d\r\n' % len(frame_bytes)
+    if frame_id is not None:
+        headers += b'X-Frame-Id: %d\r\nX-Capture-Time: %.6f\r\n' % (frame_id, capture_time)
+    return b'--frame\r\n' + headers + b'\r\n' + frame_bytes + b'\r\n'
+
+def capture_clip_frame(trace, frame_bytes):
+    """Hand an encoded frame to the bad-form clip buffer (no-op when clip capture is off)"""
+    clip_capture = state.clip_capture
+    if clip_capture is not None:
+        clip_capture.add_frame(trace.capture_time, frame_bytes, state.stats.get("form_state"),
+                               {"total_reps": state.stats.get("total_reps", 0)})
+
+def camera_owner_loop(generation):
+    """Capture, analyze and encode every frame once, then fan it out to all viewers
+
+    Runs on the worker that owns the camera while it is running. Viewers never read the
+    camera themselves, so they all see every frame and the analyzers see each frame once.
+    With a state broker the JPEGs are published to every API worker; otherwise they go
+    straight to this process's viewers.
+    """
+    last_renewal = 0.0
+    # Remote workers get several frames at once so one camera's fps scales with them
+    pending = deque() if isinstance(state.pose_detector, RemotePoseDetector) else None
+    try:
+        while state.running and state.camera_generation == generation:
+            now = time.monotonic()
+            if STATE_BROKER and now - last_renewal >= 1.0:
+                try:
+                    state.shared.expire(CAMERA_OWNER_KEY, CAMERA_LEASE_SECONDS, WORKER_ID)
+                except OSError as e:
+                    broker_failed("renew camera lease", e)
+                publish_camera_status()
+                last_renewal = now
+            item = read_processed_frame() if pending is None else read_pipelined_frame(pending)
+            if item is None:
+                if not camera_is_open():
+                    break
+                if not pending:
+                    time.sleep(0.005)
+                continue
+            frame, trace = item
+            frame_bytes = encode_jpeg(frame)
+            trace.mark("encode")
+            finish_frame_trace(trace)
+            capture_clip_frame(trace, frame_bytes)
+            info = {"frame_id": trace.frame_id, "capture_time": trace.capture_time}
+            if not STATE_BROKER:
+                # Sources may reuse their frame buffer, so H.264 viewers get a copy
+                set_latest_frame(frame_bytes, info, frame.copy() if state.h264_viewers else None)
+                continue
+            try:
+                state.shared.publish("frames", info, frame_bytes)
+            except OSError as e:
+                broker_failed("publish frame", e)
+    finally:
+        for *_, future in pending or ():
+            if future is not None:
+                future.cancel()
+        with state.frame_cond:
+            state.frame_cond.notify_all()  # let viewers notice the camera stopped
+
+def relay_frames():
+    """Stream the JPEGs published by camera_owner_loop (on this or, via the broker, another worker)"""
+    with state.frame_cond:
+        if STATE_BROKER and not state.frames_subscribed:
+            state.shared.subscribe("frames", on_frame_message)
+            state.frames_subscribed = True
+        seq = state.frame_seq
+    while True:
+        with state.frame_cond:
+            state.frame_cond.wait_for(lambda: state.frame_seq != seq, timeout=1.0)
+            if state.frame_seq == seq:
+                if camera_status()["state"] in (CAMERA_STARTING, CAMERA_RUNNING):
+                    continue
+                break
+            seq, frame_bytes, info = state.frame_seq, state.latest_jpeg, state.latest_frame_info
+        yield mjpeg_part(frame_bytes, info.get("frame_id"), info.get("capture_time"))
+
+def generate_frames():
+    """Generate video frames with pose detection (the shared JPEGs from camera_owner_loop)"""
+    session_id = register_session("video")
+    last_refresh = time.monotonic()
+    try:
+        for part in relay_frames():
+            if time.monotonic() - last_refresh > SESSION_TTL / 2:
+                refresh_session(session_id)
+                last_refresh = time.monotonic()
+            yield part
+    finally:
+        unregister_session(session_id)
 
 @app.get("/video_feed")
 async def video_feed():
@@ -166,19 +1030,133 @@ async def video_feed():
         media_type="multipart/x-mixed-replace; boundary=frame"
     )
 
+def encode_next_h264(encoder_holder):
+    """Wait for the next annotated frame and H.264-encode it for one viewer (runs in a worker thread)
+
+    Returns (frame info, packets); packets is empty when no new frame arrived within a second.
+    Call `close_h264(encoder_holder)` when the viewer leaves.
+    """
+    with state.frame_cond:
+        if "seq" not in encoder_holder:
+            state.h264_viewers += 1  # camera_owner_loop starts keeping annotated frames
+            encoder_holder["seq"] = state.frame_seq
+        seq = encoder_holder["seq"]
+        state.frame_cond.wait_for(lambda: state.frame_seq != seq, timeout=1.0)
+        seq, frame, info = state.frame_seq, state.latest_frame, state.latest_frame_info
+    encoder_holder["seq"] = seq
+    if frame is None:
+        return info, []
+    if encoder_holder.get("encoder") is None:
+        h, w = frame.shape[:2]
+        encoder_holder["encoder"] = H264StreamEncoder(w, h, fps=30, bitrate=H264_BITRATE, gop=H264_GOP)
+    return info, encoder_holder["encoder"].encode(frame)
+
+def close_h264(encoder_holder):
+    """Unregister an H.264 viewer and close its encoder"""
+    with state.frame_cond:
+        if encoder_holder.pop("seq", None) is not None:
+            state.h264_viewers -= 1
+    encoder = encoder_holder.pop("encoder", None)
+    if encoder is not None:
+        encoder.close()
+
+@app.websocket("/ws/video")
+async def websocket_video(websocket: WebSocket):
+    """Stream annotated frames as H.264 NAL units (one binary message per access unit).
+
+    Each message is a 1-byte flag (0x01 keyframe, 0x00 delta), the frame ID (u32) and
+    capture time (float64), then Annex-B data.
+    """
+    await websocket.accept()
+    if not H264_AVAILABLE:
+        await websocket.close(code=1011, reason="H.264 streaming requires PyAV (pip install av)")
+        return
+    if STATE_BROKER:
+        # Frames are captured by the camera-owning worker and relayed as JPEG
+        await websocket.close(code=1011, reason="H.264 streaming is not available with PUSHUP_STATE_BROKER; use /video_feed")
+        return
+    encoder_holder = {}
+    try:
+        while state.running:
+            info, packets = await asyncio.to_thread(encode_next_h264, encoder_holder)
+            if not packets:
+                continue
+            frame_info = FRAME_INFO.pack(info["frame_id"] & 0xFFFFFFFF, info["capture_time"])
+            for is_keyframe, data in packets:
+                await websocket.send_bytes((KEYFRAME_FLAG if is_keyframe else DELTA_FLAG) + frame_info + data)
+        await websocket.close()
+    except WebSocketDisconnect:
+        print("Video WebSocket disconnected")
+    finally:
+        await asyncio.to_thread(close_h264, encoder_holder)
+
 # ----------------------- WEBSOCKET FOR REAL-TIME STATS -----------------------
 
 @app.websocket("/ws/stats")
 async def websocket_stats(websocket: WebSocket):
-    """WebSocket endpoint for real-time statistics updates"""
+    """WebSocket endpoint for real-time statistics updates
+
+    Each message carries `server_time` (server monotonic seconds) so clients can map
+    their clock onto the server's. Clients may send display reports back:
+    {"type": "display", "client_id": ..., "frames": [[frame_id, capture_time, display_time], ...]}
+    with display_time on the server clock; these feed GET /latency.
+    """
     await websocket.accept()
+    session_id = await asyncio.to_thread(register_session, "stats")
+    receiver = asyncio.create_task(receive_display_reports(websocket, session_id))
     try:
-        while True:
+        tick = 0
+        while not receiver.done():
             # Send current stats every 100ms
-            await websocket.send_json(state.stats)
+            await websocket.send_json({**state.shared_stats, "camera": camera_status()["state"],
+                                       "server_time": time.monotonic()})
             await asyncio.sleep(0.1)
+            tick += 1
+            if tick % int(SESSION_TTL * 5) == 0:
+                await asyncio.to_thread(refresh_session, session_id)
     except WebSocketDisconnect:
         print("WebSocket disconnected")
+    finally:
+        receiver.cancel()
+        await asyncio.to_thread(unregister_session, session_id)
+
+async def receive_display_reports(websocket, session_id):
+    """Forward client display reports to every worker's latency tracker
+
+    A malformed report is skipped; only a disconnect ends the receiver (and the stats stream).
+    """
+    while True:
+        try:
+            message = await websocket.receive_json()
+        except WebSocketDisconnect:
+            return
+        except (ValueError, KeyError, TypeError):  # not JSON, or a binary frame
+            continue
+        try:
+            if message.get("type") != "display" or not message.get("frames"):
+                continue
+            report = {
+                "client_id": str(message.get("client_id") or session_id),
+                "frames": list(message["frames"][:MAX_DISPLAY_REPORT]),
+            }
+        except (KeyError, TypeError, AttributeError):
+            continue
+        try:
+            await asyncio.to_thread(state.shared.publish, "latency", report)
+        except OSError as e:
+            broker_failed("publish latency report", e)
+
+@app.websocket("/ws/athletes/{track_id}")
+async def websocket_athlete(websocket: WebSocket, track_id: int):
+    """Per-athlete statistics stream (multi-person mode)"""
+    await websocket.accept()
+    try:
+        while True:
+            track = state.tracker.tracks.get(track_id)
+            await websocket.send_json(track.stats() if track else {"track_id": track_id, "status": "lost"})
+            await asyncio.sleep(0.1)
+    except WebSocketDisconnect:
+        print(f"Athlete {track_id} WebSocket disconnected")
 
 # ----------------------- RUN SERVER -----------------------
 if __name__ == "__main__":
@@ -186,4 +1164,12 @@ if __name__ == "__main__":
     print("🚀 Starting AI Push-Up Tracker Backend...")
     print("📹 API: http://localhost:8000")
     print("📊 Docs: http://localhost:8000/docs")
-    uvicorn.run(app, host="0.0.0.0", port=8000, log_level="info")
+    if API_WORKERS > 1:
+        # Workers are separate processes; give them a broker to share stats, sessions and the camera
+        if not STATE_BROKER:
+            broker = start_broker()
+            os.environ["PUSHUP_STATE_BROKER"] = broker.address
+            print(f"🔗 State broker: {broker.address}")
+        uvicorn.run("backend:app", host="0.0.0.0", port=8000, log_level="info", workers=API_WORKERS)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000, log_level="info")
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Remote inference scaling benchmark.
+Starts N InferenceWorkerServers on localhost (one process each) and drives one
+camera's frames through the backend's remote inference for a fixed time,
+reporting the camera fps for N = each of --workers. "blocking" waits for each
+frame's result before reading the next (one request in flight); "pipelined"
+is what the camera loop does: up to --max-in-flight frames at the workers,
+results applied in capture order (backend.process_pipelined).
+
+Each worker runs MediaPipe and needs cores of its own, so on a small host use
+--simulate-ms: workers then answer after a fixed delay per frame instead of
+running the model, like workers on other hosts or GPUs would.
+
+Usage:
+    python bench_inference_workers.py --workers 1,2,4 --seconds 10
+    python bench_inference_workers.py --workers 1,2,4,8 --simulate-ms 40 --max-in-flight 8 --csv workers.csv
+"""
+import argparse
+import csv
+import multiprocessing
+import os
+import queue
+import sys
+import time
+from collections import deque
+from types import SimpleNamespace
+
+from utils.frame_source import create_frame_source
+from utils.remote_inference import InferencePool, InferenceWorkerServer, RemotePoseDetector
+
+
+MODES = ("blocking", "pipelined")
+
+
+# ============================================================
+# Workers (one process each)
+# ============================================================
+
+class SimulatedDetector:
+    """Stand-in for PoseDetector that takes a fixed time per frame and finds nobody."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def detect_landmarks(self, frame):
+        time.sleep(self.seconds)
+        return SimpleNamespace(pose_landmarks=None, all_pose_landmarks=[])
+
+
+def run_worker(args, ports):
+    try:
+        if args.simulate_ms:
+            detector = SimulatedDetector(args.simulate_ms / 1000.0)
+        else:
+            from utils.pose_utils import PoseDetector
+            detector = PoseDetector(0, 0.5, 0.5)
+        server = InferenceWorkerServer(detector, "127.0.0.1", 0)
+    except Exception as e:
+        ports.put((None, f"{type(e).__name__}: {e}"))
+        return
+    ports.put((server.server_address[1], None))
+    server.serve_forever()
+
+
+def start_workers(count, args):
+    """Start `count` workers; returns (processes, addresses)."""
+    ctx = multiprocessing.get_context("spawn")
+    ports = ctx.Queue()
+    procs = [ctx.Process(target=run_worker, args=(args, ports), daemon=True) for _ in range(count)]
+    for proc in procs:
+        proc.start()
+    addresses = []
+    errors = []
+    try:
+        for _ in procs:
+            port, error = ports.get(timeout=120)
+            if error is not None:
+                errors.append(error)
+            else:
+                addresses.append(("127.0.0.1", port))
+    except queue.Empty:
+        errors.append("worker did not start in time")
+    if errors:
+        stop_workers(procs)
+        raise RuntimeError("; ".join(errors))
+    return procs, addresses
+
+
+def stop_workers(procs):
+    for proc in procs:
+        proc.terminate()
+    for proc in procs:
+        proc.join(timeout=10)
+
+
+# ============================================================
+# Camera side
+# ============================================================
+
+def run_level(backend, workers, mode, args):
+    """Camera fps with `workers` inference workers."""
+    procs, addresses = start_workers(workers, args)
+    pool = InferencePool(addresses, max_in_flight=args.max_in_flight, timeout=args.timeout)
+    backend.state.pose_detector = detector = RemotePoseDetector(pool)
+    source = create_frame_source(args.source)
+    pending = deque()
+    frames = 0
+    try:
+        for _ in range(3):  # open the connections before the clock starts
+            ok, frame = source.read()
+            if ok:
+                detector.detect_landmarks(frame)
+        start = time.perf_counter()
+        deadline = start + args.seconds
+        while time.perf_counter() < deadline:
+            ok, frame = source.read()
+            if not ok:
+                break
+            trace = backend.state.latency.new_trace()
+            if mode == "pipelined":
+                item = backend.process_pipelined(pending, frame, source.last_timestamp, trace)
+            else:
+                item = backend.process_frame(frame, source.last_timestamp, trace), trace
+            if item is not None:
+                backend.encode_jpeg(item[0])
+                frames += 1
+        elapsed = time.perf_counter() - start
+    finally:
+        for *_, future in pending:
+            if future is not None:
+                future.cancel()
+        source.release()
+        pool.close()
+        stop_workers(procs)
+    return {"workers": workers, "mode": mode, "fps": frames / elapsed if elapsed > 0 else 0.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Camera fps vs remote inference worker count")
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker counts")
+    parser.add_argument("--seconds", type=float, default=10.0, help="measured time per level")
+    parser.add_argument("--source", default="synthetic?realtime=0",
+                        help="frame source spec (see utils/frame_source.py)")
+    parser.add_argument("--simulate-ms", type=float, default=0.0,
+                        help="workers answer after this delay instead of running the model (0 = MediaPipe)")
+    parser.add_argument("--max-in-flight", type=int, default=4, help="frames at the workers at once (pipelined)")
+    parser.add_argument("--timeout", type=float, default=2.0, help="seconds to wait for one frame's result")
+    parser.add_argument("--mode", choices=MODES + ("both",), default="both")
+    parser.add_argument("--csv", default=None, help="write results to this file")
+    args = parser.parse_args()
+
+    try:
+        levels = [int(n) for n in args.workers.split(",") if n.strip()]
+    except ValueError:
+        print(f"--workers must be comma-separated integers, got {args.workers!r}")
+        return 2
+    modes = MODES if args.mode == "both" else (args.mode,)
+    if not args.simulate_ms:
+        from utils.pose_utils import download_pose_model
+        download_pose_model()  # once, before workers race to fetch it
+
+    # The backend then builds a remote detector instead of loading the model; each level replaces it
+    os.environ["PUSHUP_INFERENCE_WORKERS"] = "127.0.0.1:0"
+    os.environ.setdefault("PUSHUP_CAMERA_SOURCE", args.source)
+    import backend
+
+    model = f"simulated {args.simulate_ms:g} ms/frame" if args.simulate_ms else "MediaPipe"
+    print(f"{model} workers, {os.cpu_count()} CPUs, max {args.max_in_flight} frames in flight")
+    print(f"{'workers':>7}  {'mode':<9} {'fps':>8} {'speedup':>8}")
+    rows = []
+    base = {}
+    for workers in levels:
+        for mode in modes:
+            try:
+                row = run_level(backend, workers, mode, args)
+            except RuntimeError as e:
+                print(f"{workers} workers ({mode}) failed: {e}")
+                return 1
+            base.setdefault(mode, row["fps"])
+            row["speedup"] = row["fps"] / base[mode] if base[mode] else 0.0
+            rows.append(row)
+            print(f"{workers:>7}  {mode:<9} {row['fps']:>8.1f} {row['speedup']:>7.2f}x")
+
+    if args.csv and rows:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"Results written to {args.csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
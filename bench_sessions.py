@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Multi-session throughput benchmark for the CPU resource governor.
+Runs N independent pose pipelines (one process each, as N backends or
+inference workers on one host would) for a fixed time and reports aggregate
+and per-session fps for N = each of --sessions, with the thread pools left at
+their defaults and with a ResourceGovernor splitting --cores between them.
+Governed sessions are pinned to their own CPUs: MediaPipe's inference threads
+can only be confined by affinity, so without pinning (--no-pin, or no
+sched_setaffinity) the governed runs only cap OpenCV's threads.
+
+Usage:
+    python bench_sessions.py --sessions 1,2,4,8 --seconds 20
+    python bench_sessions.py --sessions 2,4,8 --cores 8 --source file:clip.mp4?realtime=0 --csv sessions.csv
+"""
+import argparse
+import csv
+import multiprocessing
+import queue
+import sys
+import time
+
+import cv2
+
+from utils.frame_source import create_frame_source
+from utils.pose_utils import PoseDetector, PushUpAnalyzer, download_pose_model
+from utils.resource_governor import AFFINITY_SUPPORTED, ResourceGovernor, available_cpus
+
+
+MODES = ("default", "governed")
+
+
+# ============================================================
+# One session (runs in its own process)
+# ============================================================
+
+def run_session(slot, sessions, mode, args, barrier, results):
+    try:
+        resources = None
+        if mode == "governed":
+            resources = ResourceGovernor(args.cores or None, sessions, pin=args.pin).allocation(slot)
+            resources.apply_process()
+        detector = PoseDetector(0, 0.5, 0.5, resources=resources)
+        analyzer = PushUpAnalyzer()
+        source = create_frame_source(args.source)
+        barrier.wait()  # every session loaded before the clock starts
+    except Exception as e:
+        barrier.abort()  # release the sessions already waiting
+        results.put((slot, 0, 0.0, f"{type(e).__name__}: {e}"))
+        return
+    frames = 0
+    try:
+        start = time.perf_counter()
+        deadline = start + args.seconds
+        while time.perf_counter() < deadline:
+            ok, frame = source.read()
+            if not ok:
+                break
+            pose = detector.detect_landmarks(frame)
+            if pose.pose_landmarks:
+                h, w = frame.shape[:2]
+                analyzer.analyze_pose(detector.get_keypoints(pose, w, h), source.last_timestamp)
+                frame = detector.draw_skeleton(frame, pose)
+            cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
+            frames += 1
+        elapsed = time.perf_counter() - start
+    finally:
+        source.release()
+    results.put((slot, frames, elapsed, None))
+
+
+def run_level(sessions, mode, args):
+    """Aggregate and per-session fps for `sessions` pipelines running at once."""
+    ctx = multiprocessing.get_context("spawn")  # fresh thread pools in every session
+    barrier = ctx.Barrier(sessions)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=run_session, args=(slot, sessions, mode, args, barrier, results))
+             for slot in range(sessions)]
+    for proc in procs:
+        proc.start()
+    per_session = []
+    errors = []
+    try:
+        for _ in procs:
+            slot, frames, elapsed, error = results.get(timeout=args.seconds + 120)
+            if error is not None:
+                errors.append(f"session {slot}: {error}")
+            else:
+                per_session.append(frames / elapsed if elapsed > 0 else 0.0)
+    finally:
+        for proc in procs:
+            proc.join(timeout=10)
+            if proc.is_alive():
+                proc.terminate()
+    if errors:
+        raise RuntimeError("; ".join(errors))
+    return {
+        "sessions": sessions,
+        "mode": mode,
+        "aggregate_fps": sum(per_session),
+        "min_session_fps": min(per_session),
+        "mean_session_fps": sum(per_session) / len(per_session),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate fps vs concurrent pipeline count")
+    parser.add_argument("--sessions", default="1,2,4,8", help="comma-separated session counts")
+    parser.add_argument("--seconds", type=float, default=20.0, help="measured time per level")
+    parser.add_argument("--source", default="synthetic?realtime=0",
+                        help="frame source spec (see utils/frame_source.py)")
+    parser.add_argument("--cores", type=int, default=0, help="CPU budget for the governed runs (0 = all)")
+    parser.add_argument("--no-pin", dest="pin", action="store_false",
+                        help="do not pin governed sessions to their own CPUs (caps OpenCV threads only)")
+    parser.add_argument("--mode", choices=MODES + ("both",), default="both")
+    parser.add_argument("--csv", default=None, help="write results to this file")
+    args = parser.parse_args()
+
+    try:
+        levels = [int(n) for n in args.sessions.split(",") if n.strip()]
+    except ValueError:
+        print(f"--sessions must be comma-separated integers, got {args.sessions!r}")
+        return 2
+    modes = MODES if args.mode == "both" else (args.mode,)
+    download_pose_model()  # once, before sessions race to fetch it
+
+    cores = args.cores or len(available_cpus())
+    pinned = args.pin and AFFINITY_SUPPORTED
+    print(f"{len(available_cpus())} CPUs available, governed budget {cores} cores{' (pinned)' if pinned else ''}")
+    if "governed" in modes and not pinned:
+        reason = "--no-pin" if not args.pin else "CPU affinity is not supported on this platform"
+        print(f"Warning: {reason}; governed runs only cap OpenCV threads, MediaPipe still uses every core")
+    print(f"{'sessions':>8}  {'mode':<9} {'aggregate fps':>13} {'min/session':>11} {'mean/session':>12} {'fps/core':>8}")
+    rows = []
+    for sessions in levels:
+        for mode in modes:
+            try:
+                row = run_level(sessions, mode, args)
+            except (RuntimeError, queue.Empty) as e:
+                print(f"{sessions} sessions ({mode}) failed: {e or 'timed out'}")
+                return 1
+            row["fps_per_core"] = row["aggregate_fps"] / cores
+            rows.append(row)
+            print(f"{sessions:>8}  {mode:<9} {row['aggregate_fps']:>13.1f} {row['min_session_fps']:>11.1f} "
+                  f"{row['mean_session_fps']:>12.1f} {row['fps_per_core']:>8.2f}")
+
+    if args.csv and rows:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"Results written to {args.csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
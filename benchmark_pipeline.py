@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+End-to-end pipeline benchmark with a regression gate.
+Runs recorded push-up videos through backend.process_frame() and
+backend.encode_jpeg(), the same calls the backend's camera loop makes, as fast
+as possible, then reports sustained fps, per-stage latency percentiles (from
+the frame's FrameTrace), peak RSS and rep-count accuracy against labeled
+ground truth.
+
+Manifest (JSON):
+    {"videos": [{"path": "clips/set1.mp4", "reps": 12}, ...]}
+
+Usage:
+    python benchmark_pipeline.py clips/manifest.json --baseline bench_baseline.json
+    python benchmark_pipeline.py clips/manifest.json --baseline bench_baseline.json --update-baseline
+Exit code 1 means throughput or accuracy regressed past the allowed tolerance.
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+
+import numpy as np
+
+import backend
+from utils.frame_source import VideoFileSource
+from utils.remote_inference import RemotePoseDetector
+
+
+# "analyze" is absent on frames without a person; "draw" covers the overlay after analysis
+STAGES = ("read", "detect", "analyze", "draw", "encode")
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (2**20 if sys.platform == "darwin" else 2**10)
+
+
+def run_video(path, timings):
+    """Run one clip through backend.process_frame + encode_jpeg; returns (frames, total_reps)."""
+    source = VideoFileSource(path, realtime=False, loop=False)
+    if not source.isOpened():
+        raise FileNotFoundError(f"could not open {path}")
+    backend.reset_local_state()
+    backend.state.frame_index = 0
+    frames = 0
+    try:
+        while True:
+            start = time.monotonic()
+            ok, frame, timestamp = source.read_timestamped()
+            if not ok:
+                break
+            trace = backend.state.latency.new_trace()  # capture_time = frame left the source
+            frame = backend.process_frame(frame, timestamp, trace)
+            trace.mark("draw")
+            backend.encode_jpeg(frame)
+            trace.mark("encode")
+
+            timings["read"].append((trace.capture_time - start) * 1000.0)
+            previous = trace.capture_time
+            for stage in STAGES[1:]:
+                done = trace.stages.get(stage)
+                if done is not None:
+                    timings[stage].append((done - previous) * 1000.0)
+                    previous = done
+            frames += 1
+    finally:
+        source.release()
+    return frames, backend.state.stats.get("total_reps", 0)
+
+
+def check_regression(result, baseline, max_fps_drop, max_error_increase):
+    failures = []
+    if baseline.get("fps"):
+        floor = baseline["fps"] * (1.0 - max_fps_drop)
+        if result["fps"] < floor:
+            failures.append(f"fps {result['fps']:.1f} < {floor:.1f} (baseline {baseline['fps']:.1f})")
+    if baseline.get("rep_mae") is not None:
+        ceiling = baseline["rep_mae"] + max_error_increase
+        if result["rep_mae"] > ceiling:
+            failures.append(f"rep MAE {result['rep_mae']:.2f} > {ceiling:.2f} (baseline {baseline['rep_mae']:.2f})")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmark")
+    parser.add_argument("manifest", help="JSON manifest of videos and ground-truth rep counts")
+    parser.add_argument("--baseline", default="bench_baseline.json")
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--max-fps-drop", type=float, default=0.10, help="allowed fractional fps drop")
+    parser.add_argument("--max-error-increase", type=float, default=0.5, help="allowed rep MAE increase")
+    parser.add_argument("--json", default=None, help="write the full result to this file")
+    args = parser.parse_args()
+
+    with open(args.manifest) as f:
+        manifest = json.load(f)
+    base_dir = os.path.dirname(os.path.abspath(args.manifest))
+
+    if isinstance(backend.state.pose_detector, RemotePoseDetector):
+        print("Benchmark measures the in-process pipeline; unset PUSHUP_INFERENCE_WORKERS")
+        return 2
+
+    timings = {stage: [] for stage in STAGES}
+    per_video = []
+    total_frames = 0
+    start = time.perf_counter()
+    for video in manifest["videos"]:
+        path = os.path.join(base_dir, video["path"])
+        frames, reps = run_video(path, timings)
+        total_frames += frames
+        per_video.append({"path": video["path"], "frames": frames, "expected": video["reps"], "counted": reps})
+        print(f"  {video['path']}: {frames} frames, reps {reps}/{video['reps']}")
+    elapsed = time.perf_counter() - start
+
+    errors = [abs(v["counted"] - v["expected"]) for v in per_video]
+    result = {
+        "fps": total_frames / elapsed if elapsed > 0 else 0.0,
+        "frames": total_frames,
+        "peak_rss_mb": peak_rss_mb(),
+        "rep_mae": float(np.mean(errors)) if errors else 0.0,
+        "rep_exact": sum(e == 0 for e in errors),
+        "stages": {
+            stage: {p: float(np.percentile(values, int(p[1:]))) for p in ("p50", "p95", "p99")}
+            for stage, values in timings.items() if values
+        },
+        "videos": per_video,
+    }
+
+    print(f"\nSustained fps: {result['fps']:.1f} over {total_frames} frames")
+    print(f"Peak RSS:      {result['peak_rss_mb']:.0f} MB")
+    print(f"Rep accuracy:  {result['rep_exact']}/{len(per_video)} exact, MAE {result['rep_mae']:.2f}")
+    print(f"\n{'stage':<10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for stage, pct in result["stages"].items():
+        print(f"{stage:<10} {pct['p50']:>8.2f} {pct['p95']:>8.2f} {pct['p99']:>8.2f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"fps": result["fps"], "rep_mae": result["rep_mae"]}, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --update-baseline to create one")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    failures = check_regression(result, baseline, args.max_fps_drop, args.max_error_increase)
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    if not failures:
+        print("\nNo regression against baseline")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Export recorded per-frame analysis (recordings/*.bin, written by backend.py) to
+Parquet, Arrow IPC or CSV for analysis in pandas / polars / DuckDB.
+Exports stream in fixed-size chunks, so memory use does not grow with session length.
+
+Usage:
+    python export_session.py recordings/20250101-120000.bin session.parquet
+    python export_session.py recordings/20250101-120000.bin session.csv --chunk-rows 100000
+    python export_session.py --list
+"""
+import argparse
+import os
+import sys
+import time
+
+from utils.session_recorder import ARROW_AVAILABLE, DEFAULT_CHUNK_ROWS, export_recording, open_recording
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a recorded session")
+    parser.add_argument("recording", nargs="?", help="recording file (.bin)")
+    parser.add_argument("output", nargs="?", help="output file (.parquet, .arrow/.feather or .csv)")
+    parser.add_argument("--format", choices=("parquet", "arrow", "csv"), default=None,
+                        help="output format (default: from the output extension)")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="rows per row group / CSV chunk")
+    parser.add_argument("--list", action="store_true", help="list recordings in --dir")
+    parser.add_argument("--dir", default="recordings")
+    args = parser.parse_args()
+
+    if args.list:
+        for name in sorted(os.listdir(args.dir)) if os.path.isdir(args.dir) else []:
+            if name.endswith(".bin"):
+                path = os.path.join(args.dir, name)
+                print(f"{name[:-4]:<20} {len(open_recording(path)):>10} frames {os.path.getsize(path) / 2**20:>8.1f} MB")
+        return 0
+    if not args.recording or not args.output:
+        parser.error("recording and output are required")
+
+    if args.format in ("parquet", "arrow") or args.output.endswith((".parquet", ".arrow", ".feather")):
+        if not ARROW_AVAILABLE:
+            print("pyarrow is not installed; run `pip install pyarrow` or export to .csv")
+            return 1
+
+    start = time.perf_counter()
+    rows = export_recording(args.recording, args.output, args.format, args.chunk_rows)
+    print(f"Exported {rows} frames to {args.output} in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,8 +5,13 @@ import StatCard from './components/StatCard'
 import CameraFeed from './components/CameraFeed'
 import Controls from './components/Controls'
 import StartupPage from './components/StartupPage'
+import { LatencyReporter, FLUSH_INTERVAL_MS } from './latency'
 
 const API_URL = 'http://localhost:8000'
+// 'mjpeg' (default) or 'h264' (WebSocket + WebCodecs, much lower bandwidth)
+const STREAM_MODE = import.meta.env.VITE_STREAM_MODE || 'mjpeg'
+// '1' draws MJPEG through a canvas so displayed frames can be reported for latency tracing
+const LATENCY_TRACE = import.meta.env.VITE_LATENCY_TRACE === '1'
 
 function App() {
   const [showStartup, setShowStartup] = useState(true)
@@ -17,6 +22,8 @@ function App() {
     stage: 'Up'
   })
   const wsRef = useRef(null)
+  const latencyRef = useRef(null)
+  if (latencyRef.current === null) latencyRef.current = new LatencyReporter()
 
   const handleStartApp = () => {
     setShowStartup(false)
@@ -40,14 +47,17 @@ function App() {
       
       wsRef.current.onmessage = (event) => {
         const data = JSON.parse(event.data)
+        latencyRef.current.observeServerTime(data.server_time)
         setStats(data)
       }
+      const flushTimer = setInterval(() => latencyRef.current.flush(wsRef.current), FLUSH_INTERVAL_MS)
 
       wsRef.current.onerror = (error) => {
         console.error('WebSocket error:', error)
       }
 
       return () => {
+        clearInterval(flushTimer)
         if (wsRef.current) {
           wsRef.current.close()
         }
@@ -57,7 +67,16 @@ function App() {
 
   const handleStart = async () => {
     try {
+      // The backend opens the camera in the background; wait until capture is live
       await axios.post(`${API_URL}/camera/start`)
+      let camera = (await axios.get(`${API_URL}/camera/status`)).data
+      while (camera.state === 'starting') {
+        await new Promise((resolve) => setTimeout(resolve, 100))
+        camera = (await axios.get(`${API_URL}/camera/status`)).data
+      }
+      if (!camera.running) {
+        throw new Error(camera.error || 'Camera did not start')
+      }
       setIsRunning(true)
     } catch (error) {
       console.error('Failed to start camera:', error)
@@ -105,7 +124,13 @@ function App() {
           <div className="camera-title">
             <h2>📹 LIVE FEED</h2>
           </div>
-          <CameraFeed isRunning={isRunning} apiUrl={API_URL} />
+          <CameraFeed
+            isRunning={isRunning}
+            apiUrl={API_URL}
+            streamMode={STREAM_MODE}
+            latency={latencyRef.current}
+            latencyTrace={LATENCY_TRACE}
+          />
         </div>
 
         {/* RIGHT COLUMN - Stats, Status & Controls */}
@@ -1,4 +1,149 @@
-function CameraFeed({ isRunning, apiUrl }) {
+import { useEffect, useRef } from 'react'
+
+// H.264 Constrained Baseline, level 3.0 (matches the backend's x264 settings)
+const H264_CODEC = 'avc1.42C01E'
+// /ws/video message prefix: flag byte, frame ID (u32) and capture time (float64), big-endian
+const H264_PREFIX_BYTES = 13
+
+function H264Canvas({ wsUrl, latency }) {
+  const canvasRef = useRef(null)
+
+  useEffect(() => {
+    const canvas = canvasRef.current
+    const ctx = canvas.getContext('2d')
+    let waitingForKeyframe = true
+    const captureTimes = new Map() // chunk timestamp -> [frame ID, capture time]
+
+    const decoder = new VideoDecoder({
+      output: (frame) => {
+        if (canvas.width !== frame.displayWidth || canvas.height !== frame.displayHeight) {
+          canvas.width = frame.displayWidth
+          canvas.height = frame.displayHeight
+        }
+        ctx.drawImage(frame, 0, 0)
+        const info = captureTimes.get(frame.timestamp)
+        captureTimes.delete(frame.timestamp)
+        if (info && latency) latency.frameDisplayed(info[0], info[1])
+        frame.close()
+      },
+      error: (error) => console.error('Video decoder error:', error)
+    })
+    // No description: the decoder expects Annex-B NAL units with in-band SPS/PPS
+    decoder.configure({ codec: H264_CODEC, optimizeForLatency: true })
+
+    const ws = new WebSocket(wsUrl)
+    ws.binaryType = 'arraybuffer'
+    ws.onmessage = (event) => {
+      const bytes = new Uint8Array(event.data)
+      const view = new DataView(event.data)
+      const isKey = bytes[0] === 1
+      if (waitingForKeyframe && !isKey) return
+      waitingForKeyframe = false
+      const frameId = view.getUint32(1)
+      const timestamp = frameId * 33333
+      captureTimes.set(timestamp, [frameId, view.getFloat64(5)])
+      if (captureTimes.size > 64) captureTimes.delete(captureTimes.keys().next().value)
+      decoder.decode(new EncodedVideoChunk({
+        type: isKey ? 'key' : 'delta',
+        timestamp: timestamp,
+        data: bytes.subarray(H264_PREFIX_BYTES)
+      }))
+    }
+    ws.onerror = (error) => console.error('Video WebSocket error:', error)
+
+    return () => {
+      ws.close()
+      if (decoder.state !== 'closed') decoder.close()
+    }
+  }, [wsUrl, latency])
+
+  return <canvas ref={canvasRef} className="camera-feed" />
+}
+
+function indexOfHeaderEnd(buffer, length) {
+  for (let i = 0; i + 3 < length; i++) {
+    if (buffer[i] === 13 && buffer[i + 1] === 10 && buffer[i + 2] === 13 && buffer[i + 3] === 10) return i
+  }
+  return -1
+}
+
+// Reads /video_feed with fetch and draws each JPEG on a canvas, so the time a frame
+// is actually shown (and its X-Frame-Id / X-Capture-Time headers) are known
+function MjpegCanvas({ url, latency }) {
+  const canvasRef = useRef(null)
+
+  useEffect(() => {
+    const canvas = canvasRef.current
+    const ctx = canvas.getContext('2d')
+    const controller = new AbortController()
+    let buffer = new Uint8Array(1 << 20)
+    let length = 0
+
+    const append = (chunk) => {
+      if (length + chunk.length > buffer.length) {
+        const grown = new Uint8Array(Math.max(buffer.length * 2, length + chunk.length))
+        grown.set(buffer.subarray(0, length))
+        buffer = grown
+      }
+      buffer.set(chunk, length)
+      length += chunk.length
+    }
+
+    const nextPart = () => {
+      const headerEnd = indexOfHeaderEnd(buffer, length)
+      if (headerEnd < 0) return null
+      const headers = {}
+      for (const line of new TextDecoder().decode(buffer.subarray(0, headerEnd)).split('\r\n')) {
+        const colon = line.indexOf(':')
+        if (colon > 0) headers[line.slice(0, colon).trim().toLowerCase()] = line.slice(colon + 1).trim()
+      }
+      const size = parseInt(headers['content-length'], 10)
+      const start = headerEnd + 4
+      if (Number.isNaN(size) || length < start + size) return null
+      const jpeg = buffer.slice(start, start + size)
+      buffer.copyWithin(0, start + size, length)
+      length -= start + size
+      return { jpeg, headers }
+    }
+
+    const run = async () => {
+      const response = await fetch(url, { signal: controller.signal })
+      const reader = response.body.getReader()
+      for (;;) {
+        const { value, done } = await reader.read()
+        if (done) break
+        append(value)
+        let part
+        while ((part = nextPart()) !== null) {
+          const bitmap = await createImageBitmap(new Blob([part.jpeg], { type: 'image/jpeg' }))
+          if (canvas.width !== bitmap.width || canvas.height !== bitmap.height) {
+            canvas.width = bitmap.width
+            canvas.height = bitmap.height
+          }
+          ctx.drawImage(bitmap, 0, 0)
+          bitmap.close()
+          if (latency && part.headers['x-frame-id']) {
+            latency.frameDisplayed(parseInt(part.headers['x-frame-id'], 10),
+                                   parseFloat(part.headers['x-capture-time']))
+          }
+        }
+      }
+    }
+    run().catch((error) => {
+      if (error.name !== 'AbortError') console.error('MJPEG stream error:', error)
+    })
+
+    return () => controller.abort()
+  }, [url, latency])
+
+  return <canvas ref={canvasRef} className="camera-feed" />
+}
+
+function CameraFeed({ isRunning, apiUrl, streamMode = 'mjpeg', latency = null, latencyTrace = false }) {
+  // Fall back to MJPEG on browsers without WebCodecs
+  const useH264 = streamMode === 'h264' && typeof window.VideoDecoder !== 'undefined'
+  const wsUrl = `${apiUrl.replace(/^http/, 'ws')}/ws/video`
+
   return (
     <div className="camera-container">
       <div className="camera-header">
@@ -7,11 +152,17 @@ function CameraFeed({ isRunning, apiUrl }) {
       </div>
       
       {isRunning ? (
-        <img
-          src={`${apiUrl}/video_feed`}
-          alt="Camera Feed"
-          className="camera-feed"
-        />
+        useH264 ? (
+          <H264Canvas wsUrl={wsUrl} latency={latency} />
+        ) : latencyTrace ? (
+          <MjpegCanvas url={`${apiUrl}/video_feed`} latency={latency} />
+        ) : (
+          <img
+            src={`${apiUrl}/video_feed`}
+            alt="Camera Feed"
+            className="camera-feed"
+          />
+        )
       ) : (
         <div className="camera-placeholder">
           📷 PRESS START TO BEGIN
@@ -0,0 +1,36 @@
+// Glass-to-glass latency reporting: records when frames are actually drawn and
+// sends the display times back to the backend over /ws/stats (see GET /latency).
+
+const FLUSH_INTERVAL_MS = 500
+const MAX_PENDING = 256
+
+export class LatencyReporter {
+  constructor() {
+    this.clientId = Math.random().toString(36).slice(2, 10)
+    // server monotonic ms minus performance.now(); the largest sample has the
+    // least network delay in it, so it is the best estimate of the clock offset
+    this.offsetMs = null
+    this.pending = []
+  }
+
+  observeServerTime(serverTime) {
+    if (typeof serverTime !== 'number') return
+    const offset = serverTime * 1000 - performance.now()
+    if (this.offsetMs === null || offset > this.offsetMs) this.offsetMs = offset
+  }
+
+  frameDisplayed(frameId, captureTime) {
+    if (this.offsetMs === null || frameId == null || captureTime == null) return
+    if (this.pending.length >= MAX_PENDING) this.pending.shift()
+    const displayTime = (performance.now() + this.offsetMs) / 1000
+    this.pending.push([frameId, captureTime, displayTime])
+  }
+
+  flush(ws) {
+    if (!this.pending.length || !ws || ws.readyState !== WebSocket.OPEN) return
+    ws.send(JSON.stringify({ type: 'display', client_id: this.clientId, frames: this.pending }))
+    this.pending = []
+  }
+}
+
+export { FLUSH_INTERVAL_MS }
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Standalone pose inference worker.
+Serves PoseDetector over TCP for backends configured with PUSHUP_INFERENCE_WORKERS.
+
+Usage:
+    python inference_worker.py --port 9000
+    PUSHUP_INFERENCE_WORKERS=host1:9000,host2:9000 python backend.py
+
+Several workers on one host should split its cores instead of each sizing
+thread pools from all of them:
+    python inference_worker.py --port 9000 --cores 8 --sessions 2 --slot 0 --pin
+    python inference_worker.py --port 9001 --cores 8 --sessions 2 --slot 1 --pin
+"""
+import argparse
+
+from utils.pose_utils import PoseDetector
+from utils.remote_inference import InferenceWorkerServer
+from utils.resource_governor import ResourceGovernor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI Push-Up Tracker inference worker")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--detection-conf", type=float, default=0.5)
+    parser.add_argument("--tracking-conf", type=float, default=0.5)
+    parser.add_argument("--num-poses", type=int, default=1)
+    parser.add_argument("--cores", type=int, default=0, help="CPU budget shared by the workers on this host (0 = all)")
+    parser.add_argument("--sessions", type=int, default=1, help="workers sharing --cores")
+    parser.add_argument("--slot", type=int, default=0, help="this worker's index among --sessions")
+    parser.add_argument("--pin", action="store_true", help="pin this worker to its slot's CPUs")
+    args = parser.parse_args()
+
+    resources = ResourceGovernor(args.cores or None, args.sessions, pin=args.pin).allocation(args.slot)
+    resources.apply_process()
+    detector = PoseDetector(0, args.detection_conf, args.tracking_conf, num_poses=args.num_poses, resources=resources)
+    server = InferenceWorkerServer(detector, args.host, args.port)
+    print(f"🧠 Inference worker listening on {args.host}:{args.port} ({resources.threads} threads, cpus {resources.cpus or 'all'})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Load-testing harness for the FastAPI backend.
+Opens N concurrent /video_feed (MJPEG) readers and /ws/stats sockets, ramps N
+up step by step and reports delivered fps, frame inter-arrival percentiles and
+server CPU / memory, plus the level where throughput breaks down.
+
+Usage:
+    python loadtest.py --spawn-backend --levels 1,2,4,8,16 --duration 10
+    python loadtest.py --url http://localhost:8000 --server-pid 12345
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from urllib.parse import urlparse
+
+import numpy as np
+
+try:
+    import psutil
+except ImportError:  # optional; /proc is used instead
+    psutil = None
+
+
+BOUNDARY = b"--frame\r\n"
+
+
+# ============================================================
+# Backend process
+# ============================================================
+
+def spawn_backend(url, source):
+    env = dict(os.environ, PUSHUP_CAMERA_SOURCE=source, PYTHONUNBUFFERED="1")
+    proc = subprocess.Popen([sys.executable, "backend.py"], env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("backend exited during startup")
+        try:
+            urllib.request.urlopen(url + "/", timeout=1)
+            return proc
+        except OSError:
+            time.sleep(0.5)
+    proc.terminate()
+    raise RuntimeError("backend did not become ready within 60s")
+
+
+# ============================================================
+# Server resource sampling
+# ============================================================
+
+class ProcessSampler:
+    """Samples CPU% and RSS of the server process."""
+
+    def __init__(self, pid):
+        self.pid = pid
+        self._proc = psutil.Process(pid) if psutil and pid else None
+        self._last = None
+        self.cpu = []
+        self.rss = []
+
+    def _cpu_seconds(self):
+        if self._proc:
+            t = self._proc.cpu_times()
+            return t.user + t.system
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+    def _rss_bytes(self):
+        if self._proc:
+            return self._proc.memory_info().rss
+        with open(f"/proc/{self.pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+    def sample(self):
+        if not self.pid:
+            return
+        now, cpu = time.monotonic(), self._cpu_seconds()
+        if self._last is not None:
+            self.cpu.append(100.0 * (cpu - self._last[1]) / max(1e-6, now - self._last[0]))
+        self._last = (now, cpu)
+        self.rss.append(self._rss_bytes())
+
+    def reset(self):
+        self._last = None
+        self.cpu, self.rss = [], []
+
+
+# ============================================================
+# Clients
+# ============================================================
+
+async def mjpeg_client(host, port, stop_at, arrivals):
+    """Read /video_feed and record the arrival time of every multipart boundary."""
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET /video_feed HTTP/1.1\r\nHost: {host}:{port}\r\nConnection: close\r\n\r\n".encode())
+    await writer.drain()
+    tail = b""
+    try:
+        while time.monotonic() < stop_at:
+            try:
+                chunk = await asyncio.wait_for(reader.read(65536), timeout=max(0.1, stop_at - time.monotonic()))
+            except asyncio.TimeoutError:
+                break
+            if not chunk:
+                break
+            data = tail + chunk
+            count = data.count(BOUNDARY)
+            if count:
+                now = time.monotonic()
+                arrivals.extend([now] * count)
+            tail = data[-(len(BOUNDARY) - 1):]
+    finally:
+        writer.close()
+
+
+async def stats_client(ws_url, stop_at, arrivals):
+    import websockets
+    async with websockets.connect(ws_url) as ws:
+        while time.monotonic() < stop_at:
+            try:
+                message = await asyncio.wait_for(ws.recv(), timeout=max(0.1, stop_at - time.monotonic()))
+            except asyncio.TimeoutError:
+                break
+            json.loads(message)
+            arrivals.append(time.monotonic())
+
+
+def summarize(arrivals, duration):
+    arr = np.asarray(arrivals, dtype=np.float64)
+    if arr.size < 2:
+        return {"fps": arr.size / duration, "p50_ms": None, "p99_ms": None}
+    gaps = np.diff(arr) * 1000.0
+    return {
+        "fps": arr.size / duration,
+        "p50_ms": float(np.percentile(gaps, 50)),
+        "p99_ms": float(np.percentile(gaps, 99)),
+    }
+
+
+async def run_level(url, n_video, n_stats, duration, sampler):
+    parsed = urlparse(url)
+    host, port = parsed.hostname, parsed.port or 80
+    ws_url = f"ws://{host}:{port}/ws/stats"
+    stop_at = time.monotonic() + duration
+    video_arrivals = [[] for _ in range(n_video)]
+    stats_arrivals = [[] for _ in range(n_stats)]
+    tasks = [mjpeg_client(host, port, stop_at, a) for a in video_arrivals]
+    tasks += [stats_client(ws_url, stop_at, a) for a in stats_arrivals]
+
+    async def sample_loop():
+        sampler.reset()
+        while time.monotonic() < stop_at:
+            sampler.sample()
+            await asyncio.sleep(0.5)
+
+    results = await asyncio.gather(*tasks, sample_loop(), return_exceptions=True)
+    errors = [r for r in results if isinstance(r, Exception)]
+    return {
+        "video": [summarize(a, duration) for a in video_arrivals],
+        "stats": [summarize(a, duration) for a in stats_arrivals],
+        "cpu_percent": float(np.mean(sampler.cpu)) if sampler.cpu else None,
+        "rss_mb": max(sampler.rss) / 2**20 if sampler.rss else None,
+        "errors": len(errors),
+    }
+
+
+# ============================================================
+# Main
+# ============================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test /video_feed and /ws/stats")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--levels", default="1,2,4,8,16", help="comma-separated concurrent viewer counts")
+    parser.add_argument("--stats-per-viewer", type=int, default=1, help="/ws/stats sockets per video viewer")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per level")
+    parser.add_argument("--breakdown", type=float, default=0.5,
+                        help="throughput is 'broken' when per-viewer fps falls below this fraction of level 1")
+    parser.add_argument("--server-pid", type=int, default=None)
+    parser.add_argument("--spawn-backend", action="store_true", help="start backend.py on a non-camera frame source")
+    parser.add_argument("--source", default="synthetic",
+                        help="PUSHUP_CAMERA_SOURCE for the spawned backend, e.g. synthetic or file:clip.mp4")
+    parser.add_argument("--json", default=None, help="write the full report to this file")
+    args = parser.parse_args()
+
+    backend = None
+    pid = args.server_pid
+    if args.spawn_backend:
+        backend = spawn_backend(args.url, args.source)
+        pid = backend.pid
+    sampler = ProcessSampler(pid)
+
+    report = []
+    try:
+        urllib.request.urlopen(urllib.request.Request(args.url + "/camera/start?wait=true", method="POST"), timeout=30)
+        baseline = None
+        print(f"{'viewers':>7} {'ws':>4} {'fps/viewer':>10} {'min fps':>8} {'p50 ms':>7} {'p99 ms':>7} "
+              f"{'ws msg/s':>8} {'cpu %':>6} {'rss MB':>7}")
+        for n in [int(v) for v in args.levels.split(",")]:
+            result = asyncio.run(run_level(args.url, n, n * args.stats_per_viewer, args.duration, sampler))
+            fps = [v["fps"] for v in result["video"]]
+            p50 = [v["p50_ms"] for v in result["video"] if v["p50_ms"] is not None]
+            p99 = [v["p99_ms"] for v in result["video"] if v["p99_ms"] is not None]
+            ws_rate = [v["fps"] for v in result["stats"]]
+            mean_fps = float(np.mean(fps)) if fps else 0.0
+            baseline = baseline or mean_fps
+            broken = baseline > 0 and mean_fps < args.breakdown * baseline
+            result.update(viewers=n, mean_fps=mean_fps, broken=broken)
+            report.append(result)
+            print(f"{n:>7} {len(ws_rate):>4} {mean_fps:>10.1f} {min(fps, default=0):>8.1f} "
+                  f"{(np.median(p50) if p50 else float('nan')):>7.1f} {(max(p99) if p99 else float('nan')):>7.1f} "
+                  f"{(np.mean(ws_rate) if ws_rate else 0):>8.1f} "
+                  f"{result['cpu_percent'] or float('nan'):>6.0f} {result['rss_mb'] or float('nan'):>7.0f}"
+                  f"{'  <-- breakdown' if broken else ''}")
+            if broken:
+                break
+    finally:
+        try:
+            urllib.request.urlopen(urllib.request.Request(args.url + "/camera/stop", method="POST"), timeout=10)
+        except OSError:
+            pass
+        if backend is not None:
+            backend.terminate()
+            backend.wait()
+
+    broken_at = next((r["viewers"] for r in report if r["broken"]), None)
+    print(f"\nThroughput breakdown: {f'{broken_at} viewers' if broken_at else 'not reached'}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Re-run push-up analysis on a recorded clip, reusing cached pose landmarks.
+The first run detects landmarks and stores them in the landmark cache; later
+runs (e.g. after changing analyzer thresholds) skip decoding and inference.
+
+Usage:
+    python reanalyze_video.py clip.mp4
+    python reanalyze_video.py clip.mp4 --down-threshold 95 --up-threshold 155
+    python reanalyze_video.py clip.mp4 --no-cache
+"""
+import argparse
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from utils.exercises import PushUpExercise, compute_features
+from utils.landmark_cache import LandmarkCache, detect_video, detector_signature
+from utils.pose_utils import PoseDetector, PushUpAnalyzer, download_pose_model
+from utils.rep_timing import alpha_to_tau, frames_to_seconds
+
+
+def video_geometry(path):
+    cap = cv2.VideoCapture(path)
+    try:
+        if not cap.isOpened():
+            raise FileNotFoundError(f"could not open {path}")
+        return (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                cap.get(cv2.CAP_PROP_FPS) or 30.0)
+    finally:
+        cap.release()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-analyze a video with cached landmarks")
+    parser.add_argument("video")
+    parser.add_argument("--cache-dir", default=".landmark_cache")
+    parser.add_argument("--cache-size-mb", type=float, default=2048)
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--detection-conf", type=float, default=0.5)
+    parser.add_argument("--tracking-conf", type=float, default=0.5)
+    parser.add_argument("--down-threshold", type=float, default=90)
+    parser.add_argument("--up-threshold", type=float, default=160)
+    parser.add_argument("--back-tolerance", type=float, default=25)
+    parser.add_argument("--smoothing-tau", type=float, default=0.1, help="elbow-angle EMA time constant (s)")
+    parser.add_argument("--cooldown-seconds", type=float, default=0.5)
+    parser.add_argument("--smoothing-alpha", type=float, default=None,
+                        help="per-frame EMA weight at 30 fps (overrides --smoothing-tau)")
+    parser.add_argument("--cooldown-frames", type=int, default=None,
+                        help="cooldown in frames at 30 fps (overrides --cooldown-seconds)")
+    args = parser.parse_args()
+
+    width, height, fps = video_geometry(args.video)
+    settings = {"detection_confidence": args.detection_conf, "tracking_confidence": args.tracking_conf,
+                "num_poses": 1}
+    cache = None if args.no_cache else LandmarkCache(args.cache_dir, max_bytes=args.cache_size_mb * 2**20)
+
+    start = time.perf_counter()
+    landmarks = detect_video(
+        args.video,
+        lambda: PoseDetector(0, args.detection_conf, args.tracking_conf, num_poses=1),
+        detector_signature(download_pose_model(), **settings),
+        cache=cache,
+    )
+    detect_seconds = time.perf_counter() - start
+
+    exercise = PushUpExercise(PushUpAnalyzer(
+        elbow_down_threshold=args.down_threshold,
+        elbow_up_threshold=args.up_threshold,
+        back_tolerance=args.back_tolerance,
+        smoothing_tau=args.smoothing_tau if args.smoothing_alpha is None else alpha_to_tau(args.smoothing_alpha),
+        cooldown_seconds=args.cooldown_seconds if args.cooldown_frames is None else frames_to_seconds(args.cooldown_frames),
+    ))
+    start = time.perf_counter()
+    # Pixel coordinates truncated like get_keypoints, so results match the live pipeline
+    points = np.trunc(np.asarray(landmarks[:, 0, :, :2], dtype=np.float64) * (width, height))
+    analyzed = 0
+    for index, frame_points in enumerate(points):
+        if np.isnan(frame_points[0, 0]):
+            continue  # nobody detected
+        exercise.analyze(compute_features(frame_points), index / fps)
+        analyzed += 1
+    analyze_seconds = time.perf_counter() - start
+
+    print(f"Frames:    {len(landmarks)} ({analyzed} with a person)")
+    print(f"Landmarks: {detect_seconds:.2f}s")
+    print(f"Analysis:  {analyze_seconds:.2f}s ({len(landmarks) / max(analyze_seconds, 1e-9):.0f} fps)")
+    print(f"Reps:      {exercise.analyzer.total_reps}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Long-session memory soak test.
+Drives the backend pipeline in-process (the camera loop's capture -> detect ->
+analyze -> draw -> encode, consumed the way /video_feed and /ws/video consume
+it) from a synthetic or file source for hours, sampling RSS, traced Python
+heap and live GC objects at a fixed interval. After a warm-up it takes a
+tracemalloc snapshot, and at the end reports the RSS / heap growth rate and the
+allocation sites that grew the most.
+
+Usage:
+    python soak_test.py --hours 8 --csv soak.csv
+    python soak_test.py --minutes 20 --source "file:clip.mp4?realtime=0" --stream h264
+    python soak_test.py --hours 24 --max-rss-growth 5 --max-heap-growth 1
+Exit code 1 means RSS or heap grew faster than the allowed MB/hour. Ctrl-C
+ends the run early and still prints the report.
+"""
+import argparse
+import asyncio
+import csv
+import gc
+import os
+import sys
+import time
+
+import numpy as np
+
+from utils.memory_tracker import AllocationTracker, rss_bytes
+
+
+def growth_per_hour(samples, column):
+    """Least-squares slope of `column` (MB) over elapsed time, in MB/hour."""
+    if len(samples) < 3:
+        return None
+    t = np.array([row["elapsed_s"] for row in samples]) / 3600.0
+    y = np.array([row[column] for row in samples])
+    if t[-1] - t[0] <= 0:
+        return None
+    return float(np.polyfit(t, y, 1)[0])
+
+
+def frame_driver(backend, stream):
+    """Generator that yields once per frame the camera loop delivers to a viewer."""
+    if stream == "mjpeg":
+        yield from backend.generate_frames()
+        return
+    encoder_holder = {}
+    try:
+        while backend.camera_is_open():
+            _, packets = backend.encode_next_h264(encoder_holder)
+            if packets:
+                yield packets
+    finally:
+        backend.close_h264(encoder_holder)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Long-session memory soak test")
+    duration = parser.add_mutually_exclusive_group()
+    duration.add_argument("--hours", type=float, default=None)
+    duration.add_argument("--minutes", type=float, default=None)
+    parser.add_argument("--source", default="synthetic?realtime=0",
+                        help="frame source spec (see utils/frame_source.py)")
+    parser.add_argument("--stream", choices=("mjpeg", "h264"), default="mjpeg", help="encoder path to exercise")
+    parser.add_argument("--interval", type=float, default=30.0, help="seconds between samples")
+    parser.add_argument("--warmup", type=float, default=60.0, help="seconds before the baseline snapshot")
+    parser.add_argument("--trace-frames", type=int, default=1,
+                        help="tracemalloc stack depth (0 disables heap tracing)")
+    parser.add_argument("--top", type=int, default=15, help="allocation sites to report")
+    parser.add_argument("--csv", default=None, help="write samples to this file")
+    parser.add_argument("--max-rss-growth", type=float, default=None, help="fail above this RSS growth (MB/hour)")
+    parser.add_argument("--max-heap-growth", type=float, default=None, help="fail above this heap growth (MB/hour)")
+    args = parser.parse_args()
+    seconds = 3600.0 * (args.hours if args.hours is not None else (args.minutes or 60.0) / 60.0)
+
+    # Start tracing before the backend loads, so the baseline includes everything it allocates
+    tracker = AllocationTracker()
+    if args.trace_frames:
+        tracker.start(args.trace_frames)
+    os.environ["PUSHUP_CAMERA_SOURCE"] = args.source
+    import backend
+
+    if args.stream == "h264" and not backend.H264_AVAILABLE:
+        print("H.264 needs PyAV; run `pip install av` or use --stream mjpeg")
+        return 2
+    asyncio.run(backend.start_camera(wait=True))
+    if not backend.camera_is_open():
+        print(f"Could not open source {args.source}: {backend.state.camera_error}")
+        return 2
+
+    out = None
+    writer = None
+    if args.csv:
+        out = open(args.csv, "w", newline="")
+        writer = csv.DictWriter(out, fieldnames=("elapsed_s", "frames", "fps", "rss_mb", "heap_mb", "gc_objects"))
+        writer.writeheader()
+
+    samples = []
+    baseline = None
+    frames = 0
+    start = last_sample = time.monotonic()
+    last_frames = 0
+    print(f"Soaking {args.source} ({args.stream}) for {seconds / 3600:.2f}h, sampling every {args.interval:.0f}s")
+    print(f"{'elapsed':>9} {'frames':>10} {'fps':>7} {'rss MB':>9} {'heap MB':>9} {'objects':>10}")
+    driver = frame_driver(backend, args.stream)
+    try:
+        for _ in driver:
+            frames += 1
+            now = time.monotonic()
+            if baseline is None and now - start >= args.warmup and args.trace_frames:
+                baseline = tracker.snapshot("warmup")
+            if now - last_sample >= args.interval:
+                row = {
+                    "elapsed_s": round(now - start, 1),
+                    "frames": frames,
+                    "fps": round((frames - last_frames) / (now - last_sample), 1),
+                    "rss_mb": round(rss_bytes() / 2**20, 2),
+                    "heap_mb": round(tracker.stats()["traced_mb"], 3),
+                    "gc_objects": len(gc.get_objects()),
+                }
+                samples.append(row)
+                last_sample, last_frames = now, frames
+                print(f"{row['elapsed_s']:>8.0f}s {frames:>10} {row['fps']:>7.1f} {row['rss_mb']:>9.1f} "
+                      f"{row['heap_mb']:>9.2f} {row['gc_objects']:>10}")
+                if writer:
+                    writer.writerow(row)
+                    out.flush()
+            if now - start >= seconds:
+                break
+    except KeyboardInterrupt:
+        print("\nInterrupted; reporting what was collected")
+    finally:
+        driver.close()
+        asyncio.run(backend.stop_camera())
+        if out:
+            out.close()
+
+    steady = [row for row in samples if row["elapsed_s"] >= args.warmup]
+    rss_growth = growth_per_hour(steady, "rss_mb")
+    heap_growth = growth_per_hour(steady, "heap_mb") if args.trace_frames else None
+    elapsed = time.monotonic() - start
+    print(f"\nFrames:       {frames} in {elapsed / 60:.1f} min ({frames / max(elapsed, 1e-9):.1f} fps)")
+    if rss_growth is not None:
+        print(f"RSS growth:   {rss_growth:+.2f} MB/hour (after warm-up)")
+    if heap_growth is not None:
+        print(f"Heap growth:  {heap_growth:+.2f} MB/hour (after warm-up)")
+
+    if baseline is not None:
+        tracker.snapshot("end")
+        diff = tracker.diff(limit=args.top)
+        print(f"\nTop allocation growth since warm-up ({diff['total_diff_kb']:+.1f} KB total):")
+        for site in diff["top"]:
+            print(f"  {site['size_diff_kb']:>+10.1f} KB {site['count_diff']:>+8} blocks  {site['site']}")
+
+    failures = []
+    if args.max_rss_growth is not None and rss_growth is not None and rss_growth > args.max_rss_growth:
+        failures.append(f"RSS grew {rss_growth:.2f} MB/hour > {args.max_rss_growth}")
+    if args.max_heap_growth is not None and heap_growth is not None and heap_growth > args.max_heap_growth:
+        failures.append(f"heap grew {heap_growth:.2f} MB/hour > {args.max_heap_growth}")
+    for failure in failures:
+        print(f"LEAK: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,11 +5,17 @@ Cross-platform startup script for macOS, Linux, and Windows.
 © 2025 Exowdious
 """
 
+import json
 import os
 import sys
 import subprocess
 import platform
 import shutil
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # ANSI color codes
@@ -66,146 +72,303 @@ def print_system_info():
     print(f"{Colors.YELLOW}Working Directory:{Colors.NC} {Colors.GREEN}{os.getcwd()}{Colors.NC}")
     print()
 
+
+# ============================================================
+# Cold-start timing
+# ============================================================
+
+class PhaseTimer:
+    """Wall-clock duration of each startup phase; phases may overlap."""
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.phases = {}
+        self._lock = threading.Lock()
+
+    def run(self, name, func, *args):
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self.phases[name] = (start - self.origin, time.perf_counter() - self.origin)
+
+    def print_breakdown(self):
+        print(f"{Colors.BOLD}{Colors.CYAN}Startup timing{Colors.NC}")
+        for name, (start, end) in sorted(self.phases.items(), key=lambda item: item[1][0]):
+            print(f"  {name:<18} {end - start:>6.2f}s  {Colors.CYAN}(+{start:.2f}s → +{end:.2f}s){Colors.NC}")
+        print(f"  {'total':<18} {time.perf_counter() - self.origin:>6.2f}s")
+        print()
+
+    def save(self, mode, path=Path('logs') / 'startup-times.jsonl'):
+        """Append this start's phase durations so startup time can be tracked over time."""
+        path.parent.mkdir(exist_ok=True)
+        record = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "mode": mode,
+            "total": round(time.perf_counter() - self.origin, 3),
+            "phases": {name: round(end - start, 3) for name, (start, end) in self.phases.items()},
+        }
+        with open(path, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+
+
+_print_lock = threading.Lock()
+
+def report(ok, message):
+    """Thread-safe ✓ / ✗ status line."""
+    mark = f"{Colors.GREEN}✓{Colors.NC}" if ok else f"{Colors.RED}✗{Colors.NC}"
+    with _print_lock:
+        print(f"{mark} {message}")
+
+
+# ============================================================
+# Checks (run concurrently)
+# ============================================================
+
+def _version(cmd):
+    try:
+        return subprocess.run([cmd, '--version'], capture_output=True, text=True, timeout=30).stdout.strip()
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+
 def check_node():
-    """Check if Node.js is installed."""
-    print(f"{Colors.BLUE}[1/2]{Colors.NC} {Colors.BOLD}Checking Node.js installation...{Colors.NC}")
-    
-    if shutil.which('node'):
-        result = subprocess.run(['node', '--version'], capture_output=True, text=True)
-        print(f"{Colors.GREEN}✓{Colors.NC} Node.js found: {Colors.GREEN}{result.stdout.strip()}{Colors.NC}")
-    else:
-        print(f"{Colors.RED}✗{Colors.NC} Node.js not found!")
-        print(f"{Colors.YELLOW}Please install Node.js 18+ from:{Colors.NC}")
-        print(f"  {Colors.CYAN}https://nodejs.org/{Colors.NC}")
+    """Check that Node.js and npm are installed."""
+    node = _version('node') if shutil.which('node') else None
+    if not node:
+        report(False, "Node.js not found! Install Node.js 18+ from https://nodejs.org/")
         return False
-    
-    if shutil.which('npm'):
-        result = subprocess.run(['npm', '--version'], capture_output=True, text=True)
-        print(f"{Colors.GREEN}✓{Colors.NC} npm found: {Colors.GREEN}{result.stdout.strip()}{Colors.NC}")
-    else:
-        print(f"{Colors.RED}✗{Colors.NC} npm not found!")
+    report(True, f"Node.js found: {Colors.GREEN}{node}{Colors.NC}")
+    npm = _version(shutil.which('npm')) if shutil.which('npm') else None
+    if not npm:
+        report(False, "npm not found!")
         return False
-    
-    print()
+    report(True, f"npm found: {Colors.GREEN}{npm}{Colors.NC}")
+    return True
+
+BACKEND_MODULES = ('fastapi', 'uvicorn', 'cv2', 'numpy', 'mediapipe')
+
+def check_python_deps(python_exe):
+    """Check that the backend's Python packages are importable by `python_exe` (without importing them)."""
+    result = subprocess.run(
+        [python_exe, '-c',
+         'import importlib.util, sys; '
+         'print(" ".join(m for m in sys.argv[1:] if importlib.util.find_spec(m) is None))',
+         *BACKEND_MODULES],
+        capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        report(False, f"Could not run {python_exe}: {result.stderr.strip().splitlines()[-1:] or 'unknown error'}")
+        return False
+    missing = result.stdout.split()
+    if missing:
+        report(False, f"Missing Python packages: {', '.join(missing)} (pip install -r backend_requirements.txt)")
+        return False
+    report(True, "Python dependencies found")
+    return True
+
+MODEL_PATH = Path('utils') / 'pose_landmarker_lite.task'
+
+def check_model(python_exe):
+    """Make sure the pose model is cached, downloading it in a subprocess if needed."""
+    if MODEL_PATH.exists():
+        report(True, "Pose model cached")
+        return True
+    result = subprocess.run(
+        [python_exe, '-c', 'from utils.pose_utils import download_pose_model; download_pose_model()'],
+        capture_output=True, text=True,
+    )
+    if result.returncode != 0 or not MODEL_PATH.exists():
+        report(False, f"Pose model download failed: {result.stderr.strip().splitlines()[-1:] or 'unknown error'}")
+        return False
+    report(True, "Pose model downloaded")
     return True
 
 def install_deps():
-    """Install Python and Node.js dependencies if needed."""
-    print(f"{Colors.BLUE}[2/2]{Colors.NC} {Colors.BOLD}Checking dependencies...{Colors.NC}")
-    
-    # Check if frontend node_modules exists
+    """Install frontend dependencies if needed (output goes to logs/npm-install.log)."""
     frontend_dir = Path('frontend')
-    if not (frontend_dir / 'node_modules').exists():
-        print(f"{Colors.YELLOW}Installing frontend dependencies...{Colors.NC}")
-        subprocess.run(['npm', 'install'], cwd=frontend_dir)
-    else:
-        print(f"{Colors.GREEN}✓{Colors.NC} Frontend dependencies already installed")
-    
-    print()
+    if (frontend_dir / 'node_modules').exists():
+        report(True, "Frontend dependencies already installed")
+        return True
+    npm = shutil.which('npm')
+    if not npm:
+        report(False, "Cannot install frontend dependencies without npm")
+        return False
+    Path('logs').mkdir(exist_ok=True)
+    with open(Path('logs') / 'npm-install.log', 'w') as log:
+        result = subprocess.run([npm, 'install'], cwd=frontend_dir, stdout=log, stderr=subprocess.STDOUT)
+    if result.returncode != 0:
+        report(False, "npm install failed! Check logs/npm-install.log")
+        return False
+    report(True, "Frontend dependencies installed")
     return True
 
-def show_menu():
-    """Show interactive menu."""
-    print(f"{Colors.BOLD}{Colors.CYAN}┌─────────────────────────────────────────────────────────┐{Colors.NC}")
-    print(f"{Colors.BOLD}{Colors.CYAN}│{Colors.NC}                   {Colors.BOLD}SELECT STARTUP MODE{Colors.NC}                 {Colors.BOLD}{Colors.CYAN}│{Colors.NC}")
-    print(f"{Colors.BOLD}{Colors.CYAN}└─────────────────────────────────────────────────────────┘{Colors.NC}")
-    print()
-    print(f"{Colors.BOLD}{Colors.GREEN}[1]{Colors.NC} {Colors.BOLD}Start Both (Recommended){Colors.NC} - Backend + Frontend")
-    print(f"{Colors.BOLD}{Colors.GREEN}[2]{Colors.NC} {Colors.BOLD}Start Backend Only{Colors.NC}       - Python FastAPI server")
-    print(f"{Colors.BOLD}{Colors.GREEN}[3]{Colors.NC} {Colors.BOLD}Start Frontend Only{Colors.NC}      - React Vite dev server")
-    print(f"{Colors.BOLD}{Colors.RED}[4]{Colors.NC} {Colors.BOLD}Exit{Colors.NC}")
+def run_checks(timer, backend=True, frontend=True):
+    """Run every check the selected mode needs in parallel; returns True if all passed."""
+    print(f"{Colors.BLUE}[1/2]{Colors.NC} {Colors.BOLD}Checking dependencies...{Colors.NC}")
+    python_exe = find_python()
+    tasks = []
+    if frontend:
+        tasks.append(('node check', check_node, ()))
+        tasks.append(('npm install', install_deps, ()))
+    if backend:
+        tasks.append(('python deps', check_python_deps, (python_exe,)))
+        tasks.append(('model cache', check_model, (python_exe,)))
+    with ThreadPoolExecutor(max_workers=len(tasks)) as pool:
+        futures = [pool.submit(timer.run, name, func, *args) for name, func, args in tasks]
+        ok = all(future.result() for future in futures)
     print()
+    return ok
 
-def start_backend():
-    """Start the backend server."""
-    print(f"{Colors.BOLD}{Colors.MAGENTA}┌─────────────────────────────────────────────────────────┐{Colors.NC}")
-    print(f"{Colors.BOLD}{Colors.MAGENTA}│{Colors.NC}              {Colors.BOLD}STARTING BACKEND SERVER{Colors.NC}                 {Colors.BOLD}{Colors.MAGENTA}│{Colors.NC}")
-    print(f"{Colors.BOLD}{Colors.MAGENTA}└─────────────────────────────────────────────────────────┘{Colors.NC}")
-    print(f"{Colors.GREEN}Backend:{Colors.NC}  {Colors.CYAN}http://localhost:8000{Colors.NC}")
-    print(f"{Colors.GREEN}API Docs:{Colors.NC} {Colors.CYAN}http://localhost:8000/docs{Colors.NC}")
-    print()
-    print(f"{Colors.YELLOW}Press Ctrl+C to stop{Colors.NC}")
-    print()
-    
-    subprocess.run([sys.executable, 'backend.py'])
 
-def start_frontend():
-    """Start the frontend dev server."""
-    print(f"{Colors.BOLD}{Colors.MAGENTA}┌─────────────────────────────────────────────────────────┐{Colors.NC}")
-    print(f"{Colors.BOLD}{Colors.MAGENTA}│{Colors.NC}             {Colors.BOLD}STARTING FRONTEND SERVER{Colors.NC}                {Colors.BOLD}{Colors.MAGENTA}│{Colors.NC}")
-    print(f"{Colors.BOLD}{Colors.MAGENTA}└─────────────────────────────────────────────────────────┘{Colors.NC}")
-    print(f"{Colors.GREEN}Frontend:{Colors.NC} {Colors.CYAN}http://localhost:5173{Colors.NC}")
-    print()
-    print(f"{Colors.YELLOW}Press Ctrl+C to stop{Colors.NC}")
-    print()
-    
-    subprocess.run(['npm', 'run', 'dev'], cwd='frontend')
+# ============================================================
+# Servers
+# ============================================================
 
-def start_both():
-    """Start both servers - backend in background, frontend in foreground."""
-    print(f"{Colors.BOLD}{Colors.MAGENTA}┌─────────────────────────────────────────────────────────┐{Colors.NC}")
-    print(f"{Colors.BOLD}{Colors.MAGENTA}│{Colors.NC}           {Colors.BOLD}STARTING BOTH SERVERS{Colors.NC}                    {Colors.BOLD}{Colors.MAGENTA}│{Colors.NC}")
-    print(f"{Colors.BOLD}{Colors.MAGENTA}└─────────────────────────────────────────────────────────┘{Colors.NC}")
-    print(f"{Colors.GREEN}Backend:{Colors.NC}  {Colors.CYAN}http://localhost:8000{Colors.NC}")
-    print(f"{Colors.GREEN}Frontend:{Colors.NC} {Colors.CYAN}http://localhost:5173{Colors.NC}")
-    print()
-    
+BACKEND_URL = 'http://localhost:8000'
+FRONTEND_URL = 'http://localhost:5173'
+
+def find_python():
+    """Python executable for the backend (the project venv if there is one)."""
     cwd = Path.cwd()
-    
-    # Determine the correct python executable (from venv if exists)
-    if (cwd / 'venv' / 'bin' / 'python3').exists():
-        python_exe = str(cwd / 'venv' / 'bin' / 'python3')
-    else:
-        python_exe = sys.executable
-        
-    # Check if port 8000 is occupied and kill process if needed
+    for candidate in (cwd / 'venv' / 'bin' / 'python3', cwd / 'venv' / 'Scripts' / 'python.exe'):
+        if candidate.exists():
+            return str(candidate)
+    return sys.executable
+
+def free_backend_port():
+    """Kill whatever is still listening on port 8000 (e.g. a previous run)."""
     try:
         if platform.system() != 'Windows':
             cmd = "lsof -i :8000 | grep LISTEN | awk '{print $2}' | xargs kill -9"
             subprocess.run(cmd, shell=True, stderr=subprocess.DEVNULL)
     except Exception:
         pass
-    
-    # Start backend in background
-    print(f"{Colors.YELLOW}Starting backend server...{Colors.NC}")
-    backend_log = open('logs/backend.log', 'w')
-    Path('logs').mkdir(exist_ok=True)
-    backend_proc = subprocess.Popen(
-        [python_exe, 'backend.py'],
-        cwd=cwd,
-        stdout=backend_log,
-        stderr=subprocess.STDOUT
-    )
-    
-    # Wait a bit for backend to start
-    import time
-    time.sleep(2)
-    
-    # Check if backend started successfully
-    if backend_proc.poll() is not None:
-        print(f"{Colors.RED}✗{Colors.NC} Backend failed to start! Check logs/backend.log")
+
+def launch(cmd, cwd, log_name=None):
+    """Start a server process; output goes to logs/<log_name> or, without one, to this terminal."""
+    log = None
+    if log_name:
+        Path('logs').mkdir(exist_ok=True)
+        log = open(Path('logs') / log_name, 'w')
+    proc = subprocess.Popen(cmd, cwd=cwd, stdout=log, stderr=subprocess.STDOUT if log else None)
+    proc.log = log
+    return proc
+
+def wait_ready(proc, url, timeout=120.0, interval=0.2):
+    """Poll `url` until it answers; False if the process exits or `timeout` passes first."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            return False
+        try:
+            with urllib.request.urlopen(url, timeout=1):
+                return True
+        except urllib.error.HTTPError:
+            return True  # answering at all means it is up
+        except OSError:
+            time.sleep(interval)
+    return False
+
+def stop_servers(procs):
+    print(f"\n{Colors.YELLOW}Stopping servers...{Colors.NC}")
+    for proc in procs:
+        if proc.poll() is None:
+            proc.terminate()
+    for proc in procs:
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        if proc.log:
+            proc.log.close()
+    print(f"{Colors.GREEN}✓{Colors.NC} All servers stopped")
+
+def start_servers(timer, backend=True, frontend=True, mode='both'):
+    """Start the selected servers in parallel, wait until each answers, then keep them running."""
+    title = {'both': 'STARTING BOTH SERVERS', 'backend': 'STARTING BACKEND SERVER',
+             'frontend': 'STARTING FRONTEND SERVER'}[mode]
+    print(f"{Colors.BOLD}{Colors.MAGENTA}┌─────────────────────────────────────────────────────────┐{Colors.NC}")
+    print(f"{Colors.BOLD}{Colors.MAGENTA}│{Colors.NC}{Colors.BOLD}{title:^57}{Colors.NC}{Colors.BOLD}{Colors.MAGENTA}│{Colors.NC}")
+    print(f"{Colors.BOLD}{Colors.MAGENTA}└─────────────────────────────────────────────────────────┘{Colors.NC}")
+    print(f"{Colors.BLUE}[2/2]{Colors.NC} {Colors.BOLD}Starting servers...{Colors.NC}")
+
+    # With both servers, output goes to log files so the terminal stays readable
+    to_logs = backend and frontend
+    servers = []
+    if backend:
+        free_backend_port()
+        servers.append(('backend', launch([find_python(), 'backend.py'], Path.cwd(),
+                                          'backend.log' if to_logs else None), BACKEND_URL + '/'))
+    if frontend:
+        npm = shutil.which('npm') or 'npm'
+        servers.append(('frontend', launch([npm, 'run', 'dev'], Path.cwd() / 'frontend',
+                                           'frontend.log' if to_logs else None), FRONTEND_URL + '/'))
+    procs = [proc for _, proc, _ in servers]
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(servers)) as pool:
+            futures = {name: pool.submit(timer.run, f"{name} ready", wait_ready, proc, url)
+                       for name, proc, url in servers}
+            ready = {name: future.result() for name, future in futures.items()}
+    except KeyboardInterrupt:
+        stop_servers(procs)
         return
-    
-    print(f"{Colors.GREEN}✓{Colors.NC} Backend started (PID: {backend_proc.pid})")
-    print(f"{Colors.CYAN}  Logs: logs/backend.log{Colors.NC}")
+
+    for name, proc, url in servers:
+        if ready[name]:
+            report(True, f"{name.capitalize()} ready at {Colors.CYAN}{url.rstrip('/')}{Colors.NC} (PID: {proc.pid})")
+        else:
+            log_hint = f" Check logs/{name}.log" if to_logs else ""
+            report(False, f"{name.capitalize()} failed to start!{log_hint}")
+    if backend and ready.get('backend'):
+        print(f"{Colors.GREEN}API Docs:{Colors.NC} {Colors.CYAN}{BACKEND_URL}/docs{Colors.NC}")
+    if to_logs:
+        print(f"{Colors.CYAN}  Logs: logs/backend.log, logs/frontend.log{Colors.NC}")
     print()
-    
-    # Start frontend in foreground
-    print(f"{Colors.YELLOW}Starting frontend server...{Colors.NC}")
-    print(f"{Colors.YELLOW}Press Ctrl+C to stop both servers{Colors.NC}")
+    timer.print_breakdown()
+    timer.save(mode)
+
+    if not all(ready.values()):
+        stop_servers(procs)
+        return
+    print(f"{Colors.YELLOW}Press Ctrl+C to stop{Colors.NC}")
     print()
-    
     try:
-        subprocess.run(['npm', 'run', 'dev'], cwd=cwd / 'frontend')
+        while all(proc.poll() is None for proc in procs):
+            time.sleep(0.5)
+        for name, proc, _ in servers:
+            if proc.poll() is not None:
+                report(False, f"{name.capitalize()} exited (code {proc.returncode})")
     except KeyboardInterrupt:
         pass
     finally:
-        # Clean up backend when frontend exits
-        print(f"\n{Colors.YELLOW}Stopping backend server...{Colors.NC}")
-        backend_proc.terminate()
-        backend_proc.wait()
-        backend_log.close()
-        print(f"{Colors.GREEN}✓{Colors.NC} All servers stopped")
+        stop_servers(procs)
+
+
+def show_menu():
+    """Show interactive menu."""
+    print(f"{Colors.BOLD}{Colors.CYAN}┌─────────────────────────────────────────────────────────┐{Colors.NC}")
+    print(f"{Colors.BOLD}{Colors.CYAN}│{Colors.NC}                   {Colors.BOLD}SELECT STARTUP MODE{Colors.NC}                 {Colors.BOLD}{Colors.CYAN}│{Colors.NC}")
+    print(f"{Colors.BOLD}{Colors.CYAN}└─────────────────────────────────────────────────────────┘{Colors.NC}")
+    print()
+    print(f"{Colors.BOLD}{Colors.GREEN}[1]{Colors.NC} {Colors.BOLD}Start Both (Recommended){Colors.NC} - Backend + Frontend")
+    print(f"{Colors.BOLD}{Colors.GREEN}[2]{Colors.NC} {Colors.BOLD}Start Backend Only{Colors.NC}       - Python FastAPI server")
+    print(f"{Colors.BOLD}{Colors.GREEN}[3]{Colors.NC} {Colors.BOLD}Start Frontend Only{Colors.NC}      - React Vite dev server")
+    print(f"{Colors.BOLD}{Colors.RED}[4]{Colors.NC} {Colors.BOLD}Exit{Colors.NC}")
+    print()
+
+MODES = {'1': 'both', '2': 'backend', '3': 'frontend'}
+
+def run_mode(mode, skip_checks=False):
+    """Checks (in parallel) then servers (in parallel) for 'both', 'backend' or 'frontend'."""
+    timer = PhaseTimer()
+    backend = mode in ('both', 'backend')
+    frontend = mode in ('both', 'frontend')
+    if not skip_checks and not run_checks(timer, backend=backend, frontend=frontend):
+        print(f"{Colors.RED}Startup checks failed; fix the issues above or run with --skip-checks{Colors.NC}")
+        return
+    start_servers(timer, backend=backend, frontend=frontend, mode=mode)
 
 def main():
     """Main entry point."""
@@ -216,32 +379,16 @@ def main():
     print_system_info()
     
     # Check for command line arguments
-    if len(sys.argv) > 1:
-        arg = sys.argv[1].lower()
-        if arg in ['both', '1']:
-            check_node()
-            install_deps()
-            start_both()
-            return
-        elif arg in ['backend', '2']:
-            start_backend()
-            return
-        elif arg in ['frontend', '3']:
-            check_node()
-            install_deps()
-            start_frontend()
+    args = [arg.lower() for arg in sys.argv[1:]]
+    skip_checks = '--skip-checks' in args
+    args = [arg for arg in args if arg != '--skip-checks']
+    if args:
+        mode = MODES.get(args[0], args[0])
+        if mode not in MODES.values():
+            print(f"Usage: {sys.argv[0]} [both|backend|frontend] [--skip-checks]")
             return
-        elif arg == '--skip-checks':
-            pass  # Continue to menu without checks
-        else:
-            print(f"Usage: {sys.argv[0]} [both|backend|frontend|--skip-checks]")
-            return
-    
-    # Run checks
-    if not (len(sys.argv) > 1 and sys.argv[1] == '--skip-checks'):
-        if not check_node():
-            return
-        install_deps()
+        run_mode(mode, skip_checks)
+        return
     
     # Interactive menu
     while True:
@@ -254,14 +401,8 @@ def main():
         
         print()
         
-        if choice == '1':
-            start_both()
-            break
-        elif choice == '2':
-            start_backend()
-            break
-        elif choice == '3':
-            start_frontend()
+        if choice in MODES:
+            run_mode(MODES[choice], skip_checks)
             break
         elif choice == '4':
             print(f"{Colors.GREEN}Thanks for using AI Push-Up Tracker!{Colors.NC}")
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Standalone shared-state broker for running the API with several uvicorn workers.
+Holds the session registry, stats snapshots and camera ownership, and relays
+stats / frame / control messages between workers.
+
+Usage:
+    python state_broker.py --port 9100
+    PUSHUP_STATE_BROKER=127.0.0.1:9100 uvicorn backend:app --workers 4
+(`PUSHUP_API_WORKERS=4 python backend.py` starts an in-process broker itself.)
+"""
+import argparse
+import asyncio
+
+from utils.state_broker import StateBroker
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI Push-Up Tracker shared-state broker")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    args = parser.parse_args()
+
+    print(f"🔗 State broker listening on {args.host}:{args.port}")
+    try:
+        asyncio.run(StateBroker().serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
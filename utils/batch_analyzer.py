@@ -0,0 +1,392 @@
+"""
+utils/batch_analyzer.py
+Vectorized push-up analysis for many sessions at once. The state of every
+session (filtered elbow angle, stage, bottom_reached, cooldown end, reps, rep
+metrics) lives in contiguous NumPy arrays indexed by slot, and `step` advances
+all sessions that have a new frame with a handful of array operations instead
+of one `PushUpAnalyzer.analyze_pose` call each. Results are identical to the
+scalar analyzer.
+"""
+
+import time
+
+import numpy as np
+
+from utils.rep_metrics import RepMetrics, _round
+from utils.rep_segmentation import batch_calculate_angle
+from utils.rep_timing import TIME_EPSILON, alpha_to_tau, batch_ema_weight, frames_to_seconds
+
+
+STAGES = ("Up", "Down")
+FORM_STATES = ("Neutral", "Correct", "Wrong")
+UP, DOWN = 0, 1
+NEUTRAL, CORRECT, WRONG = 0, 1, 2
+
+# (a, vertex, c) landmark indices, same joints as PushUpAnalyzer.analyze_pose
+_ANGLE_IDX = np.array([
+    (11, 13, 15),  # left elbow
+    (12, 14, 16),  # right elbow
+    (11, 23, 25),  # left hip
+    (12, 24, 26),  # right hip
+], dtype=np.intp)
+_HEIGHT_IDX = np.array([(11, 12), (23, 24), (15, 16), (25, 26)], dtype=np.intp)  # shoulder, hip, wrist, knee
+
+_METRIC_FIELDS = RepMetrics.FIELDS
+
+
+# ============================================================
+# BatchPushUpAnalyzer
+# ============================================================
+
+class BatchPushUpAnalyzer:
+    """Struct-of-arrays PushUpAnalyzer for many concurrent sessions.
+
+    Sessions are slots in the state arrays: `add_session()` claims one (growing
+    the arrays when full) and `remove_session()` frees it for reuse. Thresholds
+    are per slot, so sessions can be tuned independently with `set_params`.
+    Constructor arguments are the defaults for new sessions and match
+    PushUpAnalyzer.
+    """
+
+    def __init__(
+        self,
+        elbow_down_threshold: float = 85.0,
+        elbow_up_threshold: float = 165.0,
+        back_tolerance: float = 18.0,
+        smoothing_alpha: float = 0.25,
+        cooldown_frames: int = 6,
+        metrics_window: int = 10,
+        capacity: int = 16,
+        smoothing_tau: float = None,
+        cooldown_seconds: float = None,
+    ):
+        self.defaults = {
+            "elbow_down_threshold": elbow_down_threshold,
+            "elbow_up_threshold": elbow_up_threshold,
+            "back_tolerance": back_tolerance,
+            "smoothing_tau": smoothing_tau if smoothing_tau is not None else alpha_to_tau(smoothing_alpha),
+            "cooldown_seconds": cooldown_seconds if cooldown_seconds is not None else frames_to_seconds(cooldown_frames),
+        }
+        self.metrics_window = int(max(1, metrics_window))
+        self.capacity = 0
+        self._free = []
+        self._allocate(int(max(1, capacity)))
+
+    # ---------------- storage ----------------
+
+    def _allocate(self, capacity):
+        """Grow every state array to `capacity` slots, keeping existing sessions."""
+        old = self.capacity
+        w = self.metrics_window
+
+        def grow(name, dtype, fill, shape=()):
+            array = np.full((capacity,) + shape, fill, dtype=dtype)
+            if old:
+                array[:old] = getattr(self, name)
+            setattr(self, name, array)
+
+        grow("active", bool, False)
+        # thresholds
+        grow("elbow_down_threshold", np.float64, 0.0)
+        grow("elbow_up_threshold", np.float64, 0.0)
+        grow("back_tolerance", np.float64, 0.0)
+        grow("smoothing_tau", np.float64, 0.0)
+        grow("cooldown_seconds", np.float64, 0.0)
+        # analyzer state; NaN filtered_elbow means "no frame yet"
+        grow("filtered_elbow", np.float64, np.nan)
+        grow("last_time", np.float64, np.nan)
+        grow("stage", np.int8, UP)
+        grow("bottom_reached", bool, False)
+        grow("total_reps", np.int64, 0)
+        grow("form_state", np.int8, NEUTRAL)
+        grow("cooldown_until", np.float64, -np.inf)
+        # last analyzed frame, for analysis()
+        grow("last_angles", np.float64, np.nan, (4,))
+        grow("last_back", np.float64, np.nan)
+        grow("last_progress", np.float64, 0.0)
+        # rep in progress (RepMetrics); NaN means None
+        grow("rep_start", np.float64, np.nan)
+        grow("bottom_time", np.float64, np.nan)
+        grow("min_elbow", np.float64, np.nan)
+        grow("max_back_dev", np.float64, 0.0)
+        # completed reps: one ring buffer per metric field (RingBuffer)
+        grow("metric_data", np.float64, 0.0, (len(_METRIC_FIELDS), w))
+        grow("metric_sum", np.float64, 0.0, (len(_METRIC_FIELDS),))
+        grow("metric_head", np.int64, 0)
+        grow("metric_count", np.int64, 0)
+
+        self._free.extend(range(capacity - 1, old - 1, -1))
+        self.capacity = capacity
+
+    def add_session(self, **params):
+        """Claim a slot for a new session; `params` override the constructor defaults."""
+        if not self._free:
+            self._allocate(self.capacity * 2)
+        slot = self._free.pop()
+        self.active[slot] = True
+        self.set_params(slot, **self.defaults)
+        self.set_params(slot, **params)  # separately, so a per-frame override replaces a time-based default
+        self.reset(slot)
+        return slot
+
+    def remove_session(self, slot):
+        if self.active[slot]:
+            self.active[slot] = False
+            self._free.append(slot)
+
+    def clear(self):
+        for slot in np.flatnonzero(self.active):
+            self.remove_session(int(slot))
+
+    def session(self, slot):
+        return BatchSession(self, slot)
+
+    def set_params(self, slot, elbow_down_threshold=None, elbow_up_threshold=None, back_tolerance=None,
+                   smoothing_alpha=None, cooldown_frames=None, smoothing_tau=None, cooldown_seconds=None):
+        if elbow_down_threshold is not None:
+            self.elbow_down_threshold[slot] = float(elbow_down_threshold)
+        if elbow_up_threshold is not None:
+            self.elbow_up_threshold[slot] = float(elbow_up_threshold)
+        if back_tolerance is not None:
+            self.back_tolerance[slot] = float(back_tolerance)
+        if smoothing_alpha is not None:
+            self.smoothing_tau[slot] = alpha_to_tau(smoothing_alpha)
+        if smoothing_tau is not None:
+            self.smoothing_tau[slot] = float(smoothing_tau)
+        if cooldown_frames is not None:
+            self.cooldown_seconds[slot] = frames_to_seconds(cooldown_frames)
+        if cooldown_seconds is not None:
+            self.cooldown_seconds[slot] = max(0.0, float(cooldown_seconds))
+
+    def reset(self, slot):
+        """Reset one session's counters and state (PushUpAnalyzer.reset)."""
+        self.filtered_elbow[slot] = np.nan
+        self.last_time[slot] = np.nan
+        self.stage[slot] = UP
+        self.bottom_reached[slot] = False
+        self.total_reps[slot] = 0
+        self.form_state[slot] = NEUTRAL
+        self.cooldown_until[slot] = -np.inf
+        self.last_angles[slot] = np.nan
+        self.last_back[slot] = np.nan
+        self.last_progress[slot] = 0.0
+        self.rep_start[slot] = self.bottom_time[slot] = self.min_elbow[slot] = np.nan
+        self.max_back_dev[slot] = 0.0
+        self.metric_data[slot] = 0.0
+        self.metric_sum[slot] = 0.0
+        self.metric_head[slot] = 0
+        self.metric_count[slot] = 0
+
+    # ---------------- analysis ----------------
+
+    def step(self, slots, points, timestamps=None):
+        """Advance the sessions in `slots` by one frame each.
+
+        slots: (K,) distinct session slots with a detected person this frame
+        points: (K, 33, 2) pixel coordinates, truncated like PoseDetector.get_keypoints
+        timestamps: (K,) frame times in seconds, or a scalar (default time.monotonic())
+        Returns a dict of (K,) arrays: stage / form_state codes (see STAGES,
+        FORM_STATES), total_reps, elbow_angle, back_angle, progress.
+        """
+        points = np.asarray(points, dtype=np.float64)
+        angles = batch_calculate_angle(points[:, _ANGLE_IDX[:, 0]], points[:, _ANGLE_IDX[:, 1]],
+                                       points[:, _ANGLE_IDX[:, 2]])
+        heights = points[:, _HEIGHT_IDX, 1].mean(axis=2)
+        return self.step_angles(slots, angles, heights, timestamps)
+
+    def step_angles(self, slots, angles, heights, timestamps=None):
+        """`step` from precomputed features (PushUpAnalyzer.analyze_angles).
+
+        angles: (K, 4) left/right elbow and left/right hip angles
+        heights: (K, 4) shoulder, hip, wrist and knee mid-point y
+        """
+        s = np.asarray(slots, dtype=np.intp)
+        if timestamps is None:
+            timestamps = time.monotonic()
+        ts = np.broadcast_to(np.asarray(timestamps, dtype=np.float64), s.shape)
+        angles = np.asarray(angles, dtype=np.float64)
+        shoulder_y, hip_y, wrist_y, knee_y = np.asarray(heights, dtype=np.float64).T
+
+        # EMA of the smaller elbow angle, weighted by time since the last frame; the first frame initializes it
+        raw_elbow = np.minimum(angles[:, 0], angles[:, 1])
+        prev = self.filtered_elbow[s]
+        weight = batch_ema_weight(ts - self.last_time[s], self.smoothing_tau[s])
+        elbow = np.where(np.isnan(prev), raw_elbow, weight * raw_elbow + (1.0 - weight) * prev)
+        self.filtered_elbow[s] = elbow
+        self.last_time[s] = ts
+        back = (angles[:, 2] + angles[:, 3]) / 2
+
+        in_position = (
+            (np.abs(shoulder_y - hip_y) < 100)
+            & (wrist_y > shoulder_y + 50)
+            & (knee_y >= hip_y - 50)
+            & (back >= 155) & (back <= 200)
+            & (elbow >= 60) & (elbow <= 180)
+        )
+        good_back = np.abs(180.0 - back) <= self.back_tolerance[s]
+        self.form_state[s] = np.where(in_position, np.where(good_back, CORRECT, WRONG), NEUTRAL)
+
+        down_thr, up_thr = self.elbow_down_threshold[s], self.elbow_up_threshold[s]
+        progress = np.clip((up_thr - elbow) / np.maximum(1.0, up_thr - down_thr), 0.0, 1.0)
+
+        # Rep state machine with hysteresis + cooldown
+        cooldown_until = self.cooldown_until[s]
+        mid_thr = (down_thr + up_thr) / 2
+        go_down = in_position & (elbow <= down_thr) & good_back
+        rest = in_position & ~go_down
+        rep = rest & self.bottom_reached[s] & (elbow >= up_thr) & good_back & (ts + TIME_EPSILON >= cooldown_until)
+        rest &= ~rep
+        mid = rest & (elbow <= mid_thr)
+        top = rest & ~mid & (elbow >= up_thr - 10)
+
+        stage = self.stage[s]
+        stage = np.where(go_down | mid, DOWN, np.where(rep | top, UP, stage))
+        self.stage[s] = stage
+        bottom = self.bottom_reached[s]
+        self.bottom_reached[s] = (bottom | go_down) & ~rep
+        self.total_reps[s] += rep
+        self.cooldown_until[s] = np.where(rep, ts + self.cooldown_seconds[s], cooldown_until)
+
+        self._complete_reps(s[rep], ts[rep])
+        self._update_metrics(s[in_position], ts[in_position], elbow[in_position], back[in_position],
+                             elbow[in_position] >= up_thr[in_position])
+
+        self.last_angles[s] = angles
+        self.last_back[s] = back
+        self.last_progress[s] = progress
+        return {
+            "slots": s,
+            "stage": stage,
+            "total_reps": self.total_reps[s],
+            "form_state": self.form_state[s],
+            "elbow_angle": elbow,
+            "back_angle": back,
+            "progress": progress,
+        }
+
+    def _complete_reps(self, s, ts):
+        """RepMetrics.complete_rep for each slot in `s`."""
+        if s.size == 0:
+            return
+        start, bottom = self.rep_start[s], self.bottom_time[s]
+        valid = ~np.isnan(start) & ~np.isnan(bottom)
+        if valid.any():
+            v, t = s[valid], ts[valid]
+            values = np.stack([
+                t - start[valid],
+                bottom[valid] - start[valid],
+                t - bottom[valid],
+                self.min_elbow[v],
+                self.max_back_dev[v],
+            ], axis=1)
+            self._push_metrics(v, values)
+        self.rep_start[s] = ts
+        self.bottom_time[s] = np.nan
+        self.min_elbow[s] = np.nan
+        self.max_back_dev[s] = 0.0
+
+    def _update_metrics(self, s, ts, elbow, back, at_top):
+        """RepMetrics.update for each slot in `s`."""
+        if s.size == 0:
+            return
+        t = s[at_top]
+        self.rep_start[t] = ts[at_top]
+        self.bottom_time[t] = np.nan
+        self.min_elbow[t] = np.nan
+        self.max_back_dev[t] = 0.0
+
+        going = ~at_top & ~np.isnan(self.rep_start[s])
+        g, ts, elbow, back = s[going], ts[going], elbow[going], back[going]
+        min_elbow = self.min_elbow[g]
+        lower = np.isnan(min_elbow) | (elbow < min_elbow)
+        self.min_elbow[g[lower]] = elbow[lower]
+        self.bottom_time[g[lower]] = ts[lower]
+        self.max_back_dev[g] = np.maximum(self.max_back_dev[g], np.abs(180.0 - back))
+
+    def _push_metrics(self, s, values):
+        """RingBuffer.push of one (fields,) row per slot."""
+        head = self.metric_head[s]
+        full = self.metric_count[s] == self.metrics_window
+        rows = np.arange(len(_METRIC_FIELDS))
+        evicted = self.metric_data[s[:, None], rows, head[:, None]]
+        self.metric_sum[s] = np.where(full[:, None], self.metric_sum[s] - evicted, self.metric_sum[s]) + values
+        self.metric_data[s[:, None], rows, head[:, None]] = values
+        self.metric_count[s] += ~full
+        self.metric_head[s] = (head + 1) % self.metrics_window
+
+    # ---------------- results ----------------
+
+    def rep_metrics(self, slot):
+        """RepMetrics.snapshot() for one session."""
+        count = int(self.metric_count[slot])
+        if count == 0:
+            last = average = {name: None for name in _METRIC_FIELDS}
+        else:
+            last_col = self.metric_data[slot, :, (self.metric_head[slot] - 1) % self.metrics_window]
+            last = {name: _round(value) for name, value in zip(_METRIC_FIELDS, last_col)}
+            average = {name: _round(total / count) for name, total in zip(_METRIC_FIELDS, self.metric_sum[slot])}
+        return {"last_rep": last, "average": average, "window": count}
+
+    def analysis(self, slot, detected=True):
+        """The dict PushUpAnalyzer.analyze_pose returned for this session's last step.
+
+        detected=False gives the result for a frame without a person (analyze_pose(None)).
+        """
+        if not detected or np.isnan(self.last_back[slot]):
+            return {
+                "stage": STAGES[self.stage[slot]],
+                "total_reps": int(self.total_reps[slot]),
+                "form_state": "Neutral",
+                "elbow_angle": None,
+                "back_angle": None,
+                "progress": 0.0,
+                "rep_metrics": self.rep_metrics(slot),
+            }
+        left_elbow, right_elbow, left_hip, right_hip = self.last_angles[slot].tolist()
+        return {
+            "stage": STAGES[self.stage[slot]],
+            "total_reps": int(self.total_reps[slot]),
+            "form_state": FORM_STATES[self.form_state[slot]],
+            "elbow_angle": round(float(self.filtered_elbow[slot]), 1),
+            "back_angle": round(float(self.last_back[slot]), 1),
+            "progress": float(self.last_progress[slot]),
+            "rep_metrics": self.rep_metrics(slot),
+            "debug": {
+                "left_elbow": round(left_elbow, 1),
+                "right_elbow": round(right_elbow, 1),
+                "left_hip": round(left_hip, 1),
+                "right_hip": round(right_hip, 1),
+            },
+        }
+
+
+class BatchSession:
+    """One slot of a BatchPushUpAnalyzer, with PushUpAnalyzer's read-only attributes
+    (`total_reps`, `stage`, `form_state`) plus `reset` and `set_params`."""
+
+    __slots__ = ("batch", "slot")
+
+    def __init__(self, batch, slot):
+        self.batch = batch
+        self.slot = slot
+
+    @property
+    def total_reps(self):
+        return int(self.batch.total_reps[self.slot])
+
+    @property
+    def stage(self):
+        return STAGES[self.batch.stage[self.slot]]
+
+    @property
+    def form_state(self):
+        return FORM_STATES[self.batch.form_state[self.slot]]
+
+    def reset(self):
+        self.batch.reset(self.slot)
+
+    def set_params(self, **params):
+        self.batch.set_params(self.slot, **params)
+
+    def analysis(self, detected=True):
+        return self.batch.analysis(self.slot, detected)
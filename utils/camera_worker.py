@@ -0,0 +1,256 @@
+"""
+utils/camera_worker.py
+Background camera + pose pipeline for the Streamlit app, and a process-wide
+registry that shares one worker per camera source across browser sessions.
+"""
+
+import time
+import threading
+
+import cv2
+
+from utils.frame_source import create_frame_source
+from utils.pose_utils import PoseDetector, PushUpAnalyzer
+
+
+# ============================================================
+# CameraWorker: capture, pose detection and analysis thread
+# ============================================================
+
+class CameraWorker(threading.Thread):
+    """Optimized background thread for camera capture and pose detection."""
+
+    def __init__(self, src=0, detector_args=(), analyzer_kwargs=None, audio_manager=None, governor=None):
+        """src: frame source spec accepted by `create_frame_source`.
+        governor: ResourceGovernor this worker takes a CPU slot from (None = no limits).
+        """
+        super().__init__()
+        self.governor = governor
+        self.resources = governor.acquire() if governor is not None else None
+        self.src = src
+        self.cap = None
+        self.running = False
+        self.frame = None
+        self.lock = threading.Lock()
+        self.pose_detector = PoseDetector(*detector_args, resources=self.resources)
+        self.analyzer = PushUpAnalyzer(**(analyzer_kwargs or {}))
+        self.audio_manager = audio_manager
+        self.last_form = "Neutral"
+        self.data = {}
+        self.daemon = True
+        self._shutdown = threading.Event()
+        self._resources_lock = threading.Lock()
+
+    def start_camera(self):
+        if not self.running:
+            self.running = True
+            if not self.is_alive():
+                self.start()
+
+    def stop_camera(self):
+        self.running = False
+
+    def shutdown(self, wait=True, timeout=5.0):
+        """Stop the capture loop for good and release the camera.
+
+        wait: block until the loop has exited and released the camera (see `wait_stopped`).
+        """
+        self.running = False
+        self._shutdown.set()
+        if self.ident is None:
+            self._release_resources()  # never started; otherwise run() releases the slot on exit
+        if wait:
+            self.wait_stopped(timeout)
+
+    def _release_resources(self):
+        """Return the CPU slot to the governor (once)."""
+        with self._resources_lock:
+            resources, self.resources = self.resources, None
+        if resources is not None:
+            self.governor.release(resources)
+
+    def wait_stopped(self, timeout=5.0):
+        """Wait for a shut-down worker's thread to exit; True once the camera is released."""
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
+        return not self.is_alive()
+
+    def reset(self):
+        self.analyzer.reset()
+        self.data = {}
+
+    def run(self):
+        """Optimized capture loop with minimal overhead."""
+        try:
+            self._capture_loop()
+        finally:
+            # Only now are the slot's CPUs free for another worker
+            self._release_resources()
+
+    def _capture_loop(self):
+        if self.resources is not None:
+            self.resources.apply_thread()
+        while not self._shutdown.is_set():
+            if self.running:
+                # Initialize camera once
+                if self.cap is None or not self.cap.isOpened():
+                    self.cap = create_frame_source(self.src)
+
+                ret, img = self.cap.read()
+                if not ret:
+                    time.sleep(0.03)
+                    continue
+
+                # Pose detection and analysis
+                results = self.pose_detector.detect_landmarks(img)
+
+                if results.pose_landmarks:
+                    h, w = img.shape[:2]
+                    keypoints = self.pose_detector.get_keypoints(results, w, h)
+                    analysis = self.analyzer.analyze_pose(keypoints, self.cap.last_timestamp)
+
+                    # Update shared data atomically
+                    self.data.update({
+                        'total_reps': analysis.get("total_reps", 0),
+                        'form_state': analysis.get("form_state", "Neutral"),
+                        'stage': analysis.get("stage", "Up")
+                    })
+
+                    # Audio feedback
+                    form = analysis.get("form_state", "Neutral")
+                    if form != self.last_form:
+                        if self.audio_manager is not None:
+                            if form == "Wrong":
+                                self.audio_manager.play_beep("Wrong")
+                            elif form == "Correct":
+                                self.audio_manager.play_chime("Correct")
+                        self.last_form = form
+
+                    # Draw skeleton with form-based color
+                    color = (0, 255, 0) if form == "Correct" else (255, 0, 0)
+                    img = self.pose_detector.draw_skeleton(img, results, color=color)
+
+                # Convert to RGB once
+                disp = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+
+                with self.lock:
+                    self.frame = disp
+
+                time.sleep(0.02)
+            else:
+                # Clean up when stopped
+                if self.cap is not None:
+                    self.cap.release()
+                    self.cap = None
+                time.sleep(0.1)
+
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+
+# ============================================================
+# CameraWorkerRegistry: one worker per source, shared by sessions
+# ============================================================
+
+class _PendingWorker:
+    """Placeholder for a worker being built outside the registry lock."""
+
+    def __init__(self):
+        self.ready = threading.Event()
+        self.worker = None  # stays None if the factory failed
+
+
+class CameraWorkerRegistry:
+    """Process-wide CameraWorkers keyed by camera source.
+
+    Each browser session subscribes with its own token. The first subscriber
+    starts the worker; when the last one unsubscribes the worker is shut down
+    and its camera released. Shutdown does not block unsubscribe; a new worker
+    for the same source first waits for the old one to release the device.
+    That wait and the worker construction happen outside the registry lock,
+    so only subscribers of the same source wait for them.
+    """
+
+    def __init__(self, worker_factory):
+        self._worker_factory = worker_factory
+        self._lock = threading.Lock()
+        self._workers = {}
+        self._subscribers = {}
+        self._stopping = {}  # src -> shut-down worker that may still hold the device
+
+    def subscribe(self, src, token):
+        """Attach `token` to the worker for `src`, starting it if needed."""
+        old = None
+        with self._lock:
+            entry = self._workers.get(src)
+            if entry is None:
+                entry = pending = _PendingWorker()
+                self._workers[src] = pending
+                self._subscribers[src] = set()
+                old = self._stopping.pop(src, None)
+            else:
+                pending = None
+            self._subscribers[src].add(token)
+            if not isinstance(entry, _PendingWorker):
+                entry.start_camera()
+                return entry
+
+        if pending is None:
+            # Another session is building this source's worker
+            entry.ready.wait()
+            if entry.worker is None:
+                raise RuntimeError(f"camera worker for {src!r} failed to start")
+            return entry.worker
+        return self._build(src, pending, old)
+
+    def _build(self, src, pending, old):
+        """Wait for the previous worker and construct the new one, outside the registry lock."""
+        try:
+            if old is not None and not old.wait_stopped():
+                print(f"[CameraWorkerRegistry] Previous worker for {src!r} still running; opening anyway")
+            worker = self._worker_factory(src)
+        except BaseException:
+            with self._lock:
+                if self._workers.get(src) is pending:
+                    del self._workers[src]
+                    self._subscribers.pop(src, None)
+            pending.ready.set()
+            raise
+
+        with self._lock:
+            if self._subscribers.get(src):
+                self._workers[src] = worker
+                worker.start_camera()
+            else:
+                # Every subscriber left while the worker was being built
+                del self._workers[src]
+                self._subscribers.pop(src, None)
+                worker.shutdown(wait=False)
+                self._stopping[src] = worker
+        pending.worker = worker
+        pending.ready.set()
+        return worker
+
+    def unsubscribe(self, src, token):
+        """Detach `token`; shuts the worker down when nobody is watching."""
+        with self._lock:
+            subscribers = self._subscribers.get(src)
+            if subscribers is None:
+                return
+            subscribers.discard(token)
+            if subscribers or isinstance(self._workers[src], _PendingWorker):
+                return  # a worker still being built is shut down by its builder if nobody is left
+            worker = self._workers.pop(src)
+            del self._subscribers[src]
+            worker.shutdown(wait=False)
+            self._stopping[src] = worker
+
+    def get(self, src):
+        with self._lock:
+            worker = self._workers.get(src)
+        return None if isinstance(worker, _PendingWorker) else worker
+
+    def subscriber_count(self, src):
+        with self._lock:
+            return len(self._subscribers.get(src, ()))
@@ -0,0 +1,253 @@
+"""
+utils/clip_capture.py
+Saves short clips around form faults from JPEG frames the stream already
+encoded. The frame loop only appends (timestamp, bytes) to a bounded ring
+buffer; when form turns "Wrong" the frames around the event are handed to a
+background thread that muxes them into a video file. With PyAV the JPEGs are
+muxed as MJPEG packets into Matroska without re-encoding; without it they are
+decoded and written with OpenCV's MJPG VideoWriter (still off the frame loop).
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from fractions import Fraction
+
+import cv2
+import numpy as np
+
+try:
+    import av
+    PYAV_AVAILABLE = True
+except ImportError:  # optional dependency
+    av = None
+    PYAV_AVAILABLE = False
+
+
+# ============================================================
+# JpegRing: bounded history of encoded frames
+# ============================================================
+
+class JpegRing:
+    """(timestamp, jpeg bytes) pairs covering at most `max_seconds` and `max_bytes`."""
+
+    def __init__(self, max_seconds, max_bytes):
+        self.max_seconds = float(max_seconds)
+        self.max_bytes = int(max_bytes)
+        self.frames = deque()
+        self.nbytes = 0
+
+    def append(self, timestamp, data):
+        self.frames.append((timestamp, data))
+        self.nbytes += len(data)
+        while self.frames and (self.nbytes > self.max_bytes or timestamp - self.frames[0][0] > self.max_seconds):
+            self.nbytes -= len(self.frames.popleft()[1])
+
+    def since(self, start):
+        return [frame for frame in self.frames if frame[0] >= start]
+
+    def clear(self):
+        self.frames.clear()
+        self.nbytes = 0
+
+
+# ============================================================
+# Clip writers
+# ============================================================
+
+def _frame_size(data):
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("undecodable JPEG frame")
+    return image.shape[1], image.shape[0]
+
+
+def write_clip_pyav(path, frames):
+    """Mux JPEG frames into Matroska as MJPEG packets (no re-encoding); millisecond timestamps."""
+    width, height = _frame_size(frames[0][1])
+    container = av.open(path, "w", format="matroska")
+    try:
+        stream = container.add_stream("mjpeg", rate=30)
+        stream.width, stream.height = width, height
+        stream.pix_fmt = "yuvj420p"
+        stream.time_base = Fraction(1, 1000)
+        start, last_pts = frames[0][0], -1
+        for timestamp, data in frames:
+            pts = max(int(round((timestamp - start) * 1000)), last_pts + 1)
+            packet = av.Packet(data)
+            packet.stream = stream
+            packet.pts = packet.dts = last_pts = pts
+            packet.time_base = stream.time_base
+            packet.is_keyframe = True
+            container.mux(packet)
+    finally:
+        container.close()
+
+
+def write_clip_cv2(path, frames):
+    """Decode JPEG frames and write them with OpenCV's MJPG VideoWriter at their average rate."""
+    width, height = _frame_size(frames[0][1])
+    span = frames[-1][0] - frames[0][0]
+    fps = (len(frames) - 1) / span if span > 0 else 30.0
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (width, height))
+    try:
+        for _, data in frames:
+            image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if image is not None and image.shape[:2] == (height, width):
+                writer.write(image)
+    finally:
+        writer.release()
+
+
+# ============================================================
+# Retention
+# ============================================================
+
+def prune_clips(directory, max_clips=None, max_bytes=None):
+    """Delete the oldest clips (video and metadata) beyond `max_clips` or `max_bytes` in total.
+
+    Newer clips are kept first; once a limit is reached every older clip is
+    removed. Returns the number of clips deleted.
+    """
+    clips = []
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return 0
+    for name in names:
+        if not name.endswith(".json"):
+            continue
+        meta_path = os.path.join(directory, name)
+        try:
+            with open(meta_path) as f:
+                video_path = os.path.join(directory, os.path.basename(json.load(f)["file"]))
+            size = os.path.getsize(meta_path) + (os.path.getsize(video_path) if os.path.exists(video_path) else 0)
+            clips.append((os.path.getmtime(meta_path), size, meta_path, video_path))
+        except (OSError, ValueError, KeyError, TypeError):
+            continue  # being written or unreadable; left alone
+    clips.sort(reverse=True)  # newest first
+
+    kept = total = removed = 0
+    over = False
+    for _, size, meta_path, video_path in clips:
+        over = over or (max_clips is not None and kept >= max_clips) \
+            or (max_bytes is not None and total + size > max_bytes)
+        if not over:
+            kept += 1
+            total += size
+            continue
+        for path in (meta_path, video_path):  # metadata first so listings never show a missing video
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        removed += 1
+    return removed
+
+
+# ============================================================
+# ClipCapture
+# ============================================================
+
+class ClipCapture:
+    """Per-session bad-form clip capture.
+
+    Call `add_frame` for every encoded frame; it never blocks on disk I/O. A
+    clip spans `pre_seconds` before the frame where form turned "Wrong" to
+    `post_seconds` after it; events during a clip are part of that clip. At
+    most `max_pending` clips wait for the writer (later ones are dropped and
+    counted), so memory stays below (1 + max_pending) * max_bytes. After each
+    clip is written, the oldest clips in `directory` beyond `max_clips` or
+    `max_disk_bytes` are deleted (see `prune_clips`).
+    """
+
+    def __init__(self, directory, session_id, pre_seconds=3.0, post_seconds=2.0,
+                 max_bytes=32 * 2**20, max_pending=2, max_clips=None, max_disk_bytes=None):
+        self.directory = directory
+        self.session_id = session_id
+        self.max_clips = max_clips
+        self.max_disk_bytes = max_disk_bytes
+        self.pre_seconds = float(pre_seconds)
+        self.post_seconds = float(post_seconds)
+        self.extension, self._write_clip = (".mkv", write_clip_pyav) if PYAV_AVAILABLE else (".avi", write_clip_cv2)
+        self.ring = JpegRing(self.pre_seconds + self.post_seconds, max_bytes)
+        self.saved = 0
+        self.dropped = 0
+        self._clip_index = 0
+        self._event = None  # (event timestamp, info) while collecting post-event frames
+        self._last_form = None
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=int(max(1, max_pending)))
+        self._thread = threading.Thread(target=self._writer_loop, name="clip-writer", daemon=True)
+        self._thread.start()
+
+    def add_frame(self, timestamp, data, form_state, info=None):
+        """Append an encoded frame and its form state; `info` is stored in the clip's metadata."""
+        with self._lock:
+            self.ring.append(timestamp, data)
+            if form_state == "Wrong" and self._last_form != "Wrong" and self._event is None:
+                self._event = (timestamp, dict(info or {}))
+            self._last_form = form_state
+            if self._event is not None and timestamp >= self._event[0] + self.post_seconds:
+                self._submit()
+
+    def _submit(self):
+        event_time, info = self._event
+        self._event = None
+        frames = self.ring.since(event_time - self.pre_seconds)
+        if not frames:
+            return
+        try:
+            self._queue.put_nowait((event_time, info, frames))
+        except queue.Full:
+            self.dropped += 1
+
+    def _writer_loop(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            try:
+                self._write(*job)
+            except Exception as e:
+                print(f"Clip capture failed: {e}")
+
+    def _write(self, event_time, info, frames):
+        frames.sort(key=lambda frame: frame[0])  # concurrent encoders may append out of order
+        os.makedirs(self.directory, exist_ok=True)
+        self._clip_index += 1
+        clip_id = f"{self.session_id}-{self._clip_index:03d}"
+        path = os.path.join(self.directory, clip_id + self.extension)
+        tmp_path = os.path.join(self.directory, clip_id + ".part" + self.extension)  # writers pick the format by extension
+        self._write_clip(tmp_path, frames)
+        os.replace(tmp_path, path)
+        meta = {
+            "id": clip_id,
+            "file": os.path.basename(path),
+            "session": self.session_id,
+            "created": time.time(),
+            "event_offset": round(event_time - frames[0][0], 3),
+            "duration": round(frames[-1][0] - frames[0][0], 3),
+            "frames": len(frames),
+            **info,
+        }
+        with open(os.path.join(self.directory, clip_id + ".json"), "w") as f:
+            json.dump(meta, f)
+        self.saved += 1
+        if self.max_clips is not None or self.max_disk_bytes is not None:
+            prune_clips(self.directory, self.max_clips, self.max_disk_bytes)
+
+    def close(self, timeout=10.0):
+        """Write a clip still collecting post-event frames, then stop the writer."""
+        with self._lock:
+            if self._event is not None:
+                self._submit()
+            self.ring.clear()
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
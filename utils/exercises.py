@@ -0,0 +1,296 @@
+"""
+utils/exercises.py
+Multi-exercise analysis on a shared per-frame feature vector.
+All joint angles and body-orientation features are computed once per frame
+in a single vectorized pass; any number of exercise analyzers then read them.
+"""
+
+import time
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from utils.pose_utils import PushUpAnalyzer
+from utils.rep_segmentation import batch_calculate_angle
+from utils.rep_timing import TIME_EPSILON, alpha_to_tau, ema_weight, frames_to_seconds
+
+
+# ============================================================
+# Shared feature extraction
+# ============================================================
+
+# name -> (a, vertex, c) landmark indices; the angle is measured at the vertex
+JOINT_ANGLES = {
+    "left_elbow": (11, 13, 15),
+    "right_elbow": (12, 14, 16),
+    "left_shoulder": (13, 11, 23),
+    "right_shoulder": (14, 12, 24),
+    "left_hip": (11, 23, 25),
+    "right_hip": (12, 24, 26),
+    "left_knee": (23, 25, 27),
+    "right_knee": (24, 26, 28),
+}
+_ANGLE_NAMES = tuple(JOINT_ANGLES)
+_ANGLE_IDX = np.array([JOINT_ANGLES[name] for name in _ANGLE_NAMES], dtype=np.intp)
+
+# name -> (left, right) landmark indices averaged into a mid-point height
+BODY_HEIGHTS = {
+    "shoulder_y": (11, 12),
+    "hip_y": (23, 24),
+    "wrist_y": (15, 16),
+    "knee_y": (25, 26),
+    "ankle_y": (27, 28),
+}
+_HEIGHT_NAMES = tuple(BODY_HEIGHTS)
+_HEIGHT_IDX = np.array([BODY_HEIGHTS[name] for name in _HEIGHT_NAMES], dtype=np.intp)
+
+
+def landmarks_to_points(landmarks, frame_width, frame_height):
+    """(33, 2) integer pixel coordinates, truncated like `get_keypoints`."""
+    pts = np.array([(lm.x, lm.y) for lm in landmarks], dtype=np.float64)
+    pts *= (frame_width, frame_height)
+    return np.trunc(pts)
+
+
+def compute_features(points):
+    """Compute every joint angle and orientation feature for one frame.
+
+    points: (33, 2) pixel coordinates.
+    Returns a flat dict of floats: one entry per JOINT_ANGLES / BODY_HEIGHTS name,
+    plus `torso_angle` (shoulder->hip line vs. horizontal, 0 = lying, 90 = upright).
+    """
+    angles = batch_calculate_angle(points[_ANGLE_IDX[:, 0]], points[_ANGLE_IDX[:, 1]], points[_ANGLE_IDX[:, 2]])
+    heights = points[_HEIGHT_IDX, 1].mean(axis=1)
+    shoulder_mid = points[[11, 12]].mean(axis=0)
+    hip_mid = points[[23, 24]].mean(axis=0)
+    dx, dy = hip_mid - shoulder_mid
+    torso_angle = np.degrees(np.arctan2(abs(dy), abs(dx)))
+
+    features = dict(zip(_ANGLE_NAMES, angles.tolist()))
+    features.update(zip(_HEIGHT_NAMES, heights.tolist()))
+    features["torso_angle"] = float(torso_angle)
+    return features
+
+
+# ============================================================
+# Exercise analyzers
+# ============================================================
+
+class ExerciseAnalyzer(ABC):
+    """Base class: consume the shared feature dict, return a result dict."""
+
+    name = "exercise"
+
+    @abstractmethod
+    def analyze(self, features, timestamp):
+        """Result dict for one frame's features."""
+
+    @abstractmethod
+    def reset(self):
+        """Clear counters and state."""
+
+
+class PushUpExercise(ExerciseAnalyzer):
+    """Adapter that feeds shared features into the existing PushUpAnalyzer."""
+
+    name = "pushup"
+
+    def __init__(self, analyzer=None, **kwargs):
+        self.analyzer = analyzer if analyzer is not None else PushUpAnalyzer(**kwargs)
+
+    def analyze(self, features, timestamp):
+        f = features
+        return self.analyzer.analyze_angles(
+            f["left_elbow"], f["right_elbow"], f["left_hip"], f["right_hip"],
+            f["shoulder_y"], f["hip_y"], f["wrist_y"], f["knee_y"], timestamp,
+        )
+
+    def reset(self):
+        self.analyzer.reset()
+
+
+class RepCountingExercise(ExerciseAnalyzer):
+    """Hysteresis rep counter on one smoothed driving angle.
+
+    A rep is counted when the angle drops to `down_threshold` and then rises
+    back to `up_threshold`. Subclasses pick the angle, the position check
+    and the form check. Smoothing and cooldown are time-based like
+    PushUpAnalyzer's (smoothing_tau / cooldown_seconds, or their per-frame
+    equivalents smoothing_alpha / cooldown_frames).
+    """
+
+    def __init__(self, down_threshold, up_threshold, smoothing_alpha=0.3, cooldown_frames=8,
+                 smoothing_tau=None, cooldown_seconds=None):
+        self.down_threshold = float(down_threshold)
+        self.up_threshold = float(up_threshold)
+        self.smoothing_tau = float(smoothing_tau) if smoothing_tau is not None else alpha_to_tau(smoothing_alpha)
+        self.cooldown_seconds = (max(0.0, float(cooldown_seconds)) if cooldown_seconds is not None
+                                 else frames_to_seconds(cooldown_frames))
+        self.reset()
+
+    def reset(self):
+        self.filtered = None
+        self._last_time = None
+        self.stage = "Up"
+        self.bottom_reached = False
+        self.total_reps = 0
+        self._cooldown_until = -np.inf
+
+    @abstractmethod
+    def driving_angle(self, features):
+        """The angle (degrees) the rep count follows."""
+
+    def in_position(self, features):
+        return True
+
+    def good_form(self, features):
+        return True
+
+    def analyze(self, features, timestamp):
+        raw = self.driving_angle(features)
+        if self.filtered is None:
+            self.filtered = raw
+        else:
+            weight = ema_weight(timestamp - self._last_time, self.smoothing_tau)
+            self.filtered = weight * raw + (1.0 - weight) * self.filtered
+        self._last_time = timestamp
+        angle = self.filtered
+        in_position = self.in_position(features)
+        good = self.good_form(features)
+        form_state = ("Correct" if good else "Wrong") if in_position else "Neutral"
+
+        if in_position:
+            if angle <= self.down_threshold:
+                self.bottom_reached = True
+                self.stage = "Down"
+            elif (self.bottom_reached and angle >= self.up_threshold
+                  and timestamp + TIME_EPSILON >= self._cooldown_until):
+                self.stage = "Up"
+                self.total_reps += 1
+                self.bottom_reached = False
+                self._cooldown_until = timestamp + self.cooldown_seconds
+
+        denom = max(1.0, self.up_threshold - self.down_threshold)
+        return {
+            "stage": self.stage,
+            "total_reps": self.total_reps,
+            "form_state": form_state,
+            "angle": round(float(angle), 1),
+            "progress": float(np.clip((self.up_threshold - angle) / denom, 0.0, 1.0)),
+        }
+
+
+class SquatExercise(RepCountingExercise):
+    """Squats: knee angle drives the count; torso must stay reasonably upright."""
+
+    name = "squat"
+
+    def __init__(self, down_threshold=100.0, up_threshold=160.0, min_torso_angle=45.0, **kwargs):
+        self.min_torso_angle = float(min_torso_angle)
+        super().__init__(down_threshold, up_threshold, **kwargs)
+
+    def driving_angle(self, features):
+        return min(features["left_knee"], features["right_knee"])
+
+    def in_position(self, features):
+        # Standing-ish: hips above ankles and body closer to vertical than horizontal
+        return features["hip_y"] < features["ankle_y"] and features["torso_angle"] >= 30.0
+
+    def good_form(self, features):
+        return features["torso_angle"] >= self.min_torso_angle
+
+
+class SitUpExercise(RepCountingExercise):
+    """Sit-ups: hip angle opens when lying back and closes when sitting up.
+
+    The thresholds apply to 180 - hip angle, so lying back is the "Down"
+    side and a rep is counted on reaching the sitting-up position.
+    """
+
+    name = "situp"
+
+    def __init__(self, down_threshold=60.0, up_threshold=120.0, **kwargs):
+        super().__init__(down_threshold, up_threshold, **kwargs)
+
+    def driving_angle(self, features):
+        return 180.0 - min(features["left_hip"], features["right_hip"])
+
+    def in_position(self, features):
+        # Knees bent and knees above hips (lying on the floor)
+        return min(features["left_knee"], features["right_knee"]) < 140.0 and features["knee_y"] <= features["hip_y"]
+
+
+class PlankExercise(ExerciseAnalyzer):
+    """Planks: accumulates hold time while the body is horizontal and straight."""
+
+    name = "plank"
+
+    def __init__(self, back_tolerance=20.0, max_torso_angle=30.0, max_gap=0.5):
+        self.back_tolerance = float(back_tolerance)
+        self.max_torso_angle = float(max_torso_angle)
+        self.max_gap = float(max_gap)
+        self.reset()
+
+    def reset(self):
+        self.hold_seconds = 0.0
+        self.best_hold = 0.0
+        self.current_hold = 0.0
+        self._last_ts = None
+
+    def analyze(self, features, timestamp):
+        back_angle = (features["left_hip"] + features["right_hip"]) / 2.0
+        horizontal = features["torso_angle"] <= self.max_torso_angle
+        straight = abs(180.0 - back_angle) <= self.back_tolerance
+        holding = horizontal and straight
+
+        dt = 0.0 if self._last_ts is None else timestamp - self._last_ts
+        self._last_ts = timestamp
+        if holding and 0.0 < dt <= self.max_gap:
+            self.hold_seconds += dt
+            self.current_hold += dt
+            self.best_hold = max(self.best_hold, self.current_hold)
+        elif not holding:
+            self.current_hold = 0.0
+
+        return {
+            "stage": "Hold" if holding else "Rest",
+            "form_state": ("Correct" if straight else "Wrong") if horizontal else "Neutral",
+            "hold_seconds": round(self.hold_seconds, 2),
+            "current_hold": round(self.current_hold, 2),
+            "best_hold": round(self.best_hold, 2),
+        }
+
+
+EXERCISES = {
+    PushUpExercise.name: PushUpExercise,
+    SquatExercise.name: SquatExercise,
+    SitUpExercise.name: SitUpExercise,
+    PlankExercise.name: PlankExercise,
+}
+
+
+# ============================================================
+# MultiExerciseAnalyzer: one feature pass, many analyzers
+# ============================================================
+
+class MultiExerciseAnalyzer:
+    """Runs several exercise analyzers off one shared feature computation."""
+
+    def __init__(self, analyzers):
+        self.analyzers = list(analyzers)
+
+    @classmethod
+    def from_names(cls, names, **overrides):
+        """Build from EXERCISES names; `overrides[name]` holds constructor kwargs."""
+        return cls(EXERCISES[name](**overrides.get(name, {})) for name in names)
+
+    def reset(self):
+        for analyzer in self.analyzers:
+            analyzer.reset()
+
+    def analyze(self, landmarks, frame_width, frame_height, timestamp=None):
+        """Analyze one person's landmarks with every registered exercise."""
+        if timestamp is None:
+            timestamp = time.monotonic()
+        features = compute_features(landmarks_to_points(landmarks, frame_width, frame_height))
+        return {analyzer.name: analyzer.analyze(features, timestamp) for analyzer in self.analyzers}
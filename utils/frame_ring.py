@@ -0,0 +1,246 @@
+"""
+utils/frame_ring.py
+Shared-memory ring buffer of fixed-size frame slots for passing camera frames
+between processes without pickling. A capture process writes frames straight
+into the slots; readers in other processes get zero-copy NumPy views.
+"""
+
+import multiprocessing as mp
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from utils.frame_source import create_frame_source
+
+
+# ============================================================
+# Memory layout
+# ============================================================
+# [ header: 8 x int64 ][ slot seq: N x int64 ][ slot ts: N x float64 ][ frames: N x H x W x C uint8 ]
+# header = magic, num_slots, height, width, channels, last_written_seq, writer_alive, source_status
+
+_MAGIC = 0x50555348  # "PUSH"
+_HEADER_LEN = 8
+_WRITING = -1
+
+# source_status values, set once by the capture process
+SOURCE_OPENING = 0
+SOURCE_OPENED = 1
+SOURCE_FAILED = -1
+
+
+class SharedFrameRing:
+    """Fixed-slot frame ring in a `multiprocessing.shared_memory` block.
+
+    Each slot carries a sequence number used as a seqlock: the writer marks a
+    slot as being written (-1) before copying and publishes the new sequence
+    number afterwards. Readers take a view, use it, then call `is_valid` to
+    confirm the writer did not lap them in the meantime.
+    """
+
+    def __init__(self, shm, owner):
+        self._shm = shm
+        self._owner = owner
+        header = np.ndarray((_HEADER_LEN,), dtype=np.int64, buffer=shm.buf)
+        if header[0] != _MAGIC:
+            raise ValueError(f"shared memory block {shm.name!r} is not a frame ring")
+        self.num_slots = int(header[1])
+        self.shape = (int(header[2]), int(header[3]), int(header[4]))
+        offset = header.nbytes
+        self._header = header
+        self._seq = np.ndarray((self.num_slots,), dtype=np.int64, buffer=shm.buf, offset=offset)
+        offset += self._seq.nbytes
+        self._ts = np.ndarray((self.num_slots,), dtype=np.float64, buffer=shm.buf, offset=offset)
+        offset += self._ts.nbytes
+        self._frames = np.ndarray((self.num_slots,) + self.shape, dtype=np.uint8, buffer=shm.buf, offset=offset)
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    @classmethod
+    def create(cls, shape=(480, 640, 3), num_slots=8, name=None):
+        shape = tuple(int(v) for v in shape)
+        size = (_HEADER_LEN + 2 * num_slots) * 8 + num_slots * int(np.prod(shape))
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        header = np.ndarray((_HEADER_LEN,), dtype=np.int64, buffer=shm.buf)
+        header[:] = (_MAGIC, num_slots, shape[0], shape[1], shape[2], 0, 1, 0)
+        ring = cls(shm, owner=True)
+        ring._seq[:] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, name):
+        return cls(shared_memory.SharedMemory(name=name), owner=False)
+
+    # ----------------------- writer side -----------------------
+
+    def begin_write(self):
+        """Claim the next slot; returns (seq, writable view). Call `end_write` after filling it."""
+        seq = int(self._header[5]) + 1
+        slot = seq % self.num_slots
+        self._seq[slot] = _WRITING
+        return seq, self._frames[slot]
+
+    def end_write(self, seq, timestamp=None):
+        slot = seq % self.num_slots
+        self._ts[slot] = time.monotonic() if timestamp is None else timestamp
+        self._seq[slot] = seq
+        self._header[5] = seq
+
+    def write(self, frame, timestamp=None):
+        seq, view = self.begin_write()
+        np.copyto(view, frame)
+        self.end_write(seq, timestamp)
+        return seq
+
+    def mark_closed(self):
+        self._header[6] = 0
+
+    def mark_source(self, opened):
+        """Publish whether the capture process managed to open its frame source."""
+        self._header[7] = SOURCE_OPENED if opened else SOURCE_FAILED
+
+    # ----------------------- reader side -----------------------
+
+    @property
+    def writer_alive(self):
+        return bool(self._header[6])
+
+    @property
+    def source_status(self):
+        return int(self._header[7])
+
+    def latest_seq(self):
+        return int(self._header[5])
+
+    def read(self, seq):
+        """Zero-copy view of frame `seq`; returns (timestamp, view) or None if overwritten."""
+        slot = seq % self.num_slots
+        if self._seq[slot] != seq:
+            return None
+        return float(self._ts[slot]), self._frames[slot]
+
+    def read_latest(self, after=0):
+        """Newest frame with sequence number > `after`; returns (seq, timestamp, view) or None."""
+        seq = self.latest_seq()
+        if seq <= after:
+            return None
+        item = self.read(seq)
+        if item is None:
+            return None
+        return (seq,) + item
+
+    def is_valid(self, seq):
+        """True if frame `seq` has not been overwritten since it was read."""
+        return self._seq[seq % self.num_slots] == seq
+
+    def wait_latest(self, after=0, timeout=1.0, poll=0.001):
+        deadline = time.monotonic() + timeout
+        while True:
+            item = self.read_latest(after)
+            if item is not None or time.monotonic() >= deadline or not self.writer_alive:
+                return item
+            time.sleep(poll)
+
+    def close(self):
+        # Drop views before closing so the buffer can be released
+        self._header = self._seq = self._ts = self._frames = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+# ============================================================
+# Capture process
+# ============================================================
+
+def capture_loop(ring_name, src, stop_event):
+    """Read frames from frame source `src` directly into ring slots until `stop_event` is set."""
+    ring = SharedFrameRing.attach(ring_name)
+    try:
+        cap = create_frame_source(src)
+    except Exception:
+        ring.mark_source(False)
+        ring.mark_closed()
+        ring.close()
+        raise
+    ring.mark_source(cap.isOpened())
+    try:
+        while not stop_event.is_set() and cap.isOpened():
+            seq, view = ring.begin_write()
+            ok, frame = cap.read(view)
+            if not ok:
+                time.sleep(0.01)
+                continue
+            if frame.shape != ring.shape:
+                np.copyto(view, cv2.resize(frame, (ring.shape[1], ring.shape[0])))
+            elif frame is not view and not np.shares_memory(frame, view):
+                np.copyto(view, frame)
+            ring.end_write(seq, cap.last_timestamp)
+    finally:
+        cap.release()
+        ring.mark_closed()
+        ring.close()
+
+
+def start_capture_process(src=0, shape=(480, 640, 3), num_slots=8):
+    """Create a ring and a capture process feeding it; returns (ring, process, stop_event)."""
+    ring = SharedFrameRing.create(shape=shape, num_slots=num_slots)
+    stop_event = mp.Event()
+    process = mp.Process(target=capture_loop, args=(ring.name, src, stop_event), daemon=True)
+    process.start()
+    return ring, process, stop_event
+
+
+class RingCapture:
+    """VideoCapture-like reader over a capture process, for the frame loops in backend.py.
+
+    `read()` copies the newest unseen frame into a preallocated buffer (callers draw
+    on it); processes that only read can use `ring.read_latest()` views directly.
+    `isOpened()` waits up to `open_timeout` seconds for the capture process to
+    report whether it opened the source.
+    """
+
+    def __init__(self, src=0, shape=(480, 640, 3), num_slots=8, timeout=1.0, open_timeout=10.0):
+        self.ring, self._process, self._stop = start_capture_process(src, shape, num_slots)
+        self.timeout = float(timeout)
+        self.open_timeout = float(open_timeout)
+        self._last_seq = 0
+        self._buffer = np.empty(self.ring.shape, dtype=np.uint8)
+        self.last_timestamp = None
+
+    def isOpened(self):
+        if self.ring is None:
+            return False
+        deadline = time.monotonic() + self.open_timeout
+        while (self.ring.source_status == SOURCE_OPENING and self._process.is_alive()
+               and time.monotonic() < deadline):
+            time.sleep(0.005)
+        return self.ring.source_status == SOURCE_OPENED and self._process.is_alive()
+
+    def read(self):
+        if self.ring is None:
+            return False, None
+        item = self.ring.wait_latest(self._last_seq, timeout=self.timeout)
+        if item is None:
+            return False, None
+        seq, timestamp, view = item
+        np.copyto(self._buffer, view)
+        if not self.ring.is_valid(seq):
+            return False, None
+        self._last_seq = seq
+        self.last_timestamp = timestamp
+        return True, self._buffer
+
+    def release(self):
+        if self.ring is None:
+            return
+        self._stop.set()
+        self._process.join(timeout=2.0)
+        if self._process.is_alive():
+            self._process.terminate()
+        self.ring.close()
+        self.ring = None
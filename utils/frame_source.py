@@ -0,0 +1,261 @@
+"""
+utils/frame_source.py
+Pluggable frame sources: webcam, video file, looping image directory and a
+synthetic generator. All share a VideoCapture-like interface so backend.py and
+app.py can take any of them from configuration.
+"""
+
+import os
+import time
+from abc import ABC, abstractmethod
+from urllib.parse import parse_qsl
+
+import cv2
+import numpy as np
+
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+# ============================================================
+# FrameSource base
+# ============================================================
+
+class FrameSource(ABC):
+    """Common interface for frame producers.
+
+    `read(out=None)` returns (ok, frame) like cv2.VideoCapture; when `out` is a
+    preallocated array of the right shape the frame is written into it.
+    `read_timestamped(out=None)` also returns the frame timestamp in seconds,
+    which is kept in `last_timestamp` as well. Subclasses implement `isOpened`
+    and `_read`, and override `release` when they hold a device or file.
+    """
+
+    def __init__(self, realtime=True, fps=30.0):
+        self.realtime = bool(realtime)
+        self.fps = float(fps)
+        self.last_timestamp = None
+        self._next_due = None
+
+    @abstractmethod
+    def isOpened(self):
+        """True while frames can be read."""
+
+    @abstractmethod
+    def _read(self, out):
+        """Return (ok, frame, timestamp) without pacing."""
+
+    def read_timestamped(self, out=None):
+        ok, frame, timestamp = self._read(out)
+        if ok:
+            self._pace()
+            self.last_timestamp = timestamp
+        return ok, frame, timestamp
+
+    def read(self, out=None):
+        ok, frame, _ = self.read_timestamped(out)
+        return ok, frame
+
+    def _pace(self):
+        """Sleep so frames are delivered at `fps` when running in real time."""
+        if not self.realtime or self.fps <= 0:
+            return
+        now = time.monotonic()
+        if self._next_due is None or now - self._next_due > 1.0:
+            self._next_due = now
+        elif self._next_due > now:
+            time.sleep(self._next_due - now)
+        self._next_due += 1.0 / self.fps
+
+    def release(self):
+        pass
+
+
+def _into(out, frame):
+    """Copy `frame` into `out` when shapes match; otherwise return `frame`."""
+    if out is not None and out.shape == frame.shape:
+        np.copyto(out, frame)
+        return out
+    return frame
+
+
+# ============================================================
+# Sources
+# ============================================================
+
+class WebcamSource(FrameSource):
+    """Live camera; pacing comes from the device, timestamps are capture times."""
+
+    def __init__(self, index=0, width=640, height=480, fps=30):
+        super().__init__(realtime=False, fps=fps)
+        self.cap = cv2.VideoCapture(index)
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        self.cap.set(cv2.CAP_PROP_FPS, fps)
+
+    def isOpened(self):
+        return self.cap is not None and self.cap.isOpened()
+
+    def _read(self, out):
+        ok, frame = self.cap.read(out) if out is not None else self.cap.read()
+        return ok, frame, time.monotonic()
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+
+class VideoFileSource(FrameSource):
+    """Recorded video; real-time pacing or as fast as possible, optionally looping.
+
+    Timestamps are media time (seconds from the start of playback), increasing
+    across loops, so results are reproducible regardless of pacing.
+    """
+
+    def __init__(self, path, realtime=True, loop=True):
+        self.cap = cv2.VideoCapture(path)
+        fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        super().__init__(realtime=realtime, fps=fps)
+        self.path = path
+        self.loop = bool(loop)
+        self._frame_index = 0
+
+    def isOpened(self):
+        return self.cap is not None and self.cap.isOpened()
+
+    def _read(self, out):
+        ok, frame = self.cap.read(out) if out is not None else self.cap.read()
+        if not ok and self.loop and self._frame_index > 0:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self.cap.read(out) if out is not None else self.cap.read()
+        if not ok:
+            return False, None, None
+        timestamp = self._frame_index / self.fps
+        self._frame_index += 1
+        return True, frame, timestamp
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+
+class ImageDirectorySource(FrameSource):
+    """Sorted image files from a directory played back as a (looping) stream."""
+
+    def __init__(self, directory, fps=30.0, realtime=True, loop=True):
+        super().__init__(realtime=realtime, fps=fps)
+        self.files = sorted(
+            os.path.join(directory, name) for name in os.listdir(directory)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        self.loop = bool(loop)
+        self._frame_index = 0
+
+    def isOpened(self):
+        return bool(self.files) and (self.loop or self._frame_index < len(self.files))
+
+    def _read(self, out):
+        if not self.isOpened():
+            return False, None, None
+        frame = cv2.imread(self.files[self._frame_index % len(self.files)], cv2.IMREAD_COLOR)
+        if frame is None:
+            return False, None, None
+        timestamp = self._frame_index / self.fps
+        self._frame_index += 1
+        return True, _into(out, frame), timestamp
+
+
+class SyntheticSource(FrameSource):
+    """Generated frames (moving block + frame counter) for benchmarks without a camera.
+
+    Frames are drawn directly into the output buffer, so steady-state reads
+    with `out` do not allocate.
+    """
+
+    def __init__(self, width=640, height=480, fps=30.0, realtime=True, max_frames=None):
+        super().__init__(realtime=realtime, fps=fps)
+        self.shape = (int(height), int(width), 3)
+        self.max_frames = max_frames
+        self._buffer = np.empty(self.shape, dtype=np.uint8)
+        self._frame_index = 0
+
+    def isOpened(self):
+        return self.max_frames is None or self._frame_index < self.max_frames
+
+    def _read(self, out):
+        if not self.isOpened():
+            return False, None, None
+        frame = out if out is not None and out.shape == self.shape else self._buffer
+        h, w = self.shape[:2]
+        t = self._frame_index / self.fps
+        frame[...] = 40
+        x = int((w - 80) * (0.5 + 0.5 * np.sin(t * np.pi)))
+        cv2.rectangle(frame, (x, h // 2 - 40), (x + 80, h // 2 + 40), (0, 200, 255), -1)
+        cv2.putText(frame, f"{self._frame_index:06d}", (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2)
+        self._frame_index += 1
+        return True, frame, t
+
+
+# ============================================================
+# Configuration
+# ============================================================
+
+def _flag(value):
+    return str(value).lower() in ("1", "true", "yes", "on")
+
+
+def create_frame_source(spec=0):
+    """Build a FrameSource from a config value.
+
+    Accepted forms (options go after '?', e.g. "file:clip.mp4?realtime=0&loop=0"):
+        0 / "0" / "webcam:0"             webcam by index (?width=&height=&fps=)
+        "file:path" or an existing file  video file (?realtime=&loop=)
+        "images:dir" or an existing dir  looping image directory (?fps=&realtime=&loop=)
+        "synthetic"                      generated frames (?width=&height=&fps=&realtime=&max_frames=)
+    """
+    if isinstance(spec, FrameSource):
+        return spec
+    if isinstance(spec, int):
+        return WebcamSource(spec)
+
+    spec = str(spec)
+    target, _, query = spec.partition("?")
+    options = dict(parse_qsl(query))
+    kind, sep, arg = target.partition(":")
+    if not sep or kind not in ("webcam", "file", "images", "synthetic"):
+        # Bare value: camera index, directory or file path
+        if target.isdigit():
+            kind, arg = "webcam", target
+        elif os.path.isdir(target):
+            kind, arg = "images", target
+        elif target == "synthetic":
+            kind, arg = "synthetic", ""
+        else:
+            kind, arg = "file", target
+
+    if kind == "webcam":
+        return WebcamSource(
+            int(arg or 0),
+            width=int(options.get("width", 640)),
+            height=int(options.get("height", 480)),
+            fps=float(options.get("fps", 30)),
+        )
+    if kind == "file":
+        return VideoFileSource(arg, realtime=_flag(options.get("realtime", 1)), loop=_flag(options.get("loop", 1)))
+    if kind == "images":
+        return ImageDirectorySource(
+            arg,
+            fps=float(options.get("fps", 30)),
+            realtime=_flag(options.get("realtime", 1)),
+            loop=_flag(options.get("loop", 1)),
+        )
+    max_frames = options.get("max_frames")
+    return SyntheticSource(
+        width=int(options.get("width", 640)),
+        height=int(options.get("height", 480)),
+        fps=float(options.get("fps", 30)),
+        realtime=_flag(options.get("realtime", 1)),
+        max_frames=int(max_frames) if max_frames else None,
+    )
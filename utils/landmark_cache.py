@@ -0,0 +1,161 @@
+"""
+utils/landmark_cache.py
+Content-addressed on-disk cache of per-frame pose landmarks for video files.
+Entries are keyed by the video's SHA-256 plus the detector's model and
+settings, stored as one .npy per video, and evicted least-recently-used once
+the cache exceeds its size budget. A cache hit skips decoding and inference,
+so re-analysis with new analyzer thresholds runs at analyzer speed.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from utils.frame_source import VideoFileSource
+from utils.landmark_filter import NUM_LANDMARKS, FilteredResult, array_to_result, landmarks_to_array
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def detector_signature(model_path, **settings):
+    """Everything about a detector that changes its landmarks: model file contents and settings."""
+    return {"model": os.path.basename(model_path), "model_sha256": file_digest(model_path), **settings}
+
+
+# ============================================================
+# LandmarkCache
+# ============================================================
+
+class LandmarkCache:
+    """Directory of `<key>.npy` landmark arrays with size-bounded LRU eviction.
+
+    Arrays are float32 of shape (frames, num_poses, 33, 4) holding x, y, z and
+    visibility; people not detected in a frame are NaN. Reads are memory-mapped.
+    Recency is the file mtime, refreshed on every hit.
+    """
+
+    def __init__(self, directory=".landmark_cache", max_bytes=2 * 2**30):
+        self.directory = directory
+        self.max_bytes = int(max_bytes)
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(video_digest, signature):
+        payload = json.dumps({"video": video_digest, "detector": signature}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + ".npy")
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            landmarks = np.load(path, mmap_mode="r")
+        except FileNotFoundError:
+            return None
+        except ValueError:  # truncated or foreign file
+            os.remove(path)
+            return None
+        os.utime(path)
+        return landmarks
+
+    def put(self, key, landmarks):
+        path = self.path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, np.ascontiguousarray(landmarks, dtype=np.float32))
+        os.replace(tmp_path, path)  # readers never see a partial entry
+        self.evict(keep=path)
+        return path
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".npy"):
+                path = os.path.join(self.directory, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self, keep=None):
+        """Delete least-recently-used entries until the cache fits in `max_bytes`."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        for _, _, path in self._entries():
+            os.remove(path)
+
+
+# ============================================================
+# Video landmarks
+# ============================================================
+
+def detect_video(path, detector_factory, signature, cache=None, num_poses=1):
+    """Per-frame landmarks for a video file, from `cache` or by running the detector.
+
+    detector_factory: zero-argument callable returning a PoseDetector; only called
+    on a cache miss, so hits do not even load the model.
+    signature: detector_signature(...) / PoseDetector.cache_signature() for the detector.
+    Returns a float32 array of shape (frames, num_poses, 33, 4); see LandmarkCache.
+    """
+    key = None
+    if cache is not None:
+        key = cache.key(file_digest(path), signature)
+        landmarks = cache.get(key)
+        if landmarks is not None:
+            return landmarks
+
+    detector = detector_factory()
+    source = VideoFileSource(path, realtime=False, loop=False)
+    if not source.isOpened():
+        raise FileNotFoundError(f"could not open {path}")
+    frames = []
+    try:
+        while True:
+            ok, frame = source.read()
+            if not ok:
+                break
+            results = detector.detect_landmarks(frame)
+            poses = np.full((num_poses, NUM_LANDMARKS, 4), np.nan, dtype=np.float32)
+            for i, pose in enumerate(results.all_pose_landmarks[:num_poses]):
+                poses[i] = landmarks_to_array(pose)
+            frames.append(poses)
+    finally:
+        source.release()
+
+    landmarks = np.stack(frames) if frames else np.zeros((0, num_poses, NUM_LANDMARKS, 4), dtype=np.float32)
+    if cache is not None:
+        cache.put(key, landmarks)
+    return landmarks
+
+
+def result_from_array(poses):
+    """Detector-like result for one cached frame (num_poses, 33, 4)."""
+    people = [array_to_result(pose).pose_landmarks for pose in poses if not np.isnan(pose[0, 0])]
+    return FilteredResult(people[0] if people else None, people)
@@ -0,0 +1,133 @@
+"""
+utils/landmark_filter.py
+Vectorized One-Euro filter and short-horizon predictor for all pose landmarks.
+Used to smooth the overlay, extrapolate it to display time (hiding inference
+latency) and fill frames where inference was skipped.
+"""
+
+import numpy as np
+
+
+NUM_LANDMARKS = 33
+
+
+# ============================================================
+# Lightweight landmark containers (compatible with PoseDetector)
+# ============================================================
+
+class FilteredLandmark:
+    """Stand-in for a MediaPipe landmark: exposes x, y, z and visibility."""
+
+    __slots__ = ("x", "y", "z", "visibility")
+
+    def __init__(self, x, y, z, visibility):
+        self.x = x
+        self.y = y
+        self.z = z
+        self.visibility = visibility
+
+
+class FilteredResult:
+    """Result object accepted by `draw_skeleton` and `get_keypoints`."""
+
+    def __init__(self, pose_landmarks, all_pose_landmarks=None):
+        self.pose_landmarks = pose_landmarks
+        if all_pose_landmarks is None:
+            all_pose_landmarks = [pose_landmarks] if pose_landmarks else []
+        self.all_pose_landmarks = all_pose_landmarks
+
+
+def landmarks_to_array(pose_landmarks):
+    """Convert a list of landmarks to a (N, 4) array of x, y, z, visibility."""
+    return np.array(
+        [(lm.x, lm.y, lm.z, getattr(lm, "visibility", 1.0) or 0.0) for lm in pose_landmarks],
+        dtype=np.float64,
+    )
+
+
+def array_to_result(arr):
+    """Wrap a (N, 4) landmark array into a FilteredResult."""
+    return FilteredResult([FilteredLandmark(*row) for row in arr.tolist()])
+
+
+# ============================================================
+# One-Euro filter with velocity-based prediction
+# ============================================================
+
+def _smoothing_factor(dt, cutoff):
+    tau = 1.0 / (2.0 * np.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class LandmarkPredictor:
+    """One-Euro filter over every landmark coordinate at once.
+
+    min_cutoff: base cutoff frequency (Hz); lower = smoother when still
+    beta: speed coefficient; higher = less lag during fast motion
+    d_cutoff: cutoff for the velocity estimate (Hz)
+    max_horizon: longest extrapolation in seconds
+    max_age: predictions older than this after the last detection return None
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=5.0, d_cutoff=1.0, max_horizon=0.15, max_age=0.5):
+        self.min_cutoff = float(min_cutoff)
+        self.beta = float(beta)
+        self.d_cutoff = float(d_cutoff)
+        self.max_horizon = float(max_horizon)
+        self.max_age = float(max_age)
+        self.reset()
+
+    def reset(self):
+        self._x = None          # filtered positions (N, 3)
+        self._dx = None         # filtered velocities (N, 3)
+        self._visibility = None
+        self._t = None
+
+    def update(self, landmarks, timestamp):
+        """Feed a (N, 4) landmark array observed at `timestamp` (seconds)."""
+        pos = landmarks[:, :3]
+        if self._x is None or self._t is None or timestamp <= self._t:
+            if self._x is None or self._x.shape != pos.shape:
+                self._x = pos.copy()
+                self._dx = np.zeros_like(pos)
+            else:
+                self._x[...] = pos
+            self._visibility = landmarks[:, 3].copy()
+            self._t = timestamp
+            return self._x
+
+        dt = timestamp - self._t
+        dx = (pos - self._x) / dt
+        a_d = _smoothing_factor(dt, self.d_cutoff)
+        self._dx += a_d * (dx - self._dx)
+        cutoff = self.min_cutoff + self.beta * np.abs(self._dx)
+        a = _smoothing_factor(dt, cutoff)
+        self._x += a * (pos - self._x)
+        self._visibility = landmarks[:, 3].copy()
+        self._t = timestamp
+        return self._x
+
+    def predict(self, timestamp):
+        """Extrapolate filtered landmarks to `timestamp`; returns (N, 4) or None."""
+        if self._x is None:
+            return None
+        age = timestamp - self._t
+        if age > self.max_age:
+            return None
+        horizon = min(max(age, 0.0), self.max_horizon)
+        out = np.empty((self._x.shape[0], 4), dtype=np.float64)
+        out[:, :3] = self._x + self._dx * horizon
+        out[:, 3] = self._visibility
+        return out
+
+    def update_result(self, results, timestamp):
+        """Feed a PoseDetector result; frames without a person are ignored."""
+        if results is not None and results.pose_landmarks:
+            self.update(landmarks_to_array(results.pose_landmarks), timestamp)
+
+    def predict_result(self, timestamp):
+        """Like `predict`, wrapped as a result for `draw_skeleton`."""
+        arr = self.predict(timestamp)
+        if arr is None:
+            return FilteredResult(None)
+        return array_to_result(arr)
@@ -0,0 +1,114 @@
+"""
+utils/latency.py
+Glass-to-glass latency tracing. Every captured frame gets a monotonic ID and a
+capture time; pipeline stages stamp it as it goes through detection, analysis
+and encoding, and clients report back when they displayed it. Distributions
+are kept in fixed-size ring buffers per client and per stage.
+"""
+
+import itertools
+import threading
+import time
+
+import numpy as np
+
+from utils.rep_metrics import RingBuffer
+
+
+STAGES = ("detect", "analyze", "encode")
+
+
+class FrameTrace:
+    """ID, capture time (time.monotonic()) and per-stage completion times of one frame."""
+
+    __slots__ = ("frame_id", "capture_time", "stages")
+
+    def __init__(self, frame_id, capture_time=None):
+        self.frame_id = frame_id
+        self.capture_time = time.monotonic() if capture_time is None else capture_time
+        self.stages = {}
+
+    def mark(self, stage):
+        self.stages[stage] = time.monotonic()
+
+
+def _summary(buffer):
+    values = buffer.values()
+    if values.size == 0:
+        return None
+    p50, p95, p99 = np.percentile(values, (50, 95, 99))
+    return {
+        "count": int(values.size),
+        "mean_ms": round(float(values.mean()), 2),
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "max_ms": round(float(values.max()), 2),
+    }
+
+
+class LatencyTracker:
+    """Collects pipeline stage latencies and per-client capture-to-display latency.
+
+    All times are server `time.monotonic()` seconds; clients convert their
+    display timestamps to the server clock using the `server_time` field of
+    /ws/stats messages. Keeps the last `window` samples per series.
+    """
+
+    def __init__(self, window=1000, max_clients=64):
+        self.window = int(window)
+        self.max_clients = int(max_clients)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._stages = {stage: RingBuffer(self.window) for stage in STAGES}
+        self._clients = {}
+
+    def new_trace(self, capture_time=None):
+        return FrameTrace(next(self._ids), capture_time)
+
+    def record_pipeline(self, trace):
+        """Record how long each stage took after the previous one (capture -> detect -> ...)."""
+        with self._lock:
+            previous = trace.capture_time
+            for stage in STAGES:
+                done = trace.stages.get(stage)
+                if done is None:
+                    continue
+                self._stages[stage].push((done - previous) * 1000.0)
+                previous = done
+
+    def record_display(self, client_id, frame_id, capture_time, display_time):
+        """Record that `client_id` displayed frame `frame_id` at server-clock `display_time`."""
+        latency_ms = (display_time - capture_time) * 1000.0
+        if not 0.0 <= latency_ms < 60_000.0:
+            return  # clock estimate not settled yet, or a bogus report
+        with self._lock:
+            client = self._clients.get(client_id)
+            if client is None:
+                if len(self._clients) >= self.max_clients:
+                    oldest = min(self._clients, key=lambda c: self._clients[c]["last_seen"])
+                    del self._clients[oldest]
+                client = self._clients[client_id] = {"latency": RingBuffer(self.window), "last_seen": 0.0,
+                                                     "last_frame_id": 0}
+            client["latency"].push(latency_ms)
+            client["last_seen"] = time.monotonic()
+            client["last_frame_id"] = max(client["last_frame_id"], int(frame_id))
+
+    def summary(self):
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "pipeline": {stage: _summary(buffer) for stage, buffer in self._stages.items()},
+                "clients": {
+                    client_id: dict(_summary(client["latency"]) or {},
+                                    last_frame_id=client["last_frame_id"],
+                                    idle_s=round(now - client["last_seen"], 1))
+                    for client_id, client in self._clients.items()
+                },
+            }
+
+    def reset(self):
+        with self._lock:
+            for buffer in self._stages.values():
+                buffer.clear()
+            self._clients.clear()
@@ -0,0 +1,137 @@
+"""
+utils/memory_tracker.py
+Process memory introspection for long-running sessions: RSS, Python heap
+(tracemalloc) and GC counters, plus named tracemalloc snapshots that can be
+diffed to list the allocation sites that grew the most in between.
+"""
+
+import gc
+import itertools
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+
+
+def rss_bytes():
+    """Current resident set size of this process (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == "darwin" else rss * 1024  # KiB on Linux
+
+
+# Allocations made by tracemalloc / the import system are noise in a leak report
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+class AllocationTracker:
+    """Named tracemalloc snapshots and top-growth diffs between them.
+
+    Only the last `max_snapshots` snapshots are kept (each holds every live
+    traced allocation, so they are not small). Thread-safe.
+    """
+
+    def __init__(self, max_snapshots=8):
+        self.max_snapshots = int(max(2, max_snapshots))
+        self._snapshots = OrderedDict()  # id -> (info, snapshot)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @property
+    def tracing(self):
+        return tracemalloc.is_tracing()
+
+    def start(self, frames=25):
+        """Start tracing with `frames` stack frames per allocation (no-op if already tracing)."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(int(max(1, frames)))
+        return self.stats()
+
+    def stop(self):
+        """Stop tracing and drop stored snapshots."""
+        with self._lock:
+            self._snapshots.clear()
+        tracemalloc.stop()
+
+    def snapshot(self, label=None):
+        """Take a snapshot; returns its info dict (id, label, time, traced_mb)."""
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc is not running")
+        snap = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        with self._lock:
+            snapshot_id = next(self._ids)
+            info = {
+                "id": snapshot_id,
+                "label": label,
+                "time": time.time(),
+                "traced_mb": round(sum(trace.size for trace in snap.traces) / 2**20, 3),
+            }
+            self._snapshots[snapshot_id] = (info, snap)
+            while len(self._snapshots) > self.max_snapshots:
+                self._snapshots.popitem(last=False)
+        return info
+
+    def snapshots(self):
+        with self._lock:
+            return [info for info, _ in self._snapshots.values()]
+
+    def _get(self, snapshot_id):
+        try:
+            return self._snapshots[snapshot_id][1]
+        except KeyError:
+            raise LookupError(f"unknown snapshot {snapshot_id}") from None
+
+    def diff(self, base=None, current=None, limit=20, group_by="lineno"):
+        """Top allocation sites by growth from snapshot `base` to `current`.
+
+        base defaults to the oldest stored snapshot, current to the newest.
+        group_by: "lineno", "filename" or "traceback".
+        """
+        with self._lock:
+            if len(self._snapshots) < 2 and (base is None or current is None):
+                raise LookupError("need at least two snapshots")
+            ids = list(self._snapshots)
+            base = ids[0] if base is None else base
+            current = ids[-1] if current is None else current
+            old, new = self._get(base), self._get(current)
+        stats = new.compare_to(old, group_by)
+        stats.sort(key=lambda stat: stat.size_diff, reverse=True)
+        return {
+            "base": base,
+            "current": current,
+            "total_diff_kb": round(sum(stat.size_diff for stat in stats) / 1024, 1),
+            "top": [
+                {
+                    "site": str(stat.traceback[0]) if group_by != "traceback" else stat.traceback.format(),
+                    "size_diff_kb": round(stat.size_diff / 1024, 1),
+                    "count_diff": stat.count_diff,
+                    "size_kb": round(stat.size / 1024, 1),
+                    "count": stat.count,
+                }
+                for stat in stats[:int(limit)]
+            ],
+        }
+
+    def stats(self):
+        """RSS, traced heap and GC counters."""
+        current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        return {
+            "rss_mb": round(rss_bytes() / 2**20, 1),
+            "tracing": tracemalloc.is_tracing(),
+            "traced_mb": round(current / 2**20, 3),
+            "traced_peak_mb": round(peak / 2**20, 3),
+            "gc_counts": gc.get_count(),
+            "gc_collections": [generation["collections"] for generation in gc.get_stats()],
+            "snapshots": self.snapshots(),
+        }
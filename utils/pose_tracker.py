@@ -0,0 +1,168 @@
+"""
+utils/pose_tracker.py
+Multi-person tracking: assigns stable track IDs to the poses detected in each
+frame and gives every tracked athlete their own PushUpAnalyzer, or a session
+in a shared BatchPushUpAnalyzer that analyzes all athletes in one step.
+"""
+
+import time
+
+import numpy as np
+
+from utils.exercises import landmarks_to_points
+
+
+# ============================================================
+# Geometry helpers
+# ============================================================
+
+def landmarks_bbox(landmarks, min_visibility=0.3):
+    """Normalized (x1, y1, x2, y2) box around a person's visible landmarks."""
+    pts = np.array(
+        [(lm.x, lm.y) for lm in landmarks if (getattr(lm, "visibility", 1.0) or 0.0) >= min_visibility],
+        dtype=np.float64,
+    )
+    if pts.size == 0:
+        pts = np.array([(lm.x, lm.y) for lm in landmarks], dtype=np.float64)
+    return np.concatenate((pts.min(axis=0), pts.max(axis=0)))
+
+
+def iou_matrix(a, b):
+    """Pairwise IoU between boxes a (N, 4) and b (M, 4)."""
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0.0, None) * np.clip(y2 - y1, 0.0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+# ============================================================
+# PoseTrack / PoseTracker
+# ============================================================
+
+class PoseTrack:
+    """One tracked athlete. Exposes `pose_landmarks` so it can be passed
+    straight to `PoseDetector.draw_skeleton` and `get_keypoints`."""
+
+    def __init__(self, track_id, analyzer, landmarks, bbox, timestamp):
+        self.track_id = track_id
+        self.analyzer = analyzer
+        self.pose_landmarks = landmarks
+        self.bbox = bbox
+        self.last_seen = timestamp
+        self.missed = 0
+        self.analysis = None
+
+    def stats(self):
+        analysis = self.analysis or {}
+        return {
+            "track_id": self.track_id,
+            "total_reps": analysis.get("total_reps", self.analyzer.total_reps),
+            "form_state": analysis.get("form_state", "Neutral"),
+            "stage": analysis.get("stage", self.analyzer.stage),
+            "rep_metrics": analysis.get("rep_metrics"),
+        }
+
+
+class PoseTracker:
+    """Greedy IoU association of detected poses to persistent tracks.
+
+    analyzer_factory: callable returning a fresh PushUpAnalyzer for new tracks
+    iou_threshold: minimum box overlap to continue an existing track
+    max_missed: frames a track may go undetected before it is dropped
+    batch: optional BatchPushUpAnalyzer; when given, each track gets a session in
+        it (instead of calling analyzer_factory) and all tracks seen in a frame
+        are analyzed in one vectorized step
+    """
+
+    def __init__(self, analyzer_factory, iou_threshold=0.2, max_missed=30, batch=None):
+        self.analyzer_factory = analyzer_factory
+        self.iou_threshold = float(iou_threshold)
+        self.max_missed = int(max_missed)
+        self.batch = batch
+        self.tracks = {}
+        self._next_id = 1
+
+    def reset(self):
+        if self.batch is not None:
+            self.batch.clear()
+        self.tracks = {}
+        self._next_id = 1
+
+    def _new_analyzer(self):
+        if self.batch is not None:
+            return self.batch.session(self.batch.add_session())
+        return self.analyzer_factory()
+
+    def _associate(self, det_boxes, track_ids):
+        """Return {detection_index: track_id} by descending IoU."""
+        if not track_ids or det_boxes.shape[0] == 0:
+            return {}
+        track_boxes = np.stack([self.tracks[tid].bbox for tid in track_ids])
+        iou = iou_matrix(det_boxes, track_boxes)
+        pairs = np.argwhere(iou >= self.iou_threshold)
+        order = np.argsort(-iou[pairs[:, 0], pairs[:, 1]])
+        matches, used_tracks = {}, set()
+        for d, t in pairs[order]:
+            if d in matches or t in used_tracks:
+                continue
+            matches[int(d)] = track_ids[t]
+            used_tracks.add(t)
+        return matches
+
+    def update(self, detector, results, frame_width, frame_height, timestamp=None):
+        """Match this frame's poses to tracks and run each track's analyzer.
+
+        Returns the tracks seen in this frame.
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+        detections = getattr(results, "all_pose_landmarks", None)
+        if detections is None:
+            detections = [results.pose_landmarks] if results.pose_landmarks else []
+
+        det_boxes = np.array([landmarks_bbox(lms) for lms in detections], dtype=np.float64).reshape(-1, 4)
+        track_ids = list(self.tracks.keys())
+        matches = self._associate(det_boxes, track_ids)
+
+        seen = []
+        for d, landmarks in enumerate(detections):
+            track_id = matches.get(d)
+            if track_id is None:
+                track_id = self._next_id
+                self._next_id += 1
+                self.tracks[track_id] = PoseTrack(track_id, self._new_analyzer(), landmarks, det_boxes[d], timestamp)
+            track = self.tracks[track_id]
+            track.pose_landmarks = landmarks
+            track.bbox = det_boxes[d]
+            track.last_seen = timestamp
+            track.missed = 0
+            if self.batch is None:
+                keypoints = detector.keypoints_from_landmarks(landmarks, frame_width, frame_height)
+                track.analysis = track.analyzer.analyze_pose(keypoints, timestamp)
+            seen.append(track)
+
+        if self.batch is not None and seen:
+            points = np.stack([landmarks_to_points(track.pose_landmarks, frame_width, frame_height) for track in seen])
+            self.batch.step([track.analyzer.slot for track in seen], points, timestamp)
+            for track in seen:
+                track.analysis = track.analyzer.analysis()
+
+        # Age out tracks that were not matched this frame
+        seen_ids = {track.track_id for track in seen}
+        for track_id in track_ids:
+            if track_id not in seen_ids:
+                track = self.tracks[track_id]
+                track.missed += 1
+                if track.missed > self.max_missed:
+                    if self.batch is not None:
+                        self.batch.remove_session(track.analyzer.slot)
+                    del self.tracks[track_id]
+
+        return seen
+
+    def stats(self):
+        return {track_id: track.stats() for track_id, track in self.tracks.items()}
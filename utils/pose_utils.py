@@ -11,8 +11,13 @@ from mediapipe.tasks import python
 from mediapipe.tasks.python import vision
 import urllib.request
 import os
+import time
 from pathlib import Path
 
+from utils.rep_metrics import RepMetrics
+from utils.rep_timing import TIME_EPSILON, alpha_to_tau, ema_weight, frames_to_seconds
+from utils.landmark_cache import detector_signature
+
 
 # ============================================================
 # Download model if not exists
@@ -28,6 +33,26 @@ def download_pose_model():
     return str(model_path)
 
 
+# ============================================================
+# ResultWrapper: detection result shaped like the old API
+# ============================================================
+
+class ResultWrapper:
+    """PoseLandmarkerResult exposed like the old Solutions API result.
+
+    Defined once at module level: a class statement inside detect_image would
+    build a new type object on every frame.
+    """
+
+    __slots__ = ("pose_landmarks", "all_pose_landmarks", "_raw")
+
+    def __init__(self, detection_result):
+        # Every detected person; pose_landmarks stays the first one for single-person callers
+        self.all_pose_landmarks = list(detection_result.pose_landmarks or [])
+        self.pose_landmarks = self.all_pose_landmarks[0] if self.all_pose_landmarks else None
+        self._raw = detection_result
+
+
 # ============================================================
 # PoseDetector: wraps MediaPipe PoseLandmarker (new Tasks API)
 # ============================================================
@@ -54,14 +79,24 @@ class PoseDetector:
         (23, 25), (25, 27), (24, 26), (26, 28),  # Legs
     ]
     
-    def __init__(self, model_complexity=1, detection_confidence=0.4, tracking_confidence=0.4):
+    def __init__(self, model_complexity=1, detection_confidence=0.4, tracking_confidence=0.4, num_poses=1,
+                 resources=None):
         """Wrapper around MediaPipe PoseLandmarker (new Tasks API).
 
         model_complexity: ignored in new API (using lite model)
         detection_confidence: minimum initial detection confidence
         tracking_confidence: minimum tracking confidence for subsequent frames
+        num_poses: maximum number of people detected per frame
+        resources: SessionResources from utils/resource_governor.py; sets OpenCV's
+            thread count and builds the landmarker pinned to the slot's CPUs
         """
         model_path = download_pose_model()
+        self.model_path = model_path
+        self.settings = {
+            "detection_confidence": float(detection_confidence),
+            "tracking_confidence": float(tracking_confidence),
+            "num_poses": int(max(1, num_poses)),
+        }
         
         base_options = python.BaseOptions(model_asset_path=model_path)
         options = vision.PoseLandmarkerOptions(
@@ -69,25 +104,33 @@ class PoseDetector:
             output_segmentation_masks=False,
             min_pose_detection_confidence=detection_confidence,
             min_tracking_confidence=tracking_confidence,
-            num_poses=1
+            num_poses=int(max(1, num_poses))
         )
-        self.detector = vision.PoseLandmarker.create_from_options(options)
+        self.resources = resources
+        if resources is None:
+            self.detector = vision.PoseLandmarker.create_from_options(options)
+        else:
+            cv2.setNumThreads(resources.threads)
+            with resources.pinned():  # graph threads inherit the affinity they were created with
+                self.detector = vision.PoseLandmarker.create_from_options(options)
         self._last_result = None
 
+    def cache_signature(self):
+        """Model variant and settings that determine this detector's output (see utils/landmark_cache.py)."""
+        return detector_signature(self.model_path, **self.settings)
+
     def detect_landmarks(self, frame):
         """Detect human pose landmarks in a given BGR frame."""
+        return self.detect_image(self.prepare_image(frame))
+
+    def prepare_image(self, frame):
+        """Convert a BGR frame into the MediaPipe image the detector consumes."""
         rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb)
+        return mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb)
+
+    def detect_image(self, mp_image):
+        """Run pose detection on an image from `prepare_image`."""
         result = self.detector.detect(mp_image)
-        
-        # Create a wrapper object similar to old API
-        class ResultWrapper:
-            def __init__(self, detection_result):
-                self.pose_landmarks = None
-                if detection_result.pose_landmarks and len(detection_result.pose_landmarks) > 0:
-                    self.pose_landmarks = detection_result.pose_landmarks[0]
-                self._raw = detection_result
-        
         self._last_result = ResultWrapper(result)
         return self._last_result
 
@@ -125,9 +168,10 @@ class PoseDetector:
         """Return key joint coordinates required for push-up analysis."""
         if not results.pose_landmarks:
             return None
+        return self.keypoints_from_landmarks(results.pose_landmarks, frame_width, frame_height)
 
-        landmarks = results.pose_landmarks
-        
+    def keypoints_from_landmarks(self, landmarks, frame_width, frame_height):
+        """Key joint coordinates from a single person's landmark list."""
         def get_point(idx):
             if idx < len(landmarks):
                 lm = landmarks[idx]
@@ -163,7 +207,11 @@ def calculate_angle(a, b, c):
 
 
 class PushUpAnalyzer:
-    """Analyzes push-up motion with smoothing, hysteresis, and form checks."""
+    """Analyzes push-up motion with smoothing, hysteresis, and form checks.
+
+    Smoothing and the cooldown between reps are in seconds (see utils/rep_timing.py),
+    so results do not depend on the frame rate or on skipped frames.
+    """
 
     def __init__(
         self,
@@ -172,23 +220,36 @@ class PushUpAnalyzer:
         back_tolerance: float = 18.0,
         smoothing_alpha: float = 0.25,
         cooldown_frames: int = 6,
+        metrics_window: int = 10,
+        smoothing_tau: float = None,
+        cooldown_seconds: float = None,
     ):
+        """smoothing_tau: EMA time constant in seconds (0 = no smoothing)
+        cooldown_seconds: minimum time between counted reps
+        smoothing_alpha / cooldown_frames: per-frame equivalents at REFERENCE_FPS,
+            used when the time-based value is not given
+        """
         # thresholds
         self.elbow_down_threshold = float(elbow_down_threshold)
         self.elbow_up_threshold = float(elbow_up_threshold)
         self.back_tolerance = float(back_tolerance)
-        # smoothing (EMA)
-        self.alpha = float(np.clip(smoothing_alpha, 0.0, 1.0))
+        # smoothing (EMA over time)
+        self.smoothing_tau = float(smoothing_tau) if smoothing_tau is not None else alpha_to_tau(smoothing_alpha)
         self.filtered_elbow = None
+        self._last_time = None
         # state
         self.stage = "Up"
         self.bottom_reached = False
         self.total_reps = 0
         self.form_state = "Neutral"
-        self.cooldown_frames = int(max(0, cooldown_frames))
-        self._cooldown = 0
+        self.cooldown_seconds = (max(0.0, float(cooldown_seconds)) if cooldown_seconds is not None
+                                 else frames_to_seconds(cooldown_frames))
+        self._cooldown_until = -np.inf
+        # per-rep metrics over the last `metrics_window` reps
+        self.metrics = RepMetrics(window=metrics_window)
 
-    def set_params(self, elbow_down_threshold=None, elbow_up_threshold=None, back_tolerance=None, smoothing_alpha=None, cooldown_frames=None):
+    def set_params(self, elbow_down_threshold=None, elbow_up_threshold=None, back_tolerance=None, smoothing_alpha=None,
+                   cooldown_frames=None, smoothing_tau=None, cooldown_seconds=None):
         if elbow_down_threshold is not None:
             self.elbow_down_threshold = float(elbow_down_threshold)
         if elbow_up_threshold is not None:
@@ -196,31 +257,43 @@ class PushUpAnalyzer:
         if back_tolerance is not None:
             self.back_tolerance = float(back_tolerance)
         if smoothing_alpha is not None:
-            self.alpha = float(np.clip(smoothing_alpha, 0.0, 1.0))
+            self.smoothing_tau = alpha_to_tau(smoothing_alpha)
+        if smoothing_tau is not None:
+            self.smoothing_tau = float(smoothing_tau)
         if cooldown_frames is not None:
-            self.cooldown_frames = int(max(0, cooldown_frames))
+            self.cooldown_seconds = frames_to_seconds(cooldown_frames)
+        if cooldown_seconds is not None:
+            self.cooldown_seconds = max(0.0, float(cooldown_seconds))
 
     def reset(self):
         """Reset all counters and state to initial values"""
         self.filtered_elbow = None
+        self._last_time = None
         self.stage = "Up"
         self.bottom_reached = False
         self.total_reps = 0
         self.form_state = "Neutral"
-        self._cooldown = 0
+        self._cooldown_until = -np.inf
+        self.metrics.reset()
 
-    def _ema(self, value: float) -> float:
+    def _ema(self, value: float, timestamp: float) -> float:
         if self.filtered_elbow is None:
             self.filtered_elbow = value
-            return value
-        self.filtered_elbow = self.alpha * value + (1.0 - self.alpha) * self.filtered_elbow
+        else:
+            weight = ema_weight(timestamp - self._last_time, self.smoothing_tau)
+            self.filtered_elbow = weight * value + (1.0 - weight) * self.filtered_elbow
+        self._last_time = timestamp
         return self.filtered_elbow
 
-    def analyze_pose(self, keypoints):
+    def analyze_pose(self, keypoints, timestamp=None):
         """Analyze push-up form, stage, rep counting, and progress.
 
-        Returns dict with: stage, total_reps, form_state, elbow_angle, back_angle, progress
+        timestamp: frame time in seconds (defaults to time.monotonic()), used for rep tempo.
+        Returns dict with: stage, total_reps, form_state, elbow_angle, back_angle, progress, rep_metrics
         """
+        if timestamp is None:
+            timestamp = time.monotonic()
+
         if keypoints is None:
             # No person detected in frame
             return {
@@ -230,6 +303,7 @@ class PushUpAnalyzer:
                 "elbow_angle": None,
                 "back_angle": None,
                 "progress": 0.0,
+                "rep_metrics": self.metrics.snapshot(),
             }
 
         # Calculate elbow and hip angles (both sides)
@@ -238,17 +312,32 @@ class PushUpAnalyzer:
         left_hip = calculate_angle(keypoints['left_shoulder'], keypoints['left_hip'], keypoints['left_knee'])
         right_hip = calculate_angle(keypoints['right_shoulder'], keypoints['right_hip'], keypoints['right_knee'])
 
-        # Use the minimum elbow angle to ensure both arms bend adequately
-        raw_elbow = float(min(left_elbow, right_elbow))
-        elbow_angle = self._ema(raw_elbow)
-        back_angle = float(np.mean([left_hip, right_hip]))
-
         # Calculate body orientation to detect actual push-up position
         shoulder_y = (keypoints['left_shoulder'][1] + keypoints['right_shoulder'][1]) / 2
         hip_y = (keypoints['left_hip'][1] + keypoints['right_hip'][1]) / 2
         wrist_y = (keypoints['left_wrist'][1] + keypoints['right_wrist'][1]) / 2
         knee_y = (keypoints['left_knee'][1] + keypoints['right_knee'][1]) / 2
-        
+
+        return self.analyze_angles(
+            left_elbow, right_elbow, left_hip, right_hip,
+            shoulder_y, hip_y, wrist_y, knee_y, timestamp,
+        )
+
+    def analyze_angles(self, left_elbow, right_elbow, left_hip, right_hip,
+                       shoulder_y, hip_y, wrist_y, knee_y, timestamp=None):
+        """Core of `analyze_pose`, driven by precomputed joint angles and body-part heights.
+
+        Lets a shared feature pass (see utils/exercises.py) feed the analyzer without
+        recomputing angles from keypoints.
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+
+        # Use the minimum elbow angle to ensure both arms bend adequately
+        raw_elbow = float(min(left_elbow, right_elbow))
+        elbow_angle = self._ema(raw_elbow, timestamp)
+        back_angle = float(np.mean([left_hip, right_hip]))
+
         body_horizontal = abs(shoulder_y - hip_y) < 100
         hands_on_ground = wrist_y > shoulder_y + 50
         legs_extended = knee_y >= hip_y - 50
@@ -277,9 +366,6 @@ class PushUpAnalyzer:
         progress = np.clip((self.elbow_up_threshold - elbow_angle) / denom, 0.0, 1.0)
 
         # Rep state machine with hysteresis + cooldown
-        if self._cooldown > 0:
-            self._cooldown -= 1
-
         mid_threshold = (self.elbow_down_threshold + self.elbow_up_threshold) / 2
         
         if not in_pushup_position:
@@ -293,17 +379,20 @@ class PushUpAnalyzer:
                 self.bottom_reached
                 and elbow_angle >= self.elbow_up_threshold
                 and good_back
-                and self._cooldown == 0
+                and timestamp + TIME_EPSILON >= self._cooldown_until
             ):
                 self.stage = "Up"
                 self.total_reps += 1
                 self.bottom_reached = False
-                self._cooldown = self.cooldown_frames
+                self._cooldown_until = timestamp + self.cooldown_seconds
+                self.metrics.complete_rep(timestamp)
             elif elbow_angle <= mid_threshold:
                 self.stage = "Down"
             elif elbow_angle >= self.elbow_up_threshold - 10:
                 self.stage = "Up"
 
+            self.metrics.update(timestamp, elbow_angle, back_angle, elbow_angle >= self.elbow_up_threshold)
+
         return {
             "stage": self.stage,
             "total_reps": self.total_reps,
@@ -311,6 +400,7 @@ class PushUpAnalyzer:
             "elbow_angle": round(float(elbow_angle), 1),
             "back_angle": round(float(back_angle), 1),
             "progress": float(progress),
+            "rep_metrics": self.metrics.snapshot(),
             "debug": {
                 "left_elbow": round(float(left_elbow), 1),
                 "right_elbow": round(float(right_elbow), 1),
@@ -0,0 +1,172 @@
+"""
+utils/qos.py
+Runtime quality-of-service control. Watches how long frames take through the
+pipeline and how busy the CPU is, and steps through a fixed ladder of
+degradation levels: viewer JPEG quality and scale first, then the skeleton
+overlay, then inference resolution, and inference rate last, so rep counting
+keeps up in real time while video quality gives way. Levels are restored one
+at a time once load has stayed low for a while.
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+
+from utils.rep_metrics import RingBuffer
+
+
+# ============================================================
+# Degradation ladder
+# ============================================================
+
+# Each level is the full set of knobs; later levels keep the earlier degradations
+QOS_LEVELS = (
+    {"jpeg_quality": 85, "jpeg_scale": 1.0, "overlay": True, "inference_scale": 1.0, "inference_every": 1},
+    {"jpeg_quality": 70, "jpeg_scale": 1.0, "overlay": True, "inference_scale": 1.0, "inference_every": 1},
+    {"jpeg_quality": 60, "jpeg_scale": 0.75, "overlay": True, "inference_scale": 1.0, "inference_every": 1},
+    {"jpeg_quality": 50, "jpeg_scale": 0.5, "overlay": True, "inference_scale": 1.0, "inference_every": 1},
+    {"jpeg_quality": 50, "jpeg_scale": 0.5, "overlay": False, "inference_scale": 1.0, "inference_every": 1},
+    {"jpeg_quality": 50, "jpeg_scale": 0.5, "overlay": False, "inference_scale": 0.75, "inference_every": 1},
+    {"jpeg_quality": 50, "jpeg_scale": 0.5, "overlay": False, "inference_scale": 0.5, "inference_every": 1},
+    {"jpeg_quality": 50, "jpeg_scale": 0.5, "overlay": False, "inference_scale": 0.5, "inference_every": 2},
+    {"jpeg_quality": 50, "jpeg_scale": 0.5, "overlay": False, "inference_scale": 0.5, "inference_every": 3},
+)
+
+
+# ============================================================
+# CPU usage
+# ============================================================
+
+class CpuMonitor:
+    """System-wide CPU utilization (0..1) between successive `sample()` calls.
+
+    Reads /proc/stat; elsewhere falls back to the 1-minute load average per core.
+    """
+
+    def __init__(self):
+        self._last = self._read()
+
+    @staticmethod
+    def _read():
+        try:
+            with open("/proc/stat") as f:
+                fields = [int(v) for v in f.readline().split()[1:]]
+        except (OSError, ValueError):
+            return None
+        idle = fields[3] + (fields[4] if len(fields) > 4 else 0)  # idle + iowait
+        return sum(fields), idle
+
+    def sample(self):
+        current = self._read()
+        if current is None or self._last is None:
+            try:
+                return min(1.0, os.getloadavg()[0] / (os.cpu_count() or 1))
+            except (AttributeError, OSError):
+                return 0.0
+        total, idle = current[0] - self._last[0], current[1] - self._last[1]
+        self._last = current
+        return 1.0 - idle / total if total > 0 else 0.0
+
+
+# ============================================================
+# QosController
+# ============================================================
+
+class QosController:
+    """Chooses a QOS_LEVELS entry from frame latency and CPU headroom.
+
+    frame_budget_ms: time one frame may spend from capture to encoded (1000 / target fps)
+    cpu_high / cpu_low: CPU utilization that counts as overloaded / as headroom
+    interval: seconds between decisions; each decision moves at most one level
+    restore_after: consecutive healthy decisions needed before restoring a level
+    Feed every frame's FrameTrace to `observe`; read knobs from `settings`.
+    """
+
+    def __init__(self, frame_budget_ms=33.0, cpu_high=0.9, cpu_low=0.6, interval=1.0, restore_after=5,
+                 restore_ratio=0.6, window=120, levels=QOS_LEVELS):
+        self.levels = levels
+        self.frame_budget_ms = float(frame_budget_ms)
+        self.cpu_high = float(cpu_high)
+        self.cpu_low = float(cpu_low)
+        self.interval = float(interval)
+        self.restore_after = int(max(1, restore_after))
+        self.restore_ratio = float(restore_ratio)
+        self.level = 0
+        self.pinned = None
+        self.cpu = 0.0
+        self.frame_p90_ms = None
+        self.changes = []
+        self._frame_ms = RingBuffer(window)
+        self._healthy = 0
+        self._last_decision = None
+        self._cpu_monitor = CpuMonitor()
+        self._lock = threading.Lock()
+
+    @property
+    def settings(self):
+        return self.levels[self.level]
+
+    def pin(self, level=None):
+        """Hold a fixed level (None resumes automatic control)."""
+        with self._lock:
+            if level is None:
+                self.pinned = None
+                return
+            self.pinned = int(np.clip(level, 0, len(self.levels) - 1))
+            self._set_level(self.pinned, "pinned")
+
+    def observe(self, trace, now=None):
+        """Record one finished frame and, once per `interval`, decide whether to change level."""
+        if not trace.stages:
+            return
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._frame_ms.push((max(trace.stages.values()) - trace.capture_time) * 1000.0)
+            if self._last_decision is None:
+                self._last_decision = now
+            elif now - self._last_decision >= self.interval:
+                self._last_decision = now
+                self._decide()
+
+    def _decide(self):
+        self.cpu = self._cpu_monitor.sample()
+        values = self._frame_ms.values()
+        self.frame_p90_ms = float(np.percentile(values, 90)) if values.size else None
+        if self.pinned is not None or self.frame_p90_ms is None:
+            return
+        slow = self.frame_p90_ms > self.frame_budget_ms
+        if slow or self.cpu > self.cpu_high:
+            self._healthy = 0
+            if self.level < len(self.levels) - 1:
+                reason = f"p90 {self.frame_p90_ms:.0f}ms" if slow else f"cpu {self.cpu:.0%}"
+                self._set_level(self.level + 1, reason)
+        elif self.frame_p90_ms < self.frame_budget_ms * self.restore_ratio and self.cpu < self.cpu_low:
+            self._healthy += 1
+            if self._healthy >= self.restore_after and self.level > 0:
+                self._set_level(self.level - 1, "recovered")
+        else:
+            self._healthy = 0
+
+    def _set_level(self, level, reason):
+        if level == self.level:
+            return
+        self.changes.append({"time": time.time(), "from": self.level, "to": level, "reason": reason})
+        del self.changes[:-20]
+        self.level = level
+        self._healthy = 0
+        self._frame_ms.clear()  # judge the new level on its own frames
+
+    def status(self):
+        with self._lock:
+            return {
+                "level": self.level,
+                "max_level": len(self.levels) - 1,
+                "pinned": self.pinned is not None,
+                "settings": dict(self.settings),
+                "frame_p90_ms": None if self.frame_p90_ms is None else round(self.frame_p90_ms, 1),
+                "frame_budget_ms": self.frame_budget_ms,
+                "cpu": round(self.cpu, 3),
+                "changes": list(self.changes),
+            }
@@ -0,0 +1,359 @@
+"""
+utils/remote_inference.py
+Remote pose inference over TCP: a length-prefixed binary protocol, a worker
+server that wraps PoseDetector, and a client-side pool with pipelining,
+connection reuse, timeouts and least-loaded routing.
+
+Wire format (all integers big-endian):
+    header  = msg_type (u8) | request_id (u32) | payload_length (u32)
+    DETECT  payload: JPEG-encoded BGR frame
+    RESULT  payload: num_poses (u16) | num_poses * 33 * 4 float32 (x, y, z, visibility)
+    ERROR   payload: UTF-8 message
+Requests on one connection may be pipelined; responses carry the request_id.
+
+Pipelining and least-loaded routing pay off when several frames are in flight
+at once. The backend keeps up to `max_in_flight` frames of one camera at the
+workers (RemotePoseDetector.submit / result) and applies the results in frame
+order, so one camera's fps scales with the number of workers. Several backends
+or cameras can also share a pool.
+"""
+
+import socket
+import socketserver
+import struct
+import threading
+import time
+from concurrent.futures import Future
+
+import cv2
+import numpy as np
+
+from utils.landmark_filter import landmarks_to_array, FilteredLandmark
+from utils.pose_utils import PoseDetector
+
+
+HEADER = struct.Struct("!BII")
+COUNT = struct.Struct("!H")
+MSG_DETECT = 1
+MSG_RESULT = 2
+MSG_ERROR = 3
+LANDMARK_DTYPE = np.dtype("<f4")
+NUM_LANDMARKS = 33
+
+
+# ============================================================
+# Framing helpers
+# ============================================================
+
+def _recv_exact(sock, n):
+    buf = bytearray(n)
+    view = memoryview(buf)
+    got = 0
+    while got < n:
+        chunk = sock.recv_into(view[got:], n - got)
+        if chunk == 0:
+            raise ConnectionError("connection closed by peer")
+        got += chunk
+    return buf
+
+
+def send_message(sock, msg_type, request_id, payload):
+    sock.sendall(HEADER.pack(msg_type, request_id, len(payload)) + payload)
+
+
+def recv_message(sock):
+    msg_type, request_id, length = HEADER.unpack(_recv_exact(sock, HEADER.size))
+    return msg_type, request_id, bytes(_recv_exact(sock, length)) if length else b""
+
+
+def encode_poses(all_pose_landmarks):
+    arrays = [landmarks_to_array(lms).astype(LANDMARK_DTYPE) for lms in all_pose_landmarks]
+    return COUNT.pack(len(arrays)) + b"".join(arr.tobytes() for arr in arrays)
+
+
+def decode_poses(payload):
+    (count,) = COUNT.unpack_from(payload)
+    data = np.frombuffer(payload, dtype=LANDMARK_DTYPE, offset=COUNT.size)
+    return data.reshape(count, NUM_LANDMARKS, 4)
+
+
+# ============================================================
+# Worker server
+# ============================================================
+
+class _WorkerHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        sock = self.request
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        while True:
+            try:
+                msg_type, request_id, payload = recv_message(sock)
+            except (ConnectionError, OSError):
+                return
+            if msg_type != MSG_DETECT:
+                send_message(sock, MSG_ERROR, request_id, b"unsupported message type")
+                continue
+            try:
+                frame = cv2.imdecode(np.frombuffer(payload, dtype=np.uint8), cv2.IMREAD_COLOR)
+                if frame is None:
+                    raise ValueError("could not decode frame")
+                with self.server.detector_lock:
+                    result = self.server.detector.detect_landmarks(frame)
+                reply = encode_poses(getattr(result, "all_pose_landmarks", None) or
+                                     ([result.pose_landmarks] if result.pose_landmarks else []))
+                send_message(sock, MSG_RESULT, request_id, reply)
+            except (ConnectionError, OSError):
+                return
+            except Exception as e:
+                send_message(sock, MSG_ERROR, request_id, str(e).encode("utf-8"))
+
+
+class InferenceWorkerServer(socketserver.ThreadingTCPServer):
+    """TCP server running `detector.detect_landmarks` for remote clients.
+
+    One detector per worker process; requests from all connections are
+    serialized on it. Run one worker per core/GPU to scale out.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, detector, host="0.0.0.0", port=9000):
+        self.detector = detector
+        self.detector_lock = threading.Lock()
+        super().__init__((host, port), _WorkerHandler)
+
+
+# ============================================================
+# Client pool
+# ============================================================
+
+class RemoteResult:
+    """Result object compatible with PoseDetector.detect_landmarks output."""
+
+    def __init__(self, poses):
+        self.all_pose_landmarks = [[FilteredLandmark(*row) for row in pose.tolist()] for pose in poses]
+        self.pose_landmarks = self.all_pose_landmarks[0] if self.all_pose_landmarks else None
+
+
+class WorkerConnection:
+    """One persistent, pipelined connection to an inference worker."""
+
+    def __init__(self, host, port, connect_timeout=2.0):
+        self.address = (host, port)
+        self.sock = socket.create_connection(self.address, timeout=connect_timeout)
+        self.sock.settimeout(None)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._send_lock = threading.Lock()
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._next_id = 0
+        self.alive = True
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+
+    @property
+    def in_flight(self):
+        return len(self._pending)
+
+    def submit(self, payload):
+        future = Future()
+        with self._pending_lock:
+            self._next_id = (self._next_id + 1) & 0xFFFFFFFF
+            request_id = self._next_id
+            self._pending[request_id] = future
+        future.add_done_callback(lambda f, rid=request_id: self._forget(rid) if f.cancelled() else None)
+        try:
+            with self._send_lock:
+                send_message(self.sock, MSG_DETECT, request_id, payload)
+        except OSError as e:
+            self._fail_all(ConnectionError(f"send to {self.address} failed: {e}"))
+        return future
+
+    def _forget(self, request_id):
+        with self._pending_lock:
+            self._pending.pop(request_id, None)
+
+    def _read_loop(self):
+        try:
+            while True:
+                msg_type, request_id, payload = recv_message(self.sock)
+                with self._pending_lock:
+                    future = self._pending.pop(request_id, None)
+                if future is None or not future.set_running_or_notify_cancel():
+                    continue
+                if msg_type != MSG_RESULT:
+                    future.set_exception(RuntimeError(payload.decode("utf-8", "replace")))
+                    continue
+                try:
+                    poses = decode_poses(payload)
+                except (ValueError, struct.error) as e:
+                    # Framing is intact (length-prefixed), so only this request fails
+                    future.set_exception(RuntimeError(f"malformed result from {self.address}: {e}"))
+                    continue
+                future.set_result(RemoteResult(poses))
+        except (ConnectionError, OSError) as e:
+            self._fail_all(ConnectionError(f"connection to {self.address} lost: {e}"))
+        except Exception as e:
+            # Never leave the connection marked alive without a reader
+            self._fail_all(ConnectionError(f"reader for {self.address} failed: {e}"))
+
+    def _fail_all(self, error):
+        self.alive = False
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if future.set_running_or_notify_cancel():
+                future.set_exception(error)
+        self.close()
+
+    def close(self):
+        self.alive = False
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class InferencePool:
+    """Routes frames to the least-loaded of several inference workers.
+
+    addresses: list of (host, port) or "host:port" strings
+    connections_per_worker: persistent connections opened to each worker
+    max_in_flight: pipelining depth per connection before it counts as busy
+    timeout: default seconds to wait for a result
+    retry_interval: seconds before reconnecting to a failed worker
+    """
+
+    def __init__(self, addresses, connections_per_worker=1, max_in_flight=4, timeout=1.0,
+                 connect_timeout=2.0, retry_interval=2.0, jpeg_quality=90):
+        self.addresses = [_parse_address(a) for a in addresses]
+        self.connections_per_worker = int(max(1, connections_per_worker))
+        self.max_in_flight = int(max(1, max_in_flight))
+        self.timeout = float(timeout)
+        self.connect_timeout = float(connect_timeout)
+        self.retry_interval = float(retry_interval)
+        self.jpeg_quality = int(jpeg_quality)
+        self._lock = threading.Lock()
+        self._slots = [(addr, i) for addr in self.addresses for i in range(self.connections_per_worker)]
+        self._connections = {}
+        self._retry_at = {}
+
+    def _connection(self, slot):
+        conn = self._connections.get(slot)
+        if conn is not None and conn.alive:
+            return conn
+        if time.monotonic() < self._retry_at.get(slot, 0.0):
+            return None
+        try:
+            conn = WorkerConnection(*slot[0], connect_timeout=self.connect_timeout)
+        except OSError as e:
+            print(f"[InferencePool] Worker {slot[0][0]}:{slot[0][1]} unavailable: {e}")
+            self._retry_at[slot] = time.monotonic() + self.retry_interval
+            return None
+        self._connections[slot] = conn
+        return conn
+
+    def _pick(self):
+        with self._lock:
+            live = [c for c in (self._connection(slot) for slot in self._slots) if c is not None]
+        if not live:
+            raise ConnectionError("no inference workers available")
+        return min(live, key=lambda c: c.in_flight)
+
+    def submit(self, frame):
+        """Send a BGR frame to the least-loaded worker; returns a Future of RemoteResult."""
+        ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if not ok:
+            raise ValueError("could not encode frame")
+        return self._pick().submit(buf.tobytes())
+
+    def detect(self, frame, timeout=None):
+        """Blocking single-frame inference with a timeout."""
+        future = self.submit(frame)
+        try:
+            return future.result(timeout=self.timeout if timeout is None else timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def busy(self):
+        """True when every connection has reached max_in_flight."""
+        with self._lock:
+            conns = [c for c in self._connections.values() if c.alive]
+        return bool(conns) and all(c.in_flight >= self.max_in_flight for c in conns)
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections.values():
+                conn.close()
+            self._connections.clear()
+
+
+def _parse_address(address):
+    if isinstance(address, str):
+        host, _, port = address.rpartition(":")
+        return (host or "127.0.0.1", int(port))
+    return (address[0], int(address[1]))
+
+
+# ============================================================
+# RemotePoseDetector: drop-in PoseDetector backed by a pool
+# ============================================================
+
+class RemotePoseDetector(PoseDetector):
+    """PoseDetector whose detection runs on remote workers.
+
+    Drawing and keypoint helpers are inherited unchanged, and `detect_image`
+    and `cache_signature` work as on a local detector. On timeout or when no
+    worker is reachable the frame is treated as having no person.
+    `detect_landmarks` blocks for its own frame; `submit` and `result` let a
+    caller keep up to `max_in_flight` frames at the workers.
+
+    settings: detection settings the workers run with (part of `cache_signature`)
+    """
+
+    def __init__(self, pool, timeout=None, settings=None):
+        self.pool = pool
+        self.timeout = timeout
+        self.model_path = None  # the model lives on the workers
+        self.settings = dict(settings or {})
+        self.resources = None
+        self.detector = None
+        self._last_result = None
+
+    @property
+    def max_in_flight(self):
+        return self.pool.max_in_flight
+
+    def cache_signature(self):
+        """Workers and settings that determine this detector's output (see utils/landmark_cache.py)."""
+        workers = sorted(f"{host}:{port}" for host, port in self.pool.addresses)
+        return {"model": "remote", "workers": workers, **self.settings}
+
+    def detect_landmarks(self, frame):
+        return self.result(self.submit(frame))
+
+    def detect_image(self, mp_image):
+        """Run pose detection on an image from `prepare_image`."""
+        return self.detect_landmarks(cv2.cvtColor(mp_image.numpy_view(), cv2.COLOR_RGB2BGR))
+
+    def submit(self, frame):
+        """Send a BGR frame to the least-loaded worker without waiting; pass the Future to `result`."""
+        try:
+            return self.pool.submit(frame)
+        except (ConnectionError, ValueError) as e:
+            future = Future()
+            future.set_exception(e)
+            return future
+
+    def result(self, future):
+        """Pose results of a `submit`ted frame; no person on timeout or failure."""
+        try:
+            self._last_result = future.result(timeout=self.pool.timeout if self.timeout is None else self.timeout)
+        except (TimeoutError, ConnectionError, RuntimeError, ValueError) as e:
+            future.cancel()
+            print(f"[RemotePoseDetector] Inference failed: {e or type(e).__name__}")
+            self._last_result = RemoteResult(np.zeros((0, NUM_LANDMARKS, 4), dtype=LANDMARK_DTYPE))
+        return self._last_result
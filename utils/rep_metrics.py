@@ -0,0 +1,136 @@
+"""
+utils/rep_metrics.py
+Incremental per-rep metrics backed by fixed-size NumPy ring buffers.
+Memory stays constant no matter how long a session runs.
+"""
+
+import numpy as np
+
+
+# ============================================================
+# RingBuffer: fixed-capacity float buffer with O(1) mean
+# ============================================================
+
+class RingBuffer:
+    """Fixed-capacity float64 ring buffer with a running sum.
+
+    Pushing overwrites the oldest value once full, and the sum is updated
+    in place, so `mean()` never iterates over the stored values.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = int(max(1, capacity))
+        self._data = np.zeros(self.capacity, dtype=np.float64)
+        self._head = 0
+        self._count = 0
+        self._sum = 0.0
+
+    def __len__(self):
+        return self._count
+
+    def push(self, value: float):
+        value = float(value)
+        if self._count == self.capacity:
+            self._sum -= self._data[self._head]
+        else:
+            self._count += 1
+        self._data[self._head] = value
+        self._sum += value
+        self._head = (self._head + 1) % self.capacity
+
+    def last(self):
+        if self._count == 0:
+            return None
+        return float(self._data[(self._head - 1) % self.capacity])
+
+    def mean(self):
+        if self._count == 0:
+            return None
+        return self._sum / self._count
+
+    def values(self):
+        """Return stored values oldest-first (a copy, for inspection only)."""
+        if self._count < self.capacity:
+            return self._data[:self._count].copy()
+        return np.roll(self._data, -self._head)
+
+    def clear(self):
+        self._data.fill(0.0)
+        self._head = 0
+        self._count = 0
+        self._sum = 0.0
+
+
+# ============================================================
+# RepMetrics: per-rep duration, tempo, depth and back deviation
+# ============================================================
+
+class RepMetrics:
+    """Tracks the rep in progress and keeps the last `window` completed reps.
+
+    Call `update()` once per analyzed frame and `complete_rep()` when the
+    analyzer counts a rep. Every call is O(1) and allocation-free.
+    """
+
+    FIELDS = ("duration", "eccentric", "concentric", "depth", "back_deviation")
+
+    def __init__(self, window: int = 10):
+        self.window = int(max(1, window))
+        self._buffers = {name: RingBuffer(self.window) for name in self.FIELDS}
+        self._reset_current()
+
+    def _reset_current(self):
+        self._rep_start = None
+        self._bottom_time = None
+        self._min_elbow = None
+        self._max_back_dev = 0.0
+
+    def reset(self):
+        for buf in self._buffers.values():
+            buf.clear()
+        self._reset_current()
+
+    def update(self, timestamp: float, elbow_angle: float, back_angle: float, at_top: bool):
+        """Feed one frame. `at_top` marks frames where the arms are extended."""
+        if at_top:
+            # Still at the top: the next descent starts from the latest top frame.
+            self._rep_start = timestamp
+            self._bottom_time = None
+            self._min_elbow = None
+            self._max_back_dev = 0.0
+            return
+        if self._rep_start is None:
+            return
+        if self._min_elbow is None or elbow_angle < self._min_elbow:
+            self._min_elbow = elbow_angle
+            self._bottom_time = timestamp
+        back_dev = abs(180.0 - back_angle)
+        if back_dev > self._max_back_dev:
+            self._max_back_dev = back_dev
+
+    def complete_rep(self, timestamp: float):
+        """Close the rep in progress at `timestamp` and record its metrics."""
+        if self._rep_start is not None and self._bottom_time is not None:
+            self._buffers["duration"].push(timestamp - self._rep_start)
+            self._buffers["eccentric"].push(self._bottom_time - self._rep_start)
+            self._buffers["concentric"].push(timestamp - self._bottom_time)
+            self._buffers["depth"].push(self._min_elbow)
+            self._buffers["back_deviation"].push(self._max_back_dev)
+        self._rep_start = timestamp
+        self._bottom_time = None
+        self._min_elbow = None
+        self._max_back_dev = 0.0
+
+    def snapshot(self):
+        """Return the last rep's metrics and rolling averages over the window."""
+        last = {name: _round(buf.last()) for name, buf in self._buffers.items()}
+        average = {name: _round(buf.mean()) for name, buf in self._buffers.items()}
+        return {
+            "last_rep": last,
+            "average": average,
+            "window": len(self._buffers["duration"]),
+        }
+
+
+def _round(value, ndigits=3):
+    return None if value is None else round(float(value), ndigits)
@@ -0,0 +1,200 @@
+"""
+utils/rep_segmentation.py
+Offline push-up rep segmentation over a whole recorded elbow-angle series.
+Everything runs as NumPy array operations, so a full session is processed in
+a few milliseconds instead of replaying PushUpAnalyzer frame by frame.
+"""
+
+import numpy as np
+
+
+# MediaPipe landmark indices (shoulder, elbow, wrist) for each arm
+LEFT_ARM = (11, 13, 15)
+RIGHT_ARM = (12, 14, 16)
+
+
+# ============================================================
+# Vectorized angle helpers
+# ============================================================
+
+def batch_calculate_angle(a, b, c):
+    """Vectorized `calculate_angle`: angle at b (degrees) for arrays of shape (..., 2)."""
+    a, b, c = np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64), np.asarray(c, dtype=np.float64)
+    ba, bc = a - b, c - b
+    dot = np.sum(ba * bc, axis=-1)
+    norms = np.linalg.norm(ba, axis=-1) * np.linalg.norm(bc, axis=-1) + 1e-6
+    return np.degrees(np.arccos(np.clip(dot / norms, -1.0, 1.0)))
+
+
+def elbow_angles_from_landmarks(landmarks):
+    """Minimum of both elbow angles per frame.
+
+    landmarks: array of shape (T, 33, >=2) in pixel coordinates; frames without a
+    detected person may be NaN and stay NaN in the output.
+    """
+    pts = np.asarray(landmarks, dtype=np.float64)[..., :2]
+    left = batch_calculate_angle(pts[:, LEFT_ARM[0]], pts[:, LEFT_ARM[1]], pts[:, LEFT_ARM[2]])
+    right = batch_calculate_angle(pts[:, RIGHT_ARM[0]], pts[:, RIGHT_ARM[1]], pts[:, RIGHT_ARM[2]])
+    return np.fmin(left, right)
+
+
+# ============================================================
+# Signal conditioning
+# ============================================================
+
+def _fill_gaps(x):
+    """Linearly interpolate NaN gaps (missing detections)."""
+    x = np.asarray(x, dtype=np.float64).copy()
+    missing = np.isnan(x)
+    if missing.all():
+        return x
+    if missing.any():
+        idx = np.arange(x.size)
+        x[missing] = np.interp(idx[missing], idx[~missing], x[~missing])
+    return x
+
+
+def smooth_series(x, window: int):
+    """Centered moving average with edge padding (window forced odd)."""
+    window = int(max(1, window)) | 1
+    if window == 1 or x.size == 0:
+        return x.copy()
+    half = window // 2
+    padded = np.concatenate((np.full(half, x[0]), x, np.full(half, x[-1])))
+    csum = np.cumsum(np.concatenate(([0.0], padded)))
+    return (csum[window:] - csum[:-window]) / window
+
+
+def _runs(zone):
+    """Collapse the non-zero entries of `zone` into runs of equal value.
+
+    Returns (values, first_index, last_index) arrays, one entry per run.
+    """
+    nz = np.flatnonzero(zone)
+    if nz.size == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty
+    vals = zone[nz]
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(vals)) + 1))
+    ends = np.concatenate((starts[1:] - 1, [nz.size - 1]))
+    return vals[starts], nz[starts], nz[ends]
+
+
+# ============================================================
+# Rep segmentation
+# ============================================================
+
+def segment_reps(
+    elbow_angles,
+    timestamps=None,
+    fps: float = 30.0,
+    down_threshold: float = 90.0,
+    up_threshold: float = 160.0,
+    smoothing_seconds: float = 0.2,
+    min_duration: float = 0.4,
+    margin_scale: float = 10.0,
+    noise_scale: float = 5.0,
+):
+    """Detect push-up reps in a full elbow-angle series.
+
+    A rep is a top (angle >= up_threshold) -> bottom (angle <= down_threshold)
+    -> top sequence in the smoothed signal. Start is the last top frame before
+    the descent, end is the first top frame after the ascent, bottom is the
+    deepest frame in between.
+
+    Returns a list of dicts with start/bottom/end frame indices, times,
+    duration, depth and a confidence in [0, 1] built from the threshold
+    margins and how noisy the raw signal was around the rep.
+    """
+    raw = _fill_gaps(elbow_angles)
+    n = raw.size
+    if timestamps is None:
+        timestamps = np.arange(n, dtype=np.float64) / float(fps)
+    else:
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        if n > 1:
+            fps = 1.0 / max(1e-6, float(np.median(np.diff(timestamps))))
+    if n == 0 or np.isnan(raw).all():
+        return []
+
+    smoothed = smooth_series(raw, int(round(smoothing_seconds * fps)))
+
+    # Hysteresis zones: +1 at the top, -1 at the bottom, 0 in between
+    zone = np.zeros(n, dtype=np.int8)
+    zone[smoothed >= up_threshold] = 1
+    zone[smoothed <= down_threshold] = -1
+    vals, firsts, lasts = _runs(zone)
+    if vals.size < 3:
+        return []
+
+    # bottom runs framed by a top run on each side
+    mid = np.flatnonzero((vals[1:-1] == -1) & (vals[:-2] == 1) & (vals[2:] == 1)) + 1
+    if mid.size == 0:
+        return []
+    start = lasts[mid - 1]
+    end = firsts[mid + 1]
+
+    # Deepest frame of each rep (between start and end) via segment reductions
+    seg_lengths = end - start + 1
+    seg_ids = np.repeat(np.arange(mid.size), seg_lengths)
+    offsets = np.arange(seg_ids.size) - np.repeat(np.cumsum(seg_lengths) - seg_lengths, seg_lengths)
+    frame_idx = np.repeat(start, seg_lengths) + offsets
+    seg_vals = smoothed[frame_idx]
+    order = np.lexsort((seg_vals, seg_ids))
+    first_of_seg = np.concatenate(([0], np.cumsum(seg_lengths)[:-1]))
+    bottom = frame_idx[order[first_of_seg]]
+    depth = smoothed[bottom]
+
+    # Top margins: peak of the top runs around each rep
+    top_before = _run_max(smoothed, firsts[mid - 1], lasts[mid - 1])
+    top_after = _run_max(smoothed, firsts[mid + 1], lasts[mid + 1])
+
+    # Confidence: threshold margins and raw-signal noise, combined geometrically
+    depth_score = 0.5 + 0.5 * (1.0 - np.exp(-np.maximum(down_threshold - depth, 0.0) / margin_scale))
+    top_margin = np.minimum(top_before, top_after) - up_threshold
+    top_score = 0.5 + 0.5 * (1.0 - np.exp(-np.maximum(top_margin, 0.0) / margin_scale))
+    residual = (raw - smoothed) ** 2
+    rms = np.sqrt(np.add.reduceat(residual[frame_idx], first_of_seg) / seg_lengths)
+    noise_score = 1.0 / (1.0 + rms / noise_scale)
+    confidence = np.cbrt(depth_score * top_score * noise_score)
+
+    duration = timestamps[end] - timestamps[start]
+    keep = duration >= min_duration
+
+    return [
+        {
+            "start": int(s),
+            "bottom": int(b),
+            "end": int(e),
+            "start_time": round(float(timestamps[s]), 3),
+            "end_time": round(float(timestamps[e]), 3),
+            "duration": round(float(d), 3),
+            "depth": round(float(dp), 1),
+            "confidence": round(float(c), 3),
+        }
+        for s, b, e, d, dp, c in zip(
+            start[keep], bottom[keep], end[keep], duration[keep], depth[keep], confidence[keep]
+        )
+    ]
+
+
+def _run_max(x, firsts, lasts):
+    """Maximum of x over each inclusive [first, last] range."""
+    bounds = np.empty(firsts.size * 2, dtype=np.int64)
+    bounds[0::2] = firsts
+    bounds[1::2] = lasts + 1
+    # reduceat needs in-range indices; a trailing sentinel covers lasts == len(x) - 1
+    padded = np.concatenate((x, [-np.inf]))
+    return np.maximum.reduceat(padded, bounds)[0::2]
+
+
+def cross_check(intervals, live_reps: int, tolerance: int = 1, min_confidence: float = 0.0):
+    """Compare offline segmentation against the live counter's total."""
+    offline = sum(1 for rep in intervals if rep["confidence"] >= min_confidence)
+    difference = int(live_reps) - offline
+    return {
+        "offline_reps": offline,
+        "live_reps": int(live_reps),
+        "difference": difference,
+        "agrees": abs(difference) <= tolerance,
+    }
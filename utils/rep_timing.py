@@ -0,0 +1,51 @@
+"""
+utils/rep_timing.py
+Time-based smoothing and cooldown for the rep counters. Angles are smoothed
+with an EMA whose weight depends on the time since the previous frame
+(1 - exp(-dt / tau)), and the cooldown between reps is measured in seconds,
+so rep counting behaves the same at any frame rate and when frames are
+dropped or inference is skipped. The older per-frame parameters
+(smoothing_alpha, cooldown_frames) are converted at REFERENCE_FPS.
+"""
+
+import math
+
+import numpy as np
+
+
+# Frame rate the per-frame parameters were tuned at
+REFERENCE_FPS = 30.0
+
+# Slack when comparing timestamps with a cooldown end (sums of frame intervals)
+TIME_EPSILON = 1e-9
+
+
+def alpha_to_tau(alpha, fps=REFERENCE_FPS):
+    """EMA time constant (seconds) that weights a new frame by `alpha` at `fps`."""
+    alpha = float(np.clip(alpha, 0.0, 1.0))
+    if alpha >= 1.0:
+        return 0.0
+    if alpha <= 0.0:
+        return math.inf
+    return -1.0 / (fps * math.log1p(-alpha))
+
+
+def frames_to_seconds(frames, fps=REFERENCE_FPS):
+    return max(0, int(frames)) / fps
+
+
+def ema_weight(dt, tau):
+    """Weight of a sample `dt` seconds after the previous one: 1 - exp(-dt / tau).
+
+    tau <= 0 means no smoothing (weight 1); dt <= 0 (a repeated timestamp) adds nothing.
+    """
+    if tau <= 0.0:
+        return 1.0
+    return float(-np.expm1(-max(dt, 0.0) / tau))
+
+
+def batch_ema_weight(dt, tau):
+    """Vectorized `ema_weight` over arrays of dt and tau (same values element by element)."""
+    dt = np.maximum(dt, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(tau > 0.0, -np.expm1(-dt / tau), 1.0)
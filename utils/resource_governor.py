@@ -0,0 +1,141 @@
+"""
+utils/resource_governor.py
+Splits a declared CPU budget between the pose pipelines sharing one host.
+OpenCV and MediaPipe's XNNPACK delegate each size their thread pools from the
+machine's full core count, so N pipelines on one box start N times as many
+busy threads as there are cores. The governor gives every session (camera
+worker, inference worker or backend process) a slot with an OpenCV thread
+count and, optionally, a dedicated set of CPUs.
+
+MediaPipe Tasks has no thread-count option, but its graph threads are created
+when the landmarker is built and inherit the creating thread's CPU affinity,
+so pinning during construction (see `SessionResources.pinned`) confines
+inference to the slot's CPUs. Affinity needs os.sched_setaffinity (Linux);
+elsewhere only the OpenCV thread count is applied.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+
+import cv2
+
+
+AFFINITY_SUPPORTED = hasattr(os, "sched_setaffinity")
+
+
+def available_cpus():
+    """CPUs this process may run on (respects taskset/cgroup restrictions on Linux)."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+# ============================================================
+# SessionResources: one slot's share of the budget
+# ============================================================
+
+class SessionResources:
+    """Threads and (optionally) CPUs assigned to one session.
+
+    threads: OpenCV worker threads (cv2.setNumThreads is process-wide)
+    cpus: CPU ids to pin to, or None to leave affinity alone
+    """
+
+    __slots__ = ("slot", "threads", "cpus")
+
+    def __init__(self, slot, threads, cpus=None):
+        self.slot = slot
+        self.threads = int(max(1, threads))
+        self.cpus = tuple(cpus) if cpus else None
+
+    def apply_process(self):
+        """Apply to the whole process; call at startup, before other threads exist."""
+        cv2.setNumThreads(self.threads)
+        if self.cpus and AFFINITY_SUPPORTED:
+            os.sched_setaffinity(0, self.cpus)
+
+    def apply_thread(self):
+        """Pin the calling thread (threads it starts inherit the pinning)."""
+        if self.cpus and AFFINITY_SUPPORTED:
+            os.sched_setaffinity(0, self.cpus)  # pid 0 is the calling thread on Linux
+
+    @contextmanager
+    def pinned(self):
+        """Pin the calling thread for the duration of the block, then restore its affinity."""
+        if not (self.cpus and AFFINITY_SUPPORTED):
+            yield
+            return
+        previous = os.sched_getaffinity(0)
+        os.sched_setaffinity(0, self.cpus)
+        try:
+            yield
+        finally:
+            os.sched_setaffinity(0, previous)
+
+    def as_dict(self):
+        return {"slot": self.slot, "threads": self.threads, "cpus": list(self.cpus) if self.cpus else None}
+
+
+# ============================================================
+# ResourceGovernor
+# ============================================================
+
+class ResourceGovernor:
+    """Divides `cores` CPUs between `sessions` slots.
+
+    cores: CPU budget (None or 0 = every CPU available to this process)
+    sessions: pipelines expected to share the budget; each slot gets cores // sessions threads
+    pin: give each slot its own contiguous CPU range (wraps around when oversubscribed)
+    Slots are handed out with `acquire` and returned with `release`; `allocation(i)`
+    gives slot i directly for processes whose slot index is configured externally.
+    """
+
+    def __init__(self, cores=None, sessions=1, pin=False, cpus=None):
+        cpus = list(cpus) if cpus else available_cpus()
+        self.cores = int(min(cores, len(cpus))) if cores else len(cpus)
+        self.cpus = cpus[:self.cores]
+        self.sessions = int(max(1, sessions))
+        self.pin = bool(pin) and AFFINITY_SUPPORTED
+        self._in_use = set()
+        self._lock = threading.Lock()
+
+    @property
+    def threads_per_session(self):
+        return max(1, self.cores // self.sessions)
+
+    def allocation(self, slot):
+        """Resources for slot index `slot` (CPU ranges repeat every `sessions` slots)."""
+        slot = int(slot)
+        threads = self.threads_per_session
+        cpus = None
+        if self.pin:
+            start = ((slot % self.sessions) * threads) % self.cores
+            cpus = [self.cpus[(start + i) % self.cores] for i in range(min(threads, self.cores))]
+        return SessionResources(slot, threads, cpus)
+
+    def acquire(self):
+        """Lowest free slot's resources; slots past `sessions` reuse earlier CPU ranges."""
+        with self._lock:
+            slot = 0
+            while slot in self._in_use:
+                slot += 1
+            self._in_use.add(slot)
+        return self.allocation(slot)
+
+    def release(self, resources):
+        with self._lock:
+            self._in_use.discard(resources.slot)
+
+    def status(self):
+        with self._lock:
+            in_use = sorted(self._in_use)
+        return {
+            "cores": self.cores,
+            "sessions": self.sessions,
+            "threads_per_session": self.threads_per_session,
+            "pin": self.pin,
+            "cpus": self.cpus,
+            "slots_in_use": in_use,
+            "opencv_threads": cv2.getNumThreads(),
+        }
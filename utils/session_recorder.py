@@ -0,0 +1,293 @@
+"""
+utils/session_recorder.py
+Per-frame analysis recording and columnar export.
+Frames are appended to a flat binary file of fixed-size NumPy records, so
+recording and reading back never hold more than one chunk in memory. Export
+writes Parquet or Arrow IPC (with `pyarrow`) one row group per chunk, or CSV
+without it.
+"""
+
+import csv
+import io
+import json
+import os
+import threading
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    ARROW_AVAILABLE = True
+except ImportError:  # optional dependency
+    pa = pq = None
+    ARROW_AVAILABLE = False
+
+
+# ============================================================
+# Record layout
+# ============================================================
+
+FRAME_DTYPE = np.dtype([
+    ("timestamp", "<f8"),
+    ("frame_index", "<i8"),
+    ("detected", "u1"),
+    ("total_reps", "<i4"),
+    ("stage", "u1"),
+    ("form_state", "u1"),
+    ("elbow_angle", "<f4"),
+    ("back_angle", "<f4"),
+    ("progress", "<f4"),
+    ("left_elbow", "<f4"),
+    ("right_elbow", "<f4"),
+    ("left_hip", "<f4"),
+    ("right_hip", "<f4"),
+])
+
+# Categorical columns are stored as codes and exported as labels
+CATEGORIES = {
+    "stage": ("Up", "Down"),
+    "form_state": ("Neutral", "Correct", "Wrong"),
+}
+
+MAGIC = b"PUSHREC1"
+HEADER_SIZE = 512  # magic + JSON dtype description, zero padded
+DEFAULT_CHUNK_ROWS = 65536
+
+
+def _header():
+    descr = json.dumps({"dtype": FRAME_DTYPE.descr, "categories": CATEGORIES}).encode()
+    header = MAGIC + descr
+    if len(header) > HEADER_SIZE:
+        raise ValueError("record header does not fit in HEADER_SIZE")
+    return header.ljust(HEADER_SIZE, b"\0")
+
+
+def _code(category, value):
+    labels = CATEGORIES[category]
+    return labels.index(value) if value in labels else 0
+
+
+# ============================================================
+# Recording
+# ============================================================
+
+class SessionRecorder:
+    """Appends one fixed-size record per analyzed frame to `path`.
+
+    Rows are staged in a preallocated buffer and written in blocks of
+    `buffer_rows`; `record` is thread-safe.
+    """
+
+    def __init__(self, path, buffer_rows=1024):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._file = open(path, "wb")
+        self._file.write(_header())
+        self._buffer = np.zeros(int(buffer_rows), dtype=FRAME_DTYPE)
+        self._count = 0
+        self._frame_index = 0
+        self._lock = threading.Lock()
+
+    def record(self, timestamp, analysis=None):
+        """Append a frame; `analysis` is an analyze_pose() result, or None when nobody was detected."""
+        with self._lock:
+            if self._file is None:
+                return
+            row = self._buffer[self._count]
+            row["timestamp"] = timestamp
+            row["frame_index"] = self._frame_index
+            self._frame_index += 1
+            if analysis is None or analysis.get("elbow_angle") is None:
+                row["detected"] = 0
+                row["total_reps"] = analysis.get("total_reps", 0) if analysis else 0
+                row["stage"] = row["form_state"] = 0
+                for name in ("elbow_angle", "back_angle", "progress",
+                             "left_elbow", "right_elbow", "left_hip", "right_hip"):
+                    row[name] = np.nan
+            else:
+                debug = analysis.get("debug", {})
+                row["detected"] = 1
+                row["total_reps"] = analysis["total_reps"]
+                row["stage"] = _code("stage", analysis["stage"])
+                row["form_state"] = _code("form_state", analysis["form_state"])
+                row["elbow_angle"] = analysis["elbow_angle"]
+                row["back_angle"] = analysis["back_angle"]
+                row["progress"] = analysis["progress"]
+                for name in ("left_elbow", "right_elbow", "left_hip", "right_hip"):
+                    row[name] = debug.get(name, np.nan)
+            self._count += 1
+            if self._count == len(self._buffer):
+                self._flush()
+
+    def _flush(self):
+        if self._count:
+            self._file.write(self._buffer[:self._count].tobytes())
+            self._count = 0
+
+    def close(self):
+        with self._lock:
+            if self._file is None:
+                return
+            self._flush()
+            self._file.close()
+            self._file = None
+
+
+# ============================================================
+# Reading
+# ============================================================
+
+def open_recording(path):
+    """Memory-map a recording; returns a read-only structured array (no data is loaded)."""
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+    if not header.startswith(MAGIC):
+        raise ValueError(f"{path} is not a session recording")
+    rows = (os.path.getsize(path) - HEADER_SIZE) // FRAME_DTYPE.itemsize
+    if rows == 0:
+        return np.zeros(0, dtype=FRAME_DTYPE)
+    return np.memmap(path, dtype=FRAME_DTYPE, mode="r", offset=HEADER_SIZE, shape=(rows,))
+
+
+def iter_chunks(path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Yield the recording as consecutive structured-array chunks of at most `chunk_rows`."""
+    records = open_recording(path)
+    for start in range(0, len(records), chunk_rows):
+        yield np.array(records[start:start + chunk_rows])
+
+
+def chunk_columns(chunk):
+    """Column dict for a chunk with categorical codes replaced by labels."""
+    columns = {name: chunk[name] for name in FRAME_DTYPE.names}
+    columns["detected"] = columns["detected"].astype(bool)
+    for name, labels in CATEGORIES.items():
+        columns[name] = np.asarray(labels, dtype=object)[columns[name]]
+    return columns
+
+
+# ============================================================
+# Export
+# ============================================================
+
+def _arrow_schema():
+    fields = []
+    for name in FRAME_DTYPE.names:
+        if name in CATEGORIES:
+            fields.append(pa.field(name, pa.dictionary(pa.int8(), pa.string())))
+        elif name == "detected":
+            fields.append(pa.field(name, pa.bool_()))
+        else:
+            fields.append(pa.field(name, pa.from_numpy_dtype(FRAME_DTYPE[name])))
+    return pa.schema(fields)
+
+
+def _arrow_batch(chunk, schema):
+    arrays = []
+    for name in FRAME_DTYPE.names:
+        if name in CATEGORIES:
+            dictionary = pa.array(CATEGORIES[name], type=pa.string())
+            arrays.append(pa.DictionaryArray.from_arrays(pa.array(chunk[name].astype(np.int8)), dictionary))
+        elif name == "detected":
+            arrays.append(pa.array(chunk[name].astype(bool)))
+        else:
+            arrays.append(pa.array(chunk[name]))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def iter_csv(path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Yield the recording as CSV text, one chunk at a time."""
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(FRAME_DTYPE.names)
+    for chunk in iter_chunks(path, chunk_rows):
+        columns = chunk_columns(chunk)
+        for name in FRAME_DTYPE.names:
+            if FRAME_DTYPE[name] == np.float32:
+                columns[name] = columns[name].astype(np.float64).round(4)  # print 88.2, not 88.19999694824219
+        writer.writerows(zip(*(columns[name].tolist() for name in FRAME_DTYPE.names)))
+        yield out.getvalue()
+        out.seek(0)
+        out.truncate()
+    if out.tell():
+        yield out.getvalue()
+
+
+def export_recording(path, out_path, fmt=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Export a recording to Parquet, Arrow IPC or CSV; returns the number of rows written.
+
+    fmt defaults to the output extension (.parquet, .arrow/.feather, .csv).
+    Parquet and Arrow require pyarrow; memory use is bounded by `chunk_rows`.
+    """
+    if fmt is None:
+        ext = os.path.splitext(out_path)[1].lower()
+        fmt = {".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow"}.get(ext, "csv")
+    if fmt in ("parquet", "arrow") and not ARROW_AVAILABLE:
+        raise RuntimeError("pyarrow is not installed; run `pip install pyarrow` or export as CSV")
+
+    if fmt == "csv":
+        with open(out_path, "w", newline="") as f:
+            for text in iter_csv(path, chunk_rows):
+                f.write(text)
+        return len(open_recording(path))
+
+    schema = _arrow_schema()
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(out_path, schema)
+        write = lambda batch: writer.write_table(pa.Table.from_batches([batch]))
+    elif fmt == "arrow":
+        writer = pa.ipc.new_file(out_path, schema)
+        write = writer.write_batch
+    else:
+        raise ValueError(f"unknown export format {fmt!r}")
+    rows = 0
+    try:
+        for chunk in iter_chunks(path, chunk_rows):
+            write(_arrow_batch(chunk, schema))  # one row group / record batch per chunk
+            rows += len(chunk)
+    finally:
+        writer.close()
+    return rows
+
+
+# ============================================================
+# Retention
+# ============================================================
+
+def prune_recordings(directory, max_files=None, max_bytes=None):
+    """Delete the oldest `.bin` recordings in `directory` beyond `max_files` or `max_bytes` in total.
+
+    Newer recordings are kept first; once a limit is reached every older file is
+    removed. Returns the number of files deleted.
+    """
+    entries = []
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return 0
+    for name in names:
+        if not name.endswith(".bin"):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+    entries.sort(reverse=True)  # newest first
+
+    kept = total = removed = 0
+    over = False
+    for _, size, path in entries:
+        over = over or (max_files is not None and kept >= max_files) \
+            or (max_bytes is not None and total + size > max_bytes)
+        if not over:
+            kept += 1
+            total += size
+            continue
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError:
+            pass
+    return removed
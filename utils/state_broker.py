@@ -0,0 +1,394 @@
+"""
+utils/state_broker.py
+Shared state for running the API across several uvicorn workers: a small
+key/value + pub/sub broker process, a thread-safe client, and an in-process
+store with the same interface for single-worker runs.
+
+Wire format (newline-delimited JSON over TCP):
+    request   {"id": n, "op": "get" | "mget" | "set" | "setnx" | "delete" | "expire"
+                          | "keys" | "publish" | "subscribe" | "unsubscribe", ...}
+    response  {"id": n, "result": ...} or {"id": n, "error": "..."}
+    push      {"channel": name, "message": ...}
+A line may carry "size": n, in which case n raw bytes follow it (binary
+attachment such as an encoded video frame).
+"""
+
+import asyncio
+import itertools
+import json
+import socket
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+
+MAX_SUBSCRIBER_BUFFER = 4 * 2**20  # drop pushes to subscribers this far behind
+
+
+def _encode(obj, data=None):
+    if data is not None:
+        obj = dict(obj, size=len(data))
+        return json.dumps(obj, separators=(",", ":")).encode() + b"\n" + bytes(data)
+    return json.dumps(obj, separators=(",", ":")).encode() + b"\n"
+
+
+def parse_address(address):
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+# ============================================================
+# Key/value store with TTLs (shared by broker and local mode)
+# ============================================================
+
+class _Store:
+    def __init__(self):
+        self._data = {}  # key -> (value, expires_at or None)
+
+    def _live(self, key, now):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        if item[1] is not None and item[1] <= now:
+            del self._data[key]
+            return None
+        return item
+
+    def get(self, key):
+        item = self._live(key, time.monotonic())
+        return None if item is None else item[0]
+
+    def mget(self, keys):
+        return [self.get(key) for key in keys]
+
+    def set(self, key, value, ttl=None):
+        self._data[key] = (value, time.monotonic() + ttl if ttl else None)
+        return True
+
+    def setnx(self, key, value, ttl=None):
+        """Set only if absent (or held by the same value); returns True on success."""
+        item = self._live(key, time.monotonic())
+        if item is not None and item[0] != value:
+            return False
+        return self.set(key, value, ttl)
+
+    def delete(self, key, value=None):
+        """Delete `key`; with `value`, only if it currently holds that value."""
+        item = self._live(key, time.monotonic())
+        if item is None or (value is not None and item[0] != value):
+            return False
+        del self._data[key]
+        return True
+
+    def expire(self, key, ttl, value=None):
+        """Renew the TTL of `key` (a lease), optionally only if it holds `value`."""
+        item = self._live(key, time.monotonic())
+        if item is None or (value is not None and item[0] != value):
+            return False
+        self._data[key] = (item[0], time.monotonic() + ttl if ttl else None)
+        return True
+
+    def keys(self, prefix=""):
+        now = time.monotonic()
+        return [key for key in list(self._data) if key.startswith(prefix) and self._live(key, now) is not None]
+
+
+# ============================================================
+# Broker server
+# ============================================================
+
+class StateBroker:
+    """asyncio key/value + pub/sub server."""
+
+    def __init__(self):
+        self.store = _Store()
+        self._channels = {}  # channel -> set of StreamWriter
+        self._clients = set()
+        self._server = None
+
+    async def start(self, host="127.0.0.1", port=0):
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self, host="127.0.0.1", port=0):
+        await self.start(host, port)
+        async with self._server:
+            await self._server.serve_forever()
+
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+        for writer in list(self._clients):
+            writer.close()
+
+    def _publish(self, channel, message, data):
+        payload = _encode({"channel": channel, "message": message}, data)
+        receivers = 0
+        for writer in list(self._channels.get(channel, ())):
+            if writer.is_closing():
+                continue
+            if writer.transport.get_write_buffer_size() > MAX_SUBSCRIBER_BUFFER:
+                continue  # slow subscriber; skip rather than queue without bound
+            writer.write(payload)
+            receivers += 1
+        return receivers
+
+    def _execute(self, request, data, writer):
+        op = request["op"]
+        if op == "get":
+            return self.store.get(request["key"])
+        if op == "mget":
+            return self.store.mget(request["keys"])
+        if op == "set":
+            return self.store.set(request["key"], request.get("value"), request.get("ttl"))
+        if op == "setnx":
+            return self.store.setnx(request["key"], request.get("value"), request.get("ttl"))
+        if op == "delete":
+            return self.store.delete(request["key"], request.get("value"))
+        if op == "expire":
+            return self.store.expire(request["key"], request.get("ttl"), request.get("value"))
+        if op == "keys":
+            return self.store.keys(request.get("prefix", ""))
+        if op == "publish":
+            return self._publish(request["channel"], request.get("message"), data)
+        if op == "subscribe":
+            self._channels.setdefault(request["channel"], set()).add(writer)
+            return True
+        if op == "unsubscribe":
+            self._channels.get(request["channel"], set()).discard(writer)
+            return True
+        raise ValueError(f"unknown op {op!r}")
+
+    async def _handle(self, reader, writer):
+        self._clients.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request = json.loads(line)
+                data = await reader.readexactly(request["size"]) if request.get("size") else None
+                try:
+                    response = {"id": request.get("id"), "result": self._execute(request, data, writer)}
+                except Exception as e:
+                    response = {"id": request.get("id"), "error": str(e)}
+                writer.write(_encode(response))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, json.JSONDecodeError):
+            pass
+        finally:
+            self._clients.discard(writer)
+            for subscribers in self._channels.values():
+                subscribers.discard(writer)
+            writer.close()
+
+
+class BrokerThread:
+    """StateBroker running on its own event loop thread (tests, single-host launches)."""
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.broker = StateBroker()
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self.address = None
+        self._thread = threading.Thread(target=self._run, args=(host, port), daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run(self, host, port):
+        asyncio.set_event_loop(self._loop)
+        host, port = self._loop.run_until_complete(self.broker.start(host, port))
+        self.address = f"{host}:{port}"
+        self._ready.set()
+        self._loop.run_forever()
+        # Let connection handlers see their closed sockets and exit
+        tasks = asyncio.all_tasks(self._loop)
+        if tasks:
+            self._loop.run_until_complete(asyncio.wait(tasks, timeout=1.0))
+        self._loop.close()
+
+    def stop(self):
+        self._loop.call_soon_threadsafe(self.broker.close)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=2.0)
+
+
+def start_broker(host="127.0.0.1", port=0):
+    """Start a broker in a background thread; returns the BrokerThread (see `.address`)."""
+    return BrokerThread(host, port)
+
+
+# ============================================================
+# Clients
+# ============================================================
+
+class BrokerClient:
+    """Thread-safe client for StateBroker.
+
+    Calls block until the broker answers (sub-millisecond on localhost); a
+    closed connection or no answer within `timeout` raises ConnectionError.
+    Subscription callbacks run on the client's reader thread as
+    `callback(message, data)`; keep them short and do not call back into
+    the client from them.
+    """
+
+    def __init__(self, address, timeout=2.0, connect_timeout=2.0):
+        self.address = address
+        self.timeout = float(timeout)
+        self._sock = socket.create_connection(parse_address(address), timeout=connect_timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock.settimeout(None)
+        self._file = self._sock.makefile("rb")
+        self._send_lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._callbacks = {}
+        self._closed = False
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+
+    def _read_loop(self):
+        try:
+            while True:
+                line = self._file.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                data = self._file.read(message["size"]) if message.get("size") else None
+                if "channel" in message:
+                    callback = self._callbacks.get(message["channel"])
+                    if callback is not None:
+                        callback(message.get("message"), data)
+                    continue
+                future = self._pending.pop(message.get("id"), None)
+                if future is None:
+                    continue
+                if "error" in message:
+                    future.set_exception(RuntimeError(message["error"]))
+                else:
+                    future.set_result(message.get("result"))
+        except (OSError, ValueError):
+            pass
+        finally:
+            self._closed = True
+            for future in list(self._pending.values()):
+                if not future.done():
+                    future.set_exception(ConnectionError("state broker connection closed"))
+            self._pending.clear()
+
+    def _call(self, op, data=None, **fields):
+        if self._closed:
+            raise ConnectionError("state broker connection closed")
+        request_id = next(self._ids)
+        future = Future()
+        self._pending[request_id] = future
+        with self._send_lock:
+            self._sock.sendall(_encode(dict(fields, id=request_id, op=op), data))
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            self._pending.pop(request_id, None)
+            raise ConnectionError(f"state broker did not answer {op!r} within {self.timeout}s") from None
+
+    def get(self, key, default=None):
+        value = self._call("get", key=key)
+        return default if value is None else value
+
+    def mget(self, keys):
+        return self._call("mget", keys=list(keys))
+
+    def set(self, key, value, ttl=None):
+        return self._call("set", key=key, value=value, ttl=ttl)
+
+    def setnx(self, key, value, ttl=None):
+        return self._call("setnx", key=key, value=value, ttl=ttl)
+
+    def delete(self, key, value=None):
+        return self._call("delete", key=key, value=value)
+
+    def expire(self, key, ttl, value=None):
+        return self._call("expire", key=key, ttl=ttl, value=value)
+
+    def keys(self, prefix=""):
+        return self._call("keys", prefix=prefix)
+
+    def publish(self, channel, message=None, data=None):
+        """Publish to `channel`; returns the number of subscribers reached."""
+        return self._call("publish", data=data, channel=channel, message=message)
+
+    def subscribe(self, channel, callback):
+        self._callbacks[channel] = callback
+        return self._call("subscribe", channel=channel)
+
+    def unsubscribe(self, channel):
+        self._callbacks.pop(channel, None)
+        return self._call("unsubscribe", channel=channel)
+
+    def close(self):
+        self._closed = True
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._sock.close()
+
+
+class LocalStateStore:
+    """In-process stand-in for BrokerClient when the API runs as a single worker."""
+
+    def __init__(self):
+        self._store = _Store()
+        self._lock = threading.Lock()
+        self._callbacks = {}
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._store.get(key)
+        return default if value is None else value
+
+    def mget(self, keys):
+        with self._lock:
+            return self._store.mget(keys)
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            return self._store.set(key, value, ttl)
+
+    def setnx(self, key, value, ttl=None):
+        with self._lock:
+            return self._store.setnx(key, value, ttl)
+
+    def delete(self, key, value=None):
+        with self._lock:
+            return self._store.delete(key, value)
+
+    def expire(self, key, ttl, value=None):
+        with self._lock:
+            return self._store.expire(key, ttl, value)
+
+    def keys(self, prefix=""):
+        with self._lock:
+            return self._store.keys(prefix)
+
+    def publish(self, channel, message=None, data=None):
+        callback = self._callbacks.get(channel)
+        if callback is None:
+            return 0
+        callback(message, data)
+        return 1
+
+    def subscribe(self, channel, callback):
+        self._callbacks[channel] = callback
+        return True
+
+    def unsubscribe(self, channel):
+        self._callbacks.pop(channel, None)
+        return True
+
+    def close(self):
+        pass
+
+
+def connect_shared_state(address=None):
+    """BrokerClient for `address` ("host:port"), or a LocalStateStore when empty."""
+    return BrokerClient(address) if address else LocalStateStore()